@@ -0,0 +1,101 @@
+# benchmark.py
+"""
+Замеры скорости парсеров и расчета на синтетических данных разного масштаба
+
+    python benchmark.py                          # branch и network, 3 повтора
+    python benchmark.py --save-baseline          # принять замеры как базовые
+    python benchmark.py --compare                # сравнить с базовыми, код 1 при регрессии
+    python benchmark.py --scales large --repeat 1 --no-memory
+    python benchmark.py --compare старый.json --threshold 0.2
+
+Этапы: parse_schedule, parse_urs_settings, parse_sales_analysis,
+parse_zakaz_sales, create_integrated_dataframe, calculate_salary,
+dashboard_generate. По каждому - лучшее и медианное время, пик памяти и
+контрольная сумма результата (см. модули/benchmark_suite.py). Замеры
+сохраняются в отчётные_папки/бенчмарки.
+
+Регрессия - этап медленнее базового больше чем на порог, выросший пик
+памяти или другая контрольная сумма (ускорение изменило результат).
+"""
+
+import argparse
+import sys
+import time
+
+
+def parse_arguments(argv=None):
+    # Имена масштабов и этапов - из набора замеров, чтобы опечатка не давала пустой замер
+    from модули import benchmark_suite as suite
+
+    parser = argparse.ArgumentParser(
+        description="Замеры скорости этапов расчета на синтетических данных"
+    )
+    parser.add_argument('--scales', nargs='+', default=None, choices=list(suite.SCALES),
+                        help="масштабы (по умолчанию branch network)")
+    parser.add_argument('--stages', nargs='+', default=None, choices=list(suite.STAGES),
+                        help="только эти этапы (по умолчанию все)")
+    parser.add_argument('--repeat', type=int, default=None,
+                        help="повторов каждого этапа (по умолчанию 3)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="зерно генератора входных данных")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="без замера пика памяти (отдельный прогон под tracemalloc)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="записать замеры в базовый файл")
+    parser.add_argument('--compare', nargs='?', const='', default=None, metavar='ФАЙЛ',
+                        help="сравнить с базовыми замерами (по умолчанию - базовый файл)")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="допустимое замедление, доля (по умолчанию 0.10)")
+    parser.add_argument('--output', default=None,
+                        help="файл результатов (по умолчанию - в отчётные_папки/бенчмарки)")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="подробность журнала расчета (по умолчанию WARNING)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    started = time.perf_counter()
+    args = parse_arguments(argv)
+
+    from модули.log_setup import configure_logging
+    configure_logging(args.log_level)
+
+    from модули import benchmark_suite as suite
+
+    baseline = None
+    if args.compare is not None:
+        baseline_path = args.compare or suite.BASELINE_FILE
+        try:
+            baseline = suite.load_results(baseline_path)
+        except (OSError, ValueError) as e:
+            print(f"❌ Нет базовых замеров {baseline_path}: {e}")
+            return 1
+
+    scales = args.scales or (list(baseline['scales']) if baseline else suite.DEFAULT_SCALES)
+    threshold = args.threshold if args.threshold is not None else suite.DEFAULT_THRESHOLD
+    results = suite.run_suite(scales, args.repeat or suite.DEFAULT_REPEAT,
+                              memory=not args.no_memory, seed=args.seed, stages=args.stages)
+
+    print(suite.format_results(results))
+    print(f"\n💾 Замеры: {suite.save_results(results, args.output)}")
+    if args.save_baseline:
+        print(f"📌 Базовые замеры: {suite.update_baseline(results)}")
+
+    exit_code = 0
+    if baseline is not None:
+        comparison = suite.compare_results(baseline, results, threshold)
+        print(suite.format_comparison(comparison, threshold))
+        if baseline.get('environment') != results['environment']:
+            print("\n❔ Базовые замеры сняты в другом окружении - время сравнивать с осторожностью")
+        if suite.has_regressions(comparison):
+            print("\n❌ Есть регрессии")
+            exit_code = 1
+        else:
+            print("\n✅ Регрессий нет")
+
+    print(f"\n⏱️  Готово за {time.perf_counter() - started:.1f} с")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# cli.py
+"""
+Расчет из командной строки - без окна приложения (tkinter не импортируется)
+
+Для запуска на сервере сразу после выгрузки из 1С:
+    python cli.py                          # папка 'данные', норма офиса 168
+    python cli.py D:/выгрузка --office-norm 176 --no-dashboard
+    python cli.py D:/архив --batch         # все месяцы папки (см. модули/pipeline.py)
+    python cli.py --log-level DEBUG        # подробная отладка расчета по сотрудникам
+    python cli.py --metrics --trace-memory # разбивка по интервалам и пик памяти
+
+Шаги те же, что у кнопок приложения: период -> загрузка -> интеграция ->
+расчет зарплаты -> дашборд. В конце печатается таблица этапов: секунды,
+строк в секунду и пиковая память процесса. Подробные метрики запуска
+(парсеры, шаги интеграции, отделы, дашборд) сохраняются в JSON - см.
+модули/run_metrics.py; --metrics печатает их сводку.
+
+Тяжелые модули (pandas, парсеры) импортируются после разбора аргументов,
+чтобы --help и ошибки в аргументах отвечали мгновенно.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+DEFAULT_DATA_FOLDER = "данные"
+
+STAGE_NAMES = {
+    'period': 'Период',
+    'load': 'Загрузка файлов',
+    'integrate': 'Интеграция',
+    'calculate': 'Расчет зарплаты',
+    'dashboard': 'Дашборд',
+}
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Расчет зарплаты без окна приложения"
+    )
+    parser.add_argument('folder', nargs='?', default=DEFAULT_DATA_FOLDER,
+                        help="папка с входными файлами (по умолчанию 'данные')")
+    parser.add_argument('--office-norm', type=float, default=168,
+                        help="норма часов для отделов 'Офис' (по умолчанию 168)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="число процессов (по умолчанию - по числу ядер)")
+    parser.add_argument('--no-dashboard', action='store_true',
+                        help="не создавать HTML дашборд")
+    parser.add_argument('--force', action='store_true',
+                        help="холодная загрузка: файлы разбираются заново, мимо кэша")
+    parser.add_argument('--batch', action='store_true',
+                        help="folder - корневая папка с папками месяцев")
+    parser.add_argument('--log-level', default=None, choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="подробность журнала (по умолчанию INFO или SCHETOBOT_LOG_LEVEL)")
+    parser.add_argument('--metrics', action='store_true',
+                        help="напечатать сводку метрик запуска по интервалам")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="пик памяти каждого интервала (tracemalloc, расчет заметно медленнее)")
+    return parser.parse_args(argv)
+
+
+def format_stage_table(stage_stats):
+    """Таблица этапов: секунды, строк/с, пиковая память"""
+    lines = [
+        f"{'Этап':<18} {'Секунд':>8} {'Строк':>10} {'Строк/с':>12} {'Пик памяти':>12}",
+        "-" * 64,
+    ]
+    for stat in stage_stats:
+        seconds = stat['seconds']
+        rate = f"{stat['rows'] / seconds:,.0f}" if seconds > 0 else "-"
+        memory = f"{stat['peak_rss_mb']:,.0f} МБ" if stat['peak_rss_mb'] is not None else "-"
+        lines.append(f"{STAGE_NAMES.get(stat['stage'], stat['stage']):<18} {seconds:>8.2f} "
+                     f"{stat['rows']:>10,} {rate:>12} {memory:>12}")
+    lines.append("-" * 64)
+    lines.append(f"{'Всего':<18} {sum(s['seconds'] for s in stage_stats):>8.2f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    started = time.perf_counter()
+    args = parse_arguments(argv)
+
+    from модули.log_setup import configure_logging
+    configure_logging(args.log_level)
+
+    from модули import pipeline, run_metrics
+    if args.trace_memory:
+        # Через окружение - чтобы включилось и в процессах пула
+        os.environ[run_metrics.TRACE_MEMORY_ENV] = '1'
+
+    if args.batch:
+        batch = pipeline.run_batch(args.folder, args.office_norm, args.workers,
+                                   dashboard=not args.no_dashboard, force=args.force)
+        if args.metrics:
+            for label, metrics in batch['metrics'].items():
+                print(f"\n⏱️  Метрики {label}:")
+                print(run_metrics.format_breakdown(metrics))
+        return 1 if batch['errors'] else 0
+
+    try:
+        state, _ = pipeline.run_period(args.folder, args.office_norm,
+                                       dashboard=not args.no_dashboard,
+                                       max_workers=args.workers, force=args.force)
+    except Exception as e:
+        print(f"❌ Ошибка расчета: {e}")
+        return 1
+
+    summary = state.calculations['summary']
+    print("\n" + "=" * 64)
+    print(f"📅 Период: {state.report_month} ({state.report_period})")
+    print(f"⏱️  Норма 'Магазин': {state.shop_norm_hours:.1f}, 'Офис': {args.office_norm:g}")
+    print(f"👥 Сотрудников: {summary['total_employees']}, отделов: {summary['total_departments']}")
+    print(f"💰 Фонд зарплаты: {summary['total_salary']:,.0f} руб.")
+    if state.dashboard_path:
+        print(f"📊 Дашборд: {state.dashboard_path}")
+    print("=" * 64)
+    print(format_stage_table(state.stage_stats))
+    if args.metrics and state.metrics:
+        print()
+        print(run_metrics.format_breakdown(state.metrics))
+    if state.metrics_path:
+        print(f"\n⏱️  Метрики: {state.metrics_path}")
+    print(f"\n✅ Готово за {time.perf_counter() - started:.2f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,60 @@
+import time
+
+# Момент запуска - для замера времени до появления окна
+START_TIME = time.perf_counter()
+
+import logging
 import os
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-from datetime import datetime
-from utils import format_russian_number
-import sys
-from data_manager import DataManager
-from модули.parse_zakaz_sales import parse_zakaz_sales
 
-# Отладочный код
-print(f"\n=== DEBUG: Проверка импортов ===")
-print(f"Текущая директория: {os.getcwd()}")
-print(f"Папка модули существует: {os.path.exists('модули')}")
+# Легкие модули (без pandas) - остальное импортируется при первом использовании
+from модули.parse_cache import clear_parse_cache
+from модули.parallel_loader import load_all_files_parallel
+from модули.report_period import shop_norm_from_period
+from модули.background_worker import BackgroundWorker
+from модули import run_metrics
+from модули.log_setup import configure_logging, get_logger, TextWidgetHandler
+
+# Режим разработчика: модуль расчета перечитывается при каждом нажатии
+# "Рассчитать зарплату" (python main.py --dev или SCHETOBOT_DEV=1)
+DEV_MODE = '--dev' in sys.argv or os.environ.get('SCHETOBOT_DEV') == '1'
+
+# Отладочный журнал модулей в консоль (python main.py --debug или SCHETOBOT_LOG_LEVEL=DEBUG)
+configure_logging('DEBUG' if '--debug' in sys.argv else None)
+logger = get_logger(__name__)
+
+# Тяжелые модули, которые загружаются в фоне после появления окна
+PRELOAD_MODULES = [
+    'pandas',
+    'openpyxl',
+    'xlrd',
+    'data_manager',
+    'модули.columnar_store',
+    'модули.parse_schedule',
+    'модули.parse_staff_universal',
+    'модули.parse_urs_integrated',
+    'модули.parse_bonus_integrated',
+    'модули.parse_sales_analysis',
+    'модули.parse_zakaz_sales',
+    'модули.data_integrator_simple',
+    'модули.salary_calculator',
+]
+
+
+def preload_modules(modules=PRELOAD_MODULES):
+    """Импортирует тяжелые модули заранее (в фоновом потоке), ошибки не важны"""
+    import importlib
+
+    for module_name in modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            # Отсутствующий модуль покажет понятную ошибку при первом использовании
+            pass
 
-# Импортируем DataManager
-from data_manager import DataManager
 
 class SalaryCalculatorApp:
     
@@ -23,8 +63,12 @@ class SalaryCalculatorApp:
         self.root.title("Расчет зарплаты")
         self.root.geometry("990x700")
         
-        # Создаем менеджер данных
-        self.manager = DataManager()
+        # Менеджер данных создается при первом обращении (см. свойство manager)
+        self._manager = None
+        
+        # Долгие этапы (загрузка, интеграция, расчет, дашборд) идут в фоновом потоке
+        self.worker = BackgroundWorker(self.root, on_progress=self._on_stage_progress)
+        self.metrics_path = None
         
         # Настройки
         self.office_norm_hours = 168  # значение по умолчанию
@@ -41,6 +85,14 @@ class SalaryCalculatorApp:
                            foreground='blue')
         self.active_button = None
         
+    @property
+    def manager(self):
+        """Менеджер данных (data_manager тянет pandas и парсеры - создаем по требованию)"""
+        if self._manager is None:
+            from data_manager import DataManager
+            self._manager = DataManager()
+        return self._manager
+        
     def set_active_button(self, button_text):
         """Устанавливает активную кнопку"""
         # Сбрасываем предыдущую активную кнопку
@@ -133,6 +185,12 @@ class SalaryCalculatorApp:
         ttk.Button(settings_frame, text="Применить", 
                   command=self.update_office_norm).pack(side=tk.LEFT, padx=5)
         
+        ttk.Button(settings_frame, text="Обновить бонусы", 
+                  command=self.reload_bonus_list).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(settings_frame, text="Очистить кэш", 
+                  command=self.clear_cache).pack(side=tk.LEFT, padx=5)
+        
         # Кнопки действий слева
         btn_frame = ttk.LabelFrame(self.root, text="Действия", padding="10")
         btn_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=10)
@@ -147,13 +205,19 @@ class SalaryCalculatorApp:
             ("📄 Создать отчет Excel", self.create_report),
             ("📋 Простой отчет", self.create_simple_report),
             ("📈 Дашборд", self.show_dashboard),
-            ("💾 Сохранить результаты", self.save_results)
+            ("💾 Сохранить результаты", self.save_results),
+            ("⏱ Метрики", self.show_metrics)
         ]
         
         for i, (text, command) in enumerate(buttons):
             btn = ttk.Button(btn_frame, text=text, command=command, width=25)
             btn.grid(row=i, column=0, padx=5, pady=5, sticky=tk.W)
         
+        # Отмена фонового этапа (активна, пока этап выполняется)
+        self.cancel_button = ttk.Button(btn_frame, text="⏹ Отменить", command=self.cancel_stage,
+                                        width=25, state=tk.DISABLED)
+        self.cancel_button.grid(row=len(buttons), column=0, padx=5, pady=(15, 5), sticky=tk.W)
+        
         # Правая часть - информация и превью
         info_frame = ttk.LabelFrame(self.root, text="Информация и результаты", padding="10")
         info_frame.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=10)
@@ -165,6 +229,7 @@ class SalaryCalculatorApp:
         scrollbar = ttk.Scrollbar(info_frame, orient="vertical", command=self.info_text.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.info_text.configure(yscrollcommand=scrollbar.set)
+        self.setup_log()
         
         # Кнопки очистки и копирования
         text_btn_frame = ttk.Frame(info_frame)
@@ -179,49 +244,55 @@ class SalaryCalculatorApp:
                                     relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), padx=10, pady=5)
     
+    def setup_log(self):
+        """Журнал окна: сообщения копятся и выводятся в поле пачками"""
+        self.info_text.tag_config("red", foreground="red")
+        self.info_text.tag_config("green", foreground="#006400")  # Темно-зеленый
+        self.info_text.tag_config("orange", foreground="#FF8C00")  # Темно-оранжевый
+        self.info_text.tag_config("blue", foreground="#00008B")    # Темно-синий
+        self.info_text.tag_config("purple", foreground="#4B0082")  # Индиго
+        self.info_text.tag_config("gray", foreground="#696969")    # Темно-серый
+        self.info_text.tag_config("black", foreground="black")
+        
+        self.log_handler = TextWidgetHandler(
+            self.info_text,
+            color_for=lambda record: self._message_color(record.getMessage()),
+            on_flush=lambda message: self.update_status(f"Выполнено: {message[:50]}...")
+        )
+        # Сообщения окна идут только в поле, в консоль их не дублируем
+        self.log = get_logger('окно')
+        self.log.addHandler(self.log_handler)
+        self.log.setLevel(logging.INFO)
+        self.log.propagate = False
+        self.log_handler.start()
+    
+    @staticmethod
+    def _message_color(message):
+        """Цвет сообщения по значкам и ключевым словам"""
+        if "❌" in message or "Ошибка" in message or "ошибка" in message.lower():
+            return "red"
+        elif "✅" in message or "Успешно" in message or "готов" in message.lower():
+            return "green"
+        elif "⚠️" in message or "Внимание" in message or "требуется" in message.lower():
+            return "orange"
+        elif "💡" in message or "Подсказка" in message or "инструкция" in message.lower():
+            return "blue"
+        elif "📅" in message or "📊" in message or "📋" in message:
+            return "purple"
+        return "black"
+    
     def log_message(self, message, color=None):
-        """Добавляет цветное сообщение в информационную область"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Настраиваем теги для цветов (делаем один раз)
-        if not hasattr(self, '_tags_configured'):
-            self.info_text.tag_config("red", foreground="red")
-            self.info_text.tag_config("green", foreground="#006400")  # Темно-зеленый
-            self.info_text.tag_config("orange", foreground="#FF8C00")  # Темно-оранжевый
-            self.info_text.tag_config("blue", foreground="#00008B")    # Темно-синий
-            self.info_text.tag_config("purple", foreground="#4B0082")  # Индиго
-            self.info_text.tag_config("gray", foreground="#696969")    # Темно-серый
-            self.info_text.tag_config("black", foreground="black")
-            self._tags_configured = True
-        
-        # Определяем цвет если не задан
-        if color is None:
-            if "❌" in message or "Ошибка" in message or "ошибка" in message.lower():
-                color = "red"
-            elif "✅" in message or "Успешно" in message or "готов" in message.lower():
-                color = "green"
-            elif "⚠️" in message or "Внимание" in message or "требуется" in message.lower():
-                color = "orange"
-            elif "💡" in message or "Подсказка" in message or "инструкция" in message.lower():
-                color = "blue"
-            elif "📅" in message or "📊" in message or "📋" in message:
-                color = "purple"
-            else:
-                color = "black"
-        
-        # Вставляем сообщение
-        self.info_text.insert(tk.END, f"[{timestamp}] ", "gray")
-        self.info_text.insert(tk.END, message + "\n", color)
-        self.info_text.see(tk.END)
-        self.update_status(f"Выполнено: {message[:50]}...")
-        self.root.update()
+        """Добавляет цветное сообщение в информационную область (выводится пачкой)"""
+        self.log.info(message, extra={'color': color})
     
     def clear_log(self):
         """Очищает информационную область"""
+        self.log_handler.discard()
         self.info_text.delete(1.0, tk.END)
     
     def copy_log(self):
         """Копирует логи в буфер обмена"""
+        self.log_handler.flush()
         self.root.clipboard_clear()
         self.root.clipboard_append(self.info_text.get(1.0, tk.END))
         messagebox.showinfo("Копирование", "Логи скопированы в буфер обмена")
@@ -233,6 +304,7 @@ class SalaryCalculatorApp:
             filetypes=[("Текстовые файлы", "*.txt"), ("Все файлы", "*.*")]
         )
         if filename:
+            self.log_handler.flush()
             with open(filename, 'w', encoding='utf-8') as f:
                 f.write(self.info_text.get(1.0, tk.END))
             self.log_message(f"Логи сохранены в файл: {filename}")
@@ -241,8 +313,85 @@ class SalaryCalculatorApp:
         """Обновляет статус бар"""
         self.status_bar.config(text=message)
     
+    def run_in_background(self, stage, work, on_done, on_error=None):
+        """
+        Запускает work(progress) в фоновом потоке
+        
+        on_done(результат) и on_error(исключение, traceback) вызываются в главном потоке.
+        Этап - интервал метрик текущего запуска; после этапа файл метрик обновляется
+        """
+        def measured(progress):
+            with run_metrics.span(f"этап: {stage}"):
+                return work(progress)
+        
+        def finished(handler):
+            def call(*args):
+                self.cancel_button.config(state=tk.DISABLED)
+                self._save_metrics()
+                handler(*args)
+            return call
+        
+        if self._stage_running():
+            return False
+        self.worker.start(stage, measured,
+                          on_done=finished(on_done),
+                          on_error=finished(on_error or self._on_stage_error),
+                          on_cancel=finished(self._on_stage_cancelled))
+        
+        self.cancel_button.config(state=tk.NORMAL)
+        self.update_status(f"⏳ {stage}...")
+        return True
+    
+    def _stage_running(self):
+        """Идет фоновый этап - новые действия с данными запрещены"""
+        if self.worker.busy:
+            self.log_message(f"⚠️  Дождитесь окончания этапа '{self.worker.stage}' или отмените его")
+            return True
+        return False
+    
+    def cancel_stage(self):
+        """Останавливает фоновый этап между файлами/шагами/отделами"""
+        if self.worker.busy:
+            self.worker.cancel()
+            self.update_status(f"⏹ Останавливаю: {self.worker.stage}...")
+    
+    def _on_stage_progress(self, event):
+        """Событие прогресса фонового этапа: статус бар, по файлам и шагам - строка лога"""
+        parts = [event['message']] if event.get('message') else []
+        if 'files_total' in event:
+            parts.append(f"файлов {event['files_done']}/{event['files_total']}")
+        if 'departments_total' in event:
+            parts.append(f"отделов {event['departments_done']}/{event['departments_total']}")
+        if 'rows' in event:
+            parts.append(f"строк {self._format_russian_number(event['rows'])}")
+        text = f"⏳ {event['stage']}: " + ", ".join(parts)
+        
+        if 'departments_total' in event:
+            self.update_status(text)
+        else:
+            self.log_message(f"   {text}", color="gray")
+    
+    def _on_stage_error(self, error, details):
+        self.log_message(f"❌ Ошибка этапа '{self.worker.stage}': {error}")
+        self.log_message(details)
+    
+    def _on_stage_cancelled(self):
+        self.log_message(f"⏹ Этап '{self.worker.stage}' отменен. Результаты прежних этапов сохранены.", color="orange")
+    
+    def _save_metrics(self):
+        """Перезаписывает файл метрик текущего запуска (после каждого этапа)"""
+        run = run_metrics.current_run()
+        if run is None:
+            return
+        try:
+            self.metrics_path = run_metrics.write_metrics(run)
+        except OSError as e:
+            logger.warning("⚠️  Не удалось сохранить метрики: %s", e)
+    
     def check_files(self):
         """Проверяет наличие файлов"""
+        if self._stage_running():
+            return
         self.set_active_button("🔍 Проверить файлы")
         self.clear_log()
         self.log_message("🔍 Проверяю наличие файлов в папке 'данные'...")
@@ -288,54 +437,19 @@ class SalaryCalculatorApp:
 
     def _calculate_shop_norm(self, period_str):
         """Рассчитывает норму часов для магазина по формуле"""
-        import re
-        from datetime import datetime
-        import math
-        
-        if not period_str:
-            self.log_message("   [Ошибка] Пустой период")
-            return None
-        
         try:
-            # Извлекаем даты из строки периода
-            # Поддерживаем разные форматы: 01.12.25, 01.12.2025
-            dates = re.findall(r'\d{1,2}\.\d{1,2}\.\d{2,4}', period_str)
-            
-            if len(dates) >= 2:
-                date1, date2 = dates[0], dates[1]
-                
-                # Пробуем разные форматы дат
-                for date_format in ['%d.%m.%y', '%d.%m.%Y', '%d/%m/%y', '%d/%m/%Y']:
-                    try:
-                        start = datetime.strptime(date1, date_format)
-                        end = datetime.strptime(date2, date_format)
-                        break
-                    except ValueError:
-                        continue
-                else:
-                    self.log_message(f"   [Ошибка] Неподдерживаемый формат: '{date1}', '{date2}'")
-                    return None
-                
-                days_in_month = (end - start).days + 1
-                
-                # Формула: (дней / 7) × 5 × 8
-                shop_norm = days_in_month / 7 * 5 * 8
-                # Округление вниз до 1 знака
-                shop_norm = math.floor(shop_norm * 10) / 10
-                
-                self.log_message(f"   [Расчет] {days_in_month} дней / 7 × 5 × 8 = {shop_norm:.1f}")
-                
-                return shop_norm
-            else:
-                self.log_message(f"   [Ошибка] Нужно 2 даты, найдено {len(dates)}: {dates}")
-                return None
-                
-        except Exception as e:
-            self.log_message(f"   [Ошибка] При расчете нормы: {str(e)}")
+            shop_norm, days_in_month = shop_norm_from_period(period_str)
+        except ValueError as e:
+            self.log_message(f"   [Ошибка] {e}")
             return None
+
+        self.log_message(f"   [Расчет] {days_in_month} дней / 7 × 5 × 8 = {shop_norm:.1f}")
+        return shop_norm
         
     def detect_period(self):
         """Определяет отчетный период, рассчитывает норму магазина"""
+        if self._stage_running():
+            return
         self.set_active_button("📅 Определить период")
         self.clear_log()
         self.log_message("📅 Определяю отчетный период из файлов...")
@@ -384,8 +498,42 @@ class SalaryCalculatorApp:
             self.log_message("   В них должна быть строка формата: 'С 01.12.25 по 31.12.25'")
             return False
     
+    def _input_files(self):
+        """Пути входных файлов: {тип файла: путь}"""
+        files = {
+            file_type: os.path.join(self.manager.data_folder, filename)
+            for file_type, filename in self.manager.found_files.items()
+        }
+        files['zakaz'] = os.path.join(self.manager.data_folder, "Заказ.xls")
+        return files
+
+    def _apply_loaded_files(self, loaded):
+        """Раскладывает результаты загрузки по менеджеру данных"""
+        self.manager.schedule_data = loaded['schedule_data']
+        self.manager.staff_data = loaded['staff_data']
+        self.manager.urs_data = loaded['urs_data']
+        self.manager.bonus_data = loaded['bonus_data']
+        self.manager.sales_data = loaded['sales_data']
+        self.manager.sales_facts = loaded['sales_facts']
+        self.manager.zakaz_data = loaded['zakaz_data']
+
+        self.log_message("⏱️  Время загрузки файлов:")
+        for file_type, seconds in loaded['timings'].items():
+            self.log_message(f"   • {file_type}: {seconds:.2f} с")
+        self.log_message(f"   Всего: {loaded['total_time']:.2f} с")
+
+        return (
+            'error' not in self.manager.schedule_data
+            and self.manager.staff_data.get('success', False)
+            and self.manager.urs_data.get('success', False)
+            and self.manager.bonus_data.get('success', False)
+            and bool(self.manager.sales_data)
+        )
+
     def load_data(self):
         """Загружает данные"""
+        if self._stage_running():
+            return
         self.set_active_button("📊 Загрузить данные")
         self.clear_log()
         self.log_message("📊 Загружаю данные из файлов. Этот процесс занимает немного времени.")
@@ -395,9 +543,20 @@ class SalaryCalculatorApp:
             self.log_message("⚠️  Сначала определите период!")
             return
         
-        # Загружаем данные
+        # Загружаем данные в фоне, статистику показываем по готовности.
+        # Новая загрузка - новый запуск метрик (до следующей загрузки)
+        files = self._input_files()
+        run_metrics.start_run(self.manager.report_month or "окно")
+        self.run_in_background(
+            "Загрузка данных",
+            lambda progress: load_all_files_parallel(files, progress=progress),
+            self._on_data_loaded,
+        )
+    
+    def _on_data_loaded(self, loaded):
+        """Показывает статистику загруженных файлов"""
         try:
-            success = self.manager.load_all_data()
+            success = self._apply_loaded_files(loaded)
             if success:
                 self.log_message("✅ Все данные успешно загружены.")
                 
@@ -432,17 +591,12 @@ class SalaryCalculatorApp:
                 if self.manager.bonus_data and self.manager.bonus_data.get('success'):
                     self.log_message(f"  • Наименований бонусных товаров: {len(self.manager.bonus_data['bonus_items'])}")
 
-                # Загрузка данных о заказных товарах
-                zakaz_path = os.path.join("данные", "Заказ.xls")
-                if os.path.exists(zakaz_path):
-                    excluded = self.manager.urs_data.get('excluded_firms', []) if self.manager.urs_data.get('success') else []
-                    zakaz_data = parse_zakaz_sales(zakaz_path, self.manager.staff_data, excluded)
-                    self.manager.zakaz_data = zakaz_data
-                    matched = zakaz_data.get('statistics', {}).get('matched_employees', 0)
+                # Данные о заказных товарах (Заказ.xls загружается вместе с остальными файлами)
+                if self.manager.zakaz_data.get('success'):
+                    matched = self.manager.zakaz_data.get('statistics', {}).get('matched_employees', 0)
                     self.log_message(f"  • Найдено сотрудников в Заказ.xls: {matched}", "green")
                 else:
                     self.log_message("  ⚠️ Файл Заказ.xls не найден", "orange")
-                    self.manager.zakaz_data = {'success': False, 'data': {}}
                 
                 if self.manager.bonus_data and self.manager.bonus_data.get('success'):
                     self.log_message(f"  • Наименований неликвидных товаров: {len(self.manager.bonus_data['non_liquid_items'])}")
@@ -465,6 +619,8 @@ class SalaryCalculatorApp:
     
     def integrate_data(self):
         """Интегрирует данные"""
+        if self._stage_running():
+            return
         self.set_active_button("🔄 Интегрировать данные")
         self.clear_log()
         self.log_message("🔄 Интегрирую данные из разных источников...")
@@ -474,35 +630,40 @@ class SalaryCalculatorApp:
             self.log_message("❌ Сначала загрузите данные!", color="red")
             return
         
-        try:
-            from модули.data_integrator_simple import DataIntegrator
-            
-            # ПРОВЕРКА ДО интеграции
-            if not hasattr(self, 'shop_norm_hours') or not self.shop_norm_hours:
-                self.log_message("❌ НЕОБХОДИМО ПРЕДВАРИТЕЛЬНОЕ ДЕЙСТВИЕ:", color="red")
-                self.log_message("="*60, color="orange")
-                self.log_message("📋 Отделы 'Магазин' требуют расчета нормы часов", color="orange")
-                self.log_message("", color="black")
-                self.log_message("📌 ИНСТРУКЦИЯ:", color="blue")
-                self.log_message("   1. Нажмите кнопку 'Определить период'", color="black")
-                self.log_message("   2. Программа рассчитает норму для магазина", color="black")
-                self.log_message("   3. Установите норму для офиса (если нужно)", color="black")
-                self.log_message("   4. Нажмите 'Интегрировать данные' снова", color="black")
-                self.log_message("", color="black")
-                self.log_message("💡 Норма магазина рассчитывается автоматически", color="blue")
-                self.log_message("   по формуле: (дней в месяце / 7) × 5 × 8", color="blue")
-                self.log_message("="*60, color="orange")
-                return False
+        # ПРОВЕРКА ДО интеграции
+        if not hasattr(self, 'shop_norm_hours') or not self.shop_norm_hours:
+            self.log_message("❌ НЕОБХОДИМО ПРЕДВАРИТЕЛЬНОЕ ДЕЙСТВИЕ:", color="red")
+            self.log_message("="*60, color="orange")
+            self.log_message("📋 Отделы 'Магазин' требуют расчета нормы часов", color="orange")
+            self.log_message("", color="black")
+            self.log_message("📌 ИНСТРУКЦИЯ:", color="blue")
+            self.log_message("   1. Нажмите кнопку 'Определить период'", color="black")
+            self.log_message("   2. Программа рассчитает норму для магазина", color="black")
+            self.log_message("   3. Установите норму для офиса (если нужно)", color="black")
+            self.log_message("   4. Нажмите 'Интегрировать данные' снова", color="black")
+            self.log_message("", color="black")
+            self.log_message("💡 Норма магазина рассчитывается автоматически", color="blue")
+            self.log_message("   по формуле: (дней в месяце / 7) × 5 × 8", color="blue")
+            self.log_message("="*60, color="orange")
+            return False
 
-            # Передаем shop_norm_hours в интегратор
-            self.manager.shop_norm_hours = self.shop_norm_hours
-            
-            # Передаем office_norm_hours при интеграции
-            self.manager.integrated_data = DataIntegrator.create_integrated_dataframe(
-                self.manager,
-                self.office_norm_hours  # норма офиса из интерфейса
-            )
-            
+        # Передаем shop_norm_hours в интегратор
+        self.manager.shop_norm_hours = self.shop_norm_hours
+        
+        manager = self.manager
+        office_norm_hours = self.office_norm_hours  # норма офиса из интерфейса
+        
+        def work(progress):
+            from модули.data_integrator_simple import DataIntegrator
+            return DataIntegrator.create_integrated_dataframe(manager, office_norm_hours, progress)
+        
+        self.run_in_background("Интеграция данных", work, self._on_data_integrated,
+                               on_error=self._on_integration_error)
+    
+    def _on_data_integrated(self, integrated_data):
+        """Показывает статистику интеграции"""
+        self.manager.integrated_data = integrated_data
+        try:
             if self.manager.integrated_data is not None:
                 self.log_message("✅ Данные успешно интегрированы.")
                 
@@ -543,6 +704,7 @@ class SalaryCalculatorApp:
                 self.log_message(f"   • Офис: {self._format_russian_number(self.office_norm_hours, 0)} часов")
                 
                 # Прокрутить к началу результатов
+                self.log_handler.flush()
                 self.info_text.see(1.0)
                 
                 return True
@@ -550,9 +712,17 @@ class SalaryCalculatorApp:
                 self.log_message("❌ Ошибка интеграции данных!", color="red")
                 return False
                 
-        except ValueError as e:
+        except Exception as e:
+            self.log_message(f"❌ Ошибка при интеграции: {str(e)}", color="red")
+            import traceback
+            self.log_message(traceback.format_exc(), color="red")
+            return False
+    
+    def _on_integration_error(self, error, details):
+        """Ошибка фоновой интеграции"""
+        if isinstance(error, ValueError):
             # Обрабатываем нашу ошибку о неподсчитанной норме
-            error_msg = str(e)
+            error_msg = str(error)
             if "норма часов" in error_msg.lower():
                 self.log_message("❌ ОШИБКА ИНТЕГРАЦИИ:", color="red")
                 self.log_message("="*60, color="orange")
@@ -565,16 +735,14 @@ class SalaryCalculatorApp:
                 self.log_message("="*60, color="orange")
             else:
                 self.log_message(f"❌ Ошибка: {error_msg}", color="red")
-            return False
-                
-        except Exception as e:
-            self.log_message(f"❌ Ошибка при интеграции: {str(e)}", color="red")
-            import traceback
-            self.log_message(traceback.format_exc(), color="red")
-            return False
+        else:
+            self.log_message(f"❌ Ошибка при интеграции: {str(error)}", color="red")
+            self.log_message(details, color="red")
     
     def calculate_salary(self):
         """Рассчитывает зарплату"""
+        if self._stage_running():
+            return
         self.set_active_button("🧮 Рассчитать зарплату")
         self.clear_log()
         self.log_message("🧮 Рассчитываю зарплату по установленной логике...")
@@ -584,21 +752,25 @@ class SalaryCalculatorApp:
             self.log_message("❌ Сначала интегрируйте данные!")
             return
         
-        try:
-            import importlib
+        integrated_data = self.manager.integrated_data
+        office_norm_hours = self.office_norm_hours
+        
+        def work(progress):
             import модули.salary_calculator as salary_module
-            importlib.reload(salary_module)
-            from модули.salary_calculator import SalaryCalculator
+            if DEV_MODE:
+                import importlib
+                importlib.reload(salary_module)
             
             # Создаем калькулятор
-            calculator = SalaryCalculator()
-                      
-            # ✅ ИСПРАВЛЕНО: передаем ТОЛЬКО 2 дополнительных аргумента (всего 3 с self)
-            self.manager.calculations = calculator.calculate_salary(
-                self.manager.integrated_data,
-                self.office_norm_hours
-            )
-            
+            calculator = salary_module.SalaryCalculator()
+            return calculator.calculate_salary(integrated_data, office_norm_hours, progress)
+        
+        self.run_in_background("Расчет зарплаты", work, self._on_salary_calculated)
+    
+    def _on_salary_calculated(self, calculations):
+        """Показывает итоги расчета зарплаты"""
+        self.manager.calculations = calculations
+        try:
             if self.manager.calculations:
                 self.log_message("✅ Расчет зарплаты выполнен успешно!")
                 
@@ -729,145 +901,71 @@ class SalaryCalculatorApp:
         self.info_text.insert(tk.END, f"Филиалов: {self.manager.staff_data['summary']['total_branches']}\n", "black")
         self.info_text.insert(tk.END, f"Отделов: {self.manager.staff_data['summary']['total_departments']}\n", "black")
         
-        # 1. Создаем словарь с данными графика
-        schedule_data = {}
-        if self.manager.schedule_data and 'error' not in self.manager.schedule_data:
-            schedule_df = self.manager.schedule_data['employees_df']
-            for _, row in schedule_df.iterrows():
-                fio_norm = self.normalize_name(row.get('ФИО', ''))
-                schedule_data[fio_norm] = {
-                    'Часы_всего': row.get('Часы_всего', 0),
-                    'Выходные_дни': row.get('Выходные_дни', 0),  # Используем те же ключи, что в файле
-                    'Отпуск_дни': row.get('Отпуск_дни', 0)
-                }
+        import numpy as np
+        import pandas as pd
+        from модули.table_view import show_dataframe
         
-        # 2. Собираем список всех сотрудников с часами
-        employees_list = []
+        # 1. Данные графика по нормализованному ФИО (при повторах - последняя строка)
+        schedule_df = self.manager.schedule_data['employees_df']
+        schedule = pd.DataFrame({
+            'ФИО_норм': schedule_df['ФИО'].map(self.normalize_name),
+            'Часы': pd.to_numeric(schedule_df.get('Часы_всего', 0)),
+            'Вых': pd.to_numeric(schedule_df.get('Выходные_дни', 0)),
+            'Отп': pd.to_numeric(schedule_df.get('Отпуск_дни', 0)),
+        }).drop_duplicates('ФИО_норм', keep='last')
         
-        for emp in self.manager.staff_data['employees']:
-            fio = emp.get('ФИО', '')
-            fio_norm = emp.get('ФИО_норм', self.normalize_name(fio))
-            dept = emp.get('Отдел', 'Не указан')
-            
-            # Получаем данные из графика
-            schedule_info = schedule_data.get(fio_norm, {})
-            hours = schedule_info.get('Часы_всего', 0)
-            weekend = schedule_info.get('Выходные_дни', 0)
-            vacation = schedule_info.get('Отпуск_дни', 0)
-            has_schedule = 'Да' if fio_norm in schedule_data else 'Нет'
-            
-            employees_list.append({
-                '№': len(employees_list) + 1,
-                'ФИО': fio,
-                'Отдел': dept,
-                'Часы': float(hours),
-                'Вых': int(weekend),    # Ключ 'Вых'
-                'Отп': int(vacation),   # Ключ 'Отп'
-                'График': has_schedule  # Ключ 'График'
-            })
+        # 2. Все сотрудники с часами из графика
+        staff = pd.DataFrame(self.manager.staff_data['employees'])
+        if staff.empty:
+            self.info_text.insert(tk.END, "\n❌ Список сотрудников пуст\n", "red")
+            return
+        fio_norm = staff['ФИО_норм'] if 'ФИО_норм' in staff else staff['ФИО'].map(self.normalize_name)
+        employees = pd.DataFrame({
+            'ФИО': staff['ФИО'],
+            'Отдел': staff['Отдел'] if 'Отдел' in staff else 'Не указан',
+            'ФИО_норм': fio_norm,
+        }).merge(schedule, on='ФИО_норм', how='left')
+        employees['График'] = np.where(employees['ФИО_норм'].isin(schedule['ФИО_норм']), 'Да', 'Нет')
+        employees[['Часы', 'Вых', 'Отп']] = employees[['Часы', 'Вых', 'Отп']].fillna(0)
+        employees = employees.astype({'Часы': float, 'Вых': int, 'Отп': int})
         
-        # Сортируем по ФИО
-        employees_list.sort(key=lambda x: x['ФИО'])
-        # Обновляем номера после сортировки
-        for i, emp in enumerate(employees_list, 1):
-            emp['№'] = i
-        
-        self.info_text.insert(tk.END, f"\n📋 ВСЕ СОТРУДНИКИ С ДАННЫМИ ИЗ ГРАФИКА ({len(employees_list)}):\n", "black")
-        
-        # 3. Формируем таблицу
-        if employees_list:
-            # Определяем ширины колонок (ключи должны совпадать с ключами в данных)
-            widths = {
-                '№': 4,
-                'ФИО': 30,
-                'Отдел': 32,
-                'Часы': 5,
-                'Вых': 3,      # Ключ 'Вых'
-                'Отп': 3,      # Ключ 'Отп'
-                'График': 7    # Ключ 'График'
-            }
-            
-            # Создаем заголовок БЕЗ временной метки
-            header_parts = []
-            for key, width in widths.items():
-                # Красивые названия для заголовков
-                display_key = {
-                    'Вых': 'Вых',
-                    'Отп': 'Отп',
-                    'График': 'График'
-                }.get(key, key)
-                header_parts.append(f"{display_key:{width}}")
-            
-            header_line = " ".join(header_parts)
-            self.info_text.insert(tk.END, header_line + "\n", "black")
-            
-            # Разделительная линия
-            separator_line = "-" * len(header_line)
-            self.info_text.insert(tk.END, separator_line + "\n", "black")
-            
-            # Данные
-            for emp in employees_list:
-                row_parts = []
-                
-                # Номер
-                row_parts.append(f"{emp['№']:{widths['№']}}")
-                
-                # ФИО
-                fio = emp['ФИО']
-                if len(fio) > widths['ФИО'] - 2:
-                    fio = fio[:widths['ФИО']-3] + "..."
-                row_parts.append(f"{fio:{widths['ФИО']}}")
-                
-                # Отдел
-                dept = emp['Отдел']
-                if len(dept) > widths['Отдел'] - 2:
-                    dept = dept[:widths['Отдел']-3] + "..."
-                row_parts.append(f"{dept:{widths['Отдел']}}")
-                
-                # Часы
-                hours = emp['Часы']
-                hours_str = f"{hours:.1f}" if hours != int(hours) else str(int(hours))
-                row_parts.append(f"{hours_str:>{widths['Часы']}}")
-                
-                # Выходные (используем ключ 'Вых')
-                row_parts.append(f"{emp['Вых']:>{widths['Вых']}}")
-                
-                # Отпуск (используем ключ 'Отп')
-                row_parts.append(f"{emp['Отп']:>{widths['Отп']}}")
-                
-                # Статус графика (используем ключ 'График')
-                status = emp['График']
-                color = "green" if status == 'Да' else "orange"
-                row_parts.append(f"{status:^{widths['График']}}")
-                
-                row_line = " ".join(row_parts)
-                self.info_text.insert(tk.END, row_line + "\n", color)
-            
-            # Статистика
-            self.info_text.insert(tk.END, f"\n📊 СТАТИСТИКА:\n", "black")
-            
-            has_schedule = sum(1 for emp in employees_list if emp['График'] == 'Да')
-            no_schedule = sum(1 for emp in employees_list if emp['График'] == 'Нет')
-            total_hours = sum(emp['Часы'] for emp in employees_list)
-            total_weekend = sum(emp['Вых'] for emp in employees_list)
-            total_vacation = sum(emp['Отп'] for emp in employees_list)
-            
-            self.info_text.insert(tk.END, f"• С графиком: {has_schedule} сотрудников\n", "black")
-            self.info_text.insert(tk.END, f"• Без графика: {no_schedule} сотрудников\n", "black")
-            self.info_text.insert(tk.END, f"• Всего часов: {total_hours:.1f}\n", "black")
-            self.info_text.insert(tk.END, f"• Всего выходных дней: {total_weekend}\n", "black")
-            self.info_text.insert(tk.END, f"• Всего отпускных дней: {total_vacation}\n", "black")
-            
-            # Сотрудники без графика
-            if no_schedule > 0:
-                self.info_text.insert(tk.END, f"\n⚠️ СОТРУДНИКИ БЕЗ ГРАФИКА:\n", "orange")
-                no_schedule_list = [emp for emp in employees_list if emp['График'] == 'Нет']
-                for i, emp in enumerate(no_schedule_list[:20], 1):
-                    self.info_text.insert(tk.END, f"  {i:2}. {emp['ФИО'][:30]} - {emp['Отдел'][:20]}\n", "orange")
-                if len(no_schedule_list) > 20:
-                    self.info_text.insert(tk.END, f"  ... и еще {len(no_schedule_list) - 20} сотрудников\n", "orange")
-            
-            self.info_text.see(1.0)
+        # Сортируем по ФИО и нумеруем
+        employees = employees.sort_values('ФИО', kind='stable').reset_index(drop=True)
+        employees.insert(0, '№', np.arange(1, len(employees) + 1))
+        
+        self.info_text.insert(tk.END, f"\n📋 ВСЕ СОТРУДНИКИ С ДАННЫМИ ИЗ ГРАФИКА ({len(employees)}) - в отдельном окне\n", "black")
+        
+        # 3. Статистика
+        has_schedule = (employees['График'] == 'Да').sum()
+        no_schedule_list = employees[employees['График'] == 'Нет']
+        
+        self.info_text.insert(tk.END, f"\n📊 СТАТИСТИКА:\n", "black")
+        self.info_text.insert(tk.END, f"• С графиком: {has_schedule} сотрудников\n", "black")
+        self.info_text.insert(tk.END, f"• Без графика: {len(no_schedule_list)} сотрудников\n", "black")
+        self.info_text.insert(tk.END, f"• Всего часов: {employees['Часы'].sum():.1f}\n", "black")
+        self.info_text.insert(tk.END, f"• Всего выходных дней: {employees['Вых'].sum()}\n", "black")
+        self.info_text.insert(tk.END, f"• Всего отпускных дней: {employees['Отп'].sum()}\n", "black")
+        
+        # Сотрудники без графика
+        if not no_schedule_list.empty:
+            self.info_text.insert(tk.END, f"\n⚠️ СОТРУДНИКИ БЕЗ ГРАФИКА:\n", "orange")
+            for i, (fio, dept) in enumerate(no_schedule_list[['ФИО', 'Отдел']].head(20).itertuples(index=False), 1):
+                self.info_text.insert(tk.END, f"  {i:2}. {str(fio)[:30]} - {str(dept)[:20]}\n", "orange")
+            if len(no_schedule_list) > 20:
+                self.info_text.insert(tk.END, f"  ... и еще {len(no_schedule_list) - 20} сотрудников\n", "orange")
+        
+        self.info_text.see(1.0)
+        
+        # 4. Таблица - в отдельном окне (видимые строки, сортировка и фильтр)
+        show_dataframe(
+            self.root, employees, "График работы: все сотрудники",
+            columns=['№', 'ФИО', 'Отдел', 'Часы', 'Вых', 'Отп', 'График'],
+            widths={'№': 50, 'ФИО': 260, 'Отдел': 260, 'Часы': 70, 'Вых': 50, 'Отп': 50, 'График': 70},
+            highlight={
+                '#006400': lambda df: df['График'] == 'Да',
+                '#FF8C00': lambda df: df['График'] == 'Нет',
+            },
+        )
 
     def normalize_name(self, full_name):
         """Нормализует ФИО для сравнения"""
@@ -879,16 +977,18 @@ class SalaryCalculatorApp:
         """Превью данных сотрудников"""
         self.clear_log()
         if self.manager.staff_data and self.manager.staff_data.get('success'):
+            import pandas as pd
+            from модули.table_view import show_dataframe
+            
             self.log_message("👥 ДАННЫЕ СОТРУДНИКОВ:")
             self.log_message(f"Всего сотрудников: {self.manager.staff_data['summary']['total_employees']}")
             self.log_message(f"Филиалов: {self.manager.staff_data['summary']['total_branches']}")
             self.log_message(f"Отделов: {self.manager.staff_data['summary']['total_departments']}")
             
-            # Примеры сотрудников
-            employees = self.manager.staff_data['employees'][:10]
-            self.log_message("\nПримеры сотрудников (первые 10):")
-            for i, emp in enumerate(employees, 1):
-                self.log_message(f"{i:2}. {emp['ФИО'][:30]:30} | {emp['Филиал'][:15]:15} | {emp['Отдел'][:20]:20}")
+            staff = pd.DataFrame(self.manager.staff_data['employees'])
+            columns = [c for c in ['ФИО', 'Филиал', 'Отдел', 'Директор_филиала'] if c in staff.columns]
+            show_dataframe(self.root, staff, "Сотрудники по отделам", columns=columns,
+                           widths={'ФИО': 280, 'Филиал': 150, 'Отдел': 260, 'Директор_филиала': 200})
         else:
             self.log_message("❌ Данные сотрудников не загружены!")
     
@@ -896,18 +996,21 @@ class SalaryCalculatorApp:
         """Превью данных продаж"""
         self.clear_log()
         if self.manager.sales_data:
+            import pandas as pd
+            from модули.table_view import show_dataframe
+            
             self.log_message("💰 ДАННЫЕ ПРОДАЖ:")
             self.log_message(f"Продавцов: {len(self.manager.sales_data)}")
             
-            # Первые 5 продавцов
-            count = 0
-            for seller, data in self.manager.sales_data.items():
-                if count >= 5:
-                    break
-                self.log_message(f"\n• {seller}:")
-                self.log_message(f"  Выручка: {self._format_russian_number(data.get('total_revenue', 0))} руб.")
-                self.log_message(f"  Прибыль: {self._format_russian_number(data.get('total_profit', 0))} руб.")
-                count += 1
+            sellers = pd.DataFrame({
+                'Продавец': list(self.manager.sales_data),
+                'Выручка': [data.get('total_revenue', 0) for data in self.manager.sales_data.values()],
+                'Прибыль': [data.get('total_profit', 0) for data in self.manager.sales_data.values()],
+                'Бонусные_продажи': [data.get('total_bonus_revenue', 0) for data in self.manager.sales_data.values()],
+                'Неликвидные_продажи': [data.get('total_non_liquid_revenue', 0) for data in self.manager.sales_data.values()],
+            })
+            self.log_message(f"Общая выручка: {self._format_russian_number(sellers['Выручка'].sum())} руб.")
+            show_dataframe(self.root, sellers, "Продажи по продавцам", widths={'Продавец': 300})
         else:
             self.log_message("❌ Данные продаж не загружены!")
     
@@ -915,19 +1018,26 @@ class SalaryCalculatorApp:
         """Превью бонусных товаров"""
         self.clear_log()
         if self.manager.bonus_data and self.manager.bonus_data.get('success'):
+            import pandas as pd
+            from модули.table_view import show_dataframe
+            
             stats = self.manager.bonus_data['statistics']
             self.log_message("🎁 БОНУСНЫЕ ТОВАРЫ:")
             self.log_message(f"Бонусных товаров: {stats['bonus_count']}")
             self.log_message(f"Неликвидов: {stats['non_liquid_count']}")
             self.log_message(f"Всего товаров: {stats['total_unique']}")
             
-            # Примеры бонусных товаров
-            if self.manager.bonus_data['bonus_items']:
-                self.log_message("\nПримеры бонусных товаров (первые 10):")
-                for i, code in enumerate(list(self.manager.bonus_data['bonus_items'])[:10], 1):
-                    info = self.manager.bonus_data['items_info'].get(code, {})
-                    name = info.get('название', 'Нет названия')[:30]
-                    self.log_message(f"{i:2}. {code} - {name}...")
+            items_info = self.manager.bonus_data['items_info']
+            items = pd.DataFrame({
+                'Код': list(items_info),
+                'Статус': [info.get('статус', '') for info in items_info.values()],
+                'Название': [info.get('название', '') for info in items_info.values()],
+                'Строка': [info.get('строка', 0) for info in items_info.values()],
+            })
+            show_dataframe(self.root, items, "Список бонусных позиций",
+                           widths={'Код': 120, 'Статус': 100, 'Название': 500, 'Строка': 70},
+                           highlight={'#00008B': lambda df: df['Статус'] == 'бонус',
+                                      '#FF8C00': lambda df: df['Статус'] == 'неликвид'})
         else:
             self.log_message("❌ Данные бонусов не загружены!")
     
@@ -935,17 +1045,17 @@ class SalaryCalculatorApp:
         """Превью настроек УРС"""
         self.clear_log()
         if self.manager.urs_data and self.manager.urs_data.get('success'):
+            import pandas as pd
+            from модули.table_view import show_dataframe
+            
             stats = self.manager.urs_data['statistics']
             self.log_message("⚙️ НАСТРОЙКИ УРС:")
-            self.log_message(f"Отделов: {stats['unique_departments']}")
+            self.log_message(f"Отделов: {stats['departments_count']}")
             self.log_message(f"Филиалов: {stats['unique_filials']}")
             
-            # Примеры настроек
-            self.log_message("\nПримеры отделов (первые 10):")
-            for i, (dept, settings) in enumerate(list(self.manager.urs_data['departments'].items())[:10], 1):
-                oklad = settings.get('оклад', 0)
-                minim = settings.get('минималка', 0)
-                self.log_message(f"{i:2}. {dept[:30]:30} | Оклад: {self._format_russian_number(oklad, 0):8} | Мин.: {self._format_russian_number(minim, 0):8}")
+            settings = pd.DataFrame.from_dict(self.manager.urs_data['departments'], orient='index')
+            settings = settings.drop(columns=['отдел'], errors='ignore').reset_index(names='Отдел')
+            show_dataframe(self.root, settings, "Настройки УРС по отделам", widths={'Отдел': 250})
         else:
             self.log_message("❌ Данные УРС не загружены!")
     
@@ -953,6 +1063,8 @@ class SalaryCalculatorApp:
         """Превью интегрированных данные"""
         self.clear_log()
         if self.manager.integrated_data is not None:
+            from модули.table_view import show_dataframe
+            
             df = self.manager.integrated_data
             self.log_message("🔄 ИНТЕГРИРОВАННЫЕ ДАННЫЕ:")
             self.log_message(f"Всего записей: {len(df)}")
@@ -961,16 +1073,45 @@ class SalaryCalculatorApp:
             self.log_message(f"С продажами: {(df['Выручка'] > 0).sum()}")
             self.log_message(f"Общая выручка: {self._format_russian_number(df['Выручка'].sum())} руб.")
             
-            # Показываем первые 10 записей
-            self.log_message("\nПервые 10 записей:")
-            preview_cols = ['ФИО', 'Филиал', 'Отдел', 'Часы_всего', 'Выручка']
-            preview_cols = [col for col in preview_cols if col in df.columns]
-            
-            preview_df = df[preview_cols].head(10)
-            self.log_message(preview_df.to_string(index=False))
+            # Служебные колонки со словарями продаж в таблицу не выводим
+            hidden = ['Данные_продаж', 'Заказные_данные', 'ФИО_норм']
+            columns = [col for col in df.columns if col not in hidden]
+            show_dataframe(self.root, df, "Интегрированные данные", columns=columns,
+                           widths={'ФИО': 260, 'Отдел': 220})
         else:
             self.log_message("❌ Интегрированные данные не созданы!")
     
+    def _show_salary_table(self, results_df):
+        """Окно-таблица зарплат по сотрудникам (отдел, место, компоненты)"""
+        import numpy as np
+        import pandas as pd
+        from модули.table_view import show_dataframe
+        
+        def column(name):
+            if name in results_df.columns:
+                return results_df[name].fillna(0)
+            return pd.Series(0, index=results_df.index)
+        
+        table = pd.DataFrame({
+            'Отдел': results_df['Отдел'],
+            '№': results_df.groupby('Отдел', sort=False).cumcount() + 1,
+            'ФИО': results_df['ФИО'],
+            'Зарплата': results_df['Зарплата_итого'],
+            'Котел': column('Доля_котла'),
+            'Оклад': column('Окладная_часть'),
+            'Гарантия': column('Применена_гарантия'),
+            'Минималка': column('Минималка_инд'),
+            'Место': column('Место').astype(int),
+        })
+        # Сотрудник получил минималку, если зарплата равна ей
+        table['Начислено'] = np.where((table['Зарплата'] - table['Минималка']).abs() < 1,
+                                      'Минималка', 'Котел + оклад')
+        
+        show_dataframe(self.root, table, "Распределение зарплаты по отделам (топ по рейтингу)",
+                       widths={'Отдел': 220, '№': 50, 'ФИО': 260, 'Место': 60},
+                       highlight={'#006400': lambda df: df['Место'] > 0},
+                       summary=f"Фонд: {self._format_russian_number(table['Зарплата'].sum())} руб.")
+    
     def preview_calculations(self):
         """Превью результатов расчета"""
         self.clear_log()
@@ -1034,64 +1175,9 @@ class SalaryCalculatorApp:
             # Сортировка по отделам и рейтингу (убывание)
             results_df = results_df.sort_values(['Отдел', 'Рейтинг'], ascending=[True, False])
             
-            self.log_message("\n" + "="*80)
-            self.log_message("РАСПРЕДЕЛЕНИЕ ЗАРПЛАТЫ ПО ОТДЕЛАМ (Топ по рейтингу)")
-            self.log_message("="*80)
-            
-            # Группировка по отделам
-            current_dept = None
-            emp_num = 0
-            
-            for _, row in results_df.iterrows():
-                if row['Отдел'] != current_dept:
-                    current_dept = row['Отдел']
-                    emp_num = 0
-                    self.log_message(f"\n🏢 ОТДЕЛ: {current_dept}")
-                    self.log_message("-" * 60)
-                    
-                    # Заголовок таблицы для отдела
-                    self.log_message(f"{'№':3} {'ФИО':30} {'Зарплата':>12} {'Компоненты':40}")
-                    self.log_message("-" * 60)
-                
-                emp_num += 1
-                total_salary = row['Зарплата_итого']
-                
-                # Получаем данные из НОВОЙ структуры
-                dolya_kotla = row.get('Доля_котла', 0)
-                okladnaya_chast = row.get('Окладная_часть', 0)
-                minimalka_ind = row.get('Минималка_инд', 0)
-                primenena_garantiya = row.get('Применена_гарантия', 0)
-                mesto = row.get('Место', 0)
-                
-                # Форматируем имя
-                fio_parts = row['ФИО'].split()
-                if len(fio_parts) >= 2:
-                    short_name = f"{fio_parts[0]} {fio_parts[1][0]}.{fio_parts[2][0] if len(fio_parts) > 2 else ''}"
-                else:
-                    short_name = row['ФИО']
-                
-                # Добавляем значок места если есть гарантия
-                mesto_symbol = ""
-                if mesto > 0:
-                    mesto_symbol = f" [{mesto}🏆]"
-                
-                # Проверяем, получил ли сотрудник минималку
-                if abs(total_salary - minimalka_ind) < 1:  # Если зарплата равна минималке
-                    actual_components = f"Минималка: {self._format_russian_number(minimalka_ind)}"
-                else:
-                    actual_components = f"Котел: {self._format_russian_number(dolya_kotla)} + Оклад: {self._format_russian_number(okladnaya_chast)}"
-                    
-                    # Добавляем гарантию, если она была применена
-                    if primenena_garantiya > 0:
-                        actual_components += f" + Гарантия: {self._format_russian_number(primenena_garantiya)}"
-                
-                # Формируем строку результата
-                zarplata_formatted = self._format_russian_number(total_salary)
-                result_line = f"{emp_num:3}. {short_name[:28]:30} {zarplata_formatted:>12} руб. {actual_components}{mesto_symbol}"
-                
-                # Выделяем цветом
-                color = "green" if mesto > 0 else "black"
-                self.log_message(result_line, color=color)
+            # Распределение по сотрудникам - в отдельном окне-таблице
+            # (сортировка по отделу и рейтингу, как в прежнем списке)
+            self._show_salary_table(results_df)
             
             # Итоги по отделам
             self.log_message("\n" + "="*80)
@@ -1171,6 +1257,8 @@ class SalaryCalculatorApp:
     
     def show_dashboard(self):
         """Генерация профессионального HTML дашборда (точный дизайн разработчика)"""
+        if self._stage_running():
+            return
         self.set_active_button("📈 Дашборд")
         
         if not hasattr(self.manager, 'calculations') or not self.manager.calculations:
@@ -1178,17 +1266,25 @@ class SalaryCalculatorApp:
             self.log_message("❌ Сначала выполните расчет зарплаты!", "red")
             return
         
-        try:
-            self.clear_log()
-            self.log_message("📊 Генерация профессионального дашборда...", "blue")
-            
+        self.clear_log()
+        self.log_message("📊 Генерация профессионального дашборда...", "blue")
+        
+        manager = self.manager
+        
+        def work(progress):
             # Используем новый профессиональный дашборд
             from модули.manager_dashboard_pro import ManagerDashboardPro
             
             # Создаем дашборд
-            generator = ManagerDashboardPro(self.manager)
-            filepath = generator.generate()
-            
+            generator = ManagerDashboardPro(manager)
+            progress("Формирую HTML", rows=len(manager.calculations['by_employee']))
+            return generator.generate()
+        
+        self.run_in_background("Дашборд", work, self._on_dashboard_generated)
+    
+    def _on_dashboard_generated(self, filepath):
+        """Сообщает о созданном дашборде и предлагает открыть его"""
+        try:
             self.log_message(f"✅ Профессиональный дашборд создан!", "green")
             self.log_message(f"📂 Файл: {os.path.basename(filepath)}", "blue")
             self.log_message(f"📁 Папка: {os.path.dirname(filepath)}", "blue")
@@ -1228,6 +1324,38 @@ class SalaryCalculatorApp:
         
     
     
+    def show_metrics(self):
+        """Сводка метрик последнего запуска: интервалы этапов, парсеров, отделов"""
+        self.set_active_button("⏱ Метрики")
+        run = run_metrics.current_run()
+        if run is not None:
+            exported = run.export()
+        else:
+            path = self.metrics_path or run_metrics.latest_metrics_file()
+            if not path:
+                self.log_message("⚠️  Метрик еще нет - сначала загрузите данные", "orange")
+                return
+            exported = run_metrics.load_metrics(path)
+        if not exported['spans']:
+            self.log_message("⚠️  В текущем запуске еще нет завершенных этапов", "orange")
+            return
+        
+        import pandas as pd
+        from модули.table_view import show_dataframe
+        
+        table = pd.DataFrame(run_metrics.summarize(exported))
+        table['name'] = ["  " * depth + name for depth, name in zip(table['depth'], table['name'])]
+        table = table.drop(columns='depth').rename(columns={
+            'name': 'Интервал', 'calls': 'Вызовов', 'wall_s': 'Секунд', 'cpu_s': 'CPU, с',
+            'rows_in': 'Строк вход', 'rows_out': 'Строк выход', 'peak_mb': 'Пик, МБ',
+        })
+        counters = ", ".join(f"{name}: {value}" for name, value in sorted(exported['counters'].items()))
+        show_dataframe(self.root, table, f"Метрики запуска: {exported['label']} ({exported['started']})",
+                       widths={'Интервал': 300},
+                       formatters={column: (lambda value: "" if pd.isna(value) else f"{value:.3f}")
+                                   for column in ('Секунд', 'CPU, с', 'Пик, МБ')},
+                       summary=counters or None)
+    
     def save_results(self):
         """Сохраняет результаты"""
         self.set_active_button("💾 Сохранить результаты")
@@ -1287,6 +1415,50 @@ class SalaryCalculatorApp:
         except Exception as e:
             self.log_message(f"❌ Ошибка: {str(e)}", "red")
     
+    def clear_cache(self):
+        """Очищает кэш парсинга и колоночные копии: следующая загрузка перечитает все файлы"""
+        from модули.columnar_store import clear_columnar_store
+        
+        removed = clear_parse_cache()
+        removed_copies = clear_columnar_store()
+        self.log_message(f"🧹 Кэш парсинга очищен (удалено записей: {removed}, колоночных копий: {removed_copies})")
+    
+    def reload_bonus_list(self):
+        """Перечитывает список бонусных позиций и пересчитывает только затронутые товары продаж"""
+        if self._stage_running():
+            return
+        if getattr(self.manager, 'sales_facts', None) is None or not self.manager.sales_data:
+            self.log_message("⚠️  Сначала загрузите данные!")
+            return
+        
+        filename = self.manager.found_files.get('bonus')
+        if not filename:
+            self.log_message("❌ Файл бонусных позиций не найден!")
+            return
+        
+        manager = self.manager
+        bonus_path = os.path.join(manager.data_folder, filename)
+        
+        def work(progress):
+            from модули.pipeline import reload_bonus_list
+            
+            start = time.perf_counter()
+            progress("Пересчитываю классы товаров")
+            stats = reload_bonus_list(manager, bonus_path)
+            stats['seconds'] = time.perf_counter() - start
+            return stats
+        
+        self.run_in_background("Список бонусов", work, self._on_bonus_list_reloaded)
+    
+    def _on_bonus_list_reloaded(self, stats):
+        """Сообщает, что изменилось после замены списка бонусов"""
+        self.log_message(f"🔁 Список бонусов обновлен за {stats['seconds']:.2f} с")
+        self.log_message(f"   • Изменилось кодов товаров: {stats['changed_codes']}")
+        self.log_message(f"   • Строк продаж: {stats['changed_rows']}, продавцов: {stats['affected_sellers']}")
+        if stats['changed_rows']:
+            # Интеграция и расчет построены по старому списку - они сброшены
+            self.log_message("   Интегрируйте данные и выполните расчет зарплаты заново.", color="orange")
+    
     def update_office_norm(self):
         """Обновляет норму часов для офисных отделов"""
         try:
@@ -1310,6 +1482,13 @@ class SalaryCalculatorApp:
 def main():
     root = tk.Tk()
     app = SalaryCalculatorApp(root)
+    
+    def window_shown():
+        logger.info("⏱️  Окно показано через %.2f с после запуска", time.perf_counter() - START_TIME)
+        # pandas, openpyxl и парсеры грузятся, пока пользователь читает инструкцию
+        threading.Thread(target=preload_modules, daemon=True).start()
+    
+    root.after_idle(window_shown)
     root.mainloop()
 
 
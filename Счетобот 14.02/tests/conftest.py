@@ -0,0 +1,30 @@
+# conftest.py
+"""Тесты запускаются из корня проекта: python -m pytest tests"""
+
+import os
+import sys
+
+import pytest
+
+# Пакет 'модули' лежит в корне проекта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from модули.workload_generator import generate_month
+
+# Небольшой месяц: 3 филиала, 48 сотрудников, ~12 товарных строк на продавца
+MONTH = dict(year=2025, month=3, employees=48, branches=3, items_per_seller=12, seed=7)
+
+
+@pytest.fixture(scope="session")
+def generated_month(tmp_path_factory):
+    """Папка с шестью входными файлами синтетического месяца: {'folder', 'files', 'statistics'}"""
+    folder = tmp_path_factory.mktemp("месяц")
+    generated = generate_month(str(folder), **MONTH)
+    return dict(generated, folder=str(folder))
+
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    """Кэш парсинга, колоночные копии и метрики пишутся в относительные папки - у теста своя"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
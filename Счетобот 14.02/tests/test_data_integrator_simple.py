@@ -0,0 +1,201 @@
+# test_data_integrator_simple.py
+"""
+Интеграция синтетического месяца: колонки, типы и итоги закреплены по
+результату прежнего построчного интегратора, итог зарплаты - по его расчету
+"""
+
+import pandas as pd
+import pytest
+
+from модули.data_integrator_simple import DataIntegrator
+from модули.pipeline import run_period
+
+OFFICE_NORM_HOURS = 168
+
+INTEGRATED_DTYPES = {
+    'ФИО': 'str', 'ФИО_норм': 'str', 'Часы_всего': 'float64', 'Выходные_дни': 'int64',
+    'Отпуск_дни': 'int64', 'Больничные_дни': 'int64', 'Источник_график': 'str', 'Филиал': 'str',
+    'Отдел': 'str', 'Директор_филиала': 'str', 'Источник_сотрудники': 'str', 'Данные_продаж': 'object',
+    'Выручка': 'float64', 'Прибыль': 'float64', 'Бонусные_продажи': 'float64',
+    'Неликвидные_продажи': 'float64', 'Базовая_часть': 'float64', 'Оклад': 'float64',
+    'Минималка_отдела': 'float64', 'Средняя_ЗП': 'float64', 'Коэф_обычных': 'float64',
+    'Коэф_бонусных': 'float64', 'Коэф_неликвидов': 'float64', 'Коэф_оптовых': 'float64',
+    'Гарантия_1': 'float64', 'Гарантия_2': 'float64', 'Гарантия_3': 'float64', 'Гарантия_4': 'float64',
+    'Гарантия_5': 'float64', 'Заказные_данные': 'object', 'Неликвиды_в_котле': 'object',
+    'Неликвид_процент': 'float64', 'Тип_нормы': 'str', 'Норма_часов_из_УРС': 'object',
+    'Норма_часов': 'float64', 'Процент_нормы': 'float64', 'Статус_часов': 'str', 'Есть_продажи': 'str',
+    'Процент_бонусов': 'float64',
+}
+INTEGRATED_TOTALS = {
+    'Часы_всего': 7893.0, 'Выходные_дни': 714.0, 'Отпуск_дни': 26.0, 'Больничные_дни': 17.0,
+    'Выручка': 3063978.81, 'Прибыль': 766746.03, 'Бонусные_продажи': 101582.53,
+    'Неликвидные_продажи': 15829.01, 'Базовая_часть': 660000.0, 'Оклад': 1440000.0,
+    'Минималка_отдела': 1997000.0, 'Средняя_ЗП': 3625000.0, 'Коэф_обычных': 4.52, 'Коэф_бонусных': 10.2,
+    'Коэф_неликвидов': 2.4, 'Коэф_оптовых': 1.11, 'Гарантия_1': 240000.0, 'Гарантия_2': 144000.0,
+    'Гарантия_3': 48000.0, 'Гарантия_4': 15000.0, 'Гарантия_5': 0.0, 'Неликвид_процент': 26.8,
+    'Норма_часов': 8482.6, 'Процент_нормы': 4468.0, 'Процент_бонусов': 206.9,
+}
+SALES_TOTALS = {'Выручка': 3063978.81, 'Прибыль': 766746.03, 'Бонусные_продажи': 101582.53,
+                'Неликвидные_продажи': 15829.01}
+SALARY_TOTAL = 4196202.38
+MERGED_COLUMNS = list(INTEGRATED_DTYPES)[:16]
+URS_TOTALS = {
+    'Базовая_часть': 660000.0, 'Оклад': 1440000.0, 'Минималка_отдела': 1997000.0, 'Средняя_ЗП': 3625000.0,
+    'Неликвид_процент': 26.8, 'Коэф_обычных': 4.52, 'Коэф_бонусных': 10.2, 'Коэф_неликвидов': 2.4,
+    'Коэф_оптовых': 1.11, 'Гарантия_1': 240000.0, 'Гарантия_2': 144000.0, 'Гарантия_3': 48000.0,
+    'Гарантия_4': 15000.0, 'Гарантия_5': 0.0,
+}
+
+
+def expected_urs_row(urs_data, department):
+    """Настройки сотрудника, как их раздавал прежний построчный цикл"""
+    settings = urs_data['departments'].get(department)
+    row = {}
+    for column, (key, _, default) in DataIntegrator.URS_SETTINGS.items():
+        if key is None:
+            row[column] = float(urs_data['оклад_I2']) if settings else default
+        else:
+            row[column] = settings.get(key, default) if settings else default
+    return row
+
+
+def schedule_and_staff():
+    """
+    Повтор имени в графике (берется последняя строка), имя графика с другим
+    регистром и пробелами, сотрудник без графика, сотрудник без отдела,
+    человек из графика без записи в структуре, повтор в структуре (последняя запись)
+    """
+    schedule_data = {'employees_df': pd.DataFrame({
+        'ФИО': ['Иванов Иван Иванович', '  петров  Петр Петрович', 'Сидоров Сидор Сидорович',
+                'Иванов Иван Иванович', 'Чужой Гость Иванович'],
+        'Часы_всего': [100.0, 120.0, 80.0, 150.0, 60.0],
+        'Выходные_дни': [10, 11, 12, 9, 20],
+        'Отпуск_дни': [0, 3, 0, 1, 0],
+        'Невыход_дни': [0, 0, 0, 0, 0],
+        'Больничные_дни': [2, 0, 0, 1, 0],
+    })}
+
+    def employee(fio, branch, department, director):
+        return {'ФИО': fio, 'ФИО_норм': fio.upper(), 'Филиал': branch, 'Отдел': department,
+                'Директор_филиала': director}
+
+    staff_data = {'success': True, 'employees': [
+        employee('Иванов Иван Иванович', 'БД1', 'Керамика БД1', 'Цветков В.Ю.'),
+        employee('Петров Петр Петрович', 'БД2', 'Сантехника БД2', 'Смирнов С.С.'),
+        employee('Новиков Олег Ильич', 'БД1', 'Маркетинг', 'Цветков В.Ю.'),
+        employee('Сидоров Сидор Сидорович', 'БД2', 'Не указан', 'Смирнов С.С.'),
+        employee('Петров Петр Петрович', 'БД3', 'Керамика БД3', 'Новиков Н.Н.'),
+    ]}
+    return schedule_data, staff_data
+
+
+@pytest.fixture
+def state(generated_month):
+    state, _ = run_period(generated_month['folder'], OFFICE_NORM_HOURS, dashboard=False)
+    return state
+
+
+@pytest.fixture
+def merged(state):
+    return DataIntegrator.integrate_schedule_and_staff(state.schedule_data, state.staff_data)
+
+
+def test_add_sales_data_pinned(state, merged):
+    df = DataIntegrator.add_sales_data(merged, state.sales_data, state)
+
+    assert df[list(SALES_TOTALS)].sum().round(2).to_dict() == SALES_TOTALS
+    assert (df['Выручка'] > 0).sum() == 46
+    # В ячейках - те же словари, что в результатах парсеров (поиск по нормализованному имени)
+    with_sales = df['Данные_продаж'].notna()
+    assert with_sales.sum() == 46
+    for name, info in zip(df.loc[with_sales, 'ФИО_норм'], df.loc[with_sales, 'Данные_продаж']):
+        assert info is state.sales_data[name]
+    with_zakaz = df['Заказные_данные'].notna()
+    assert with_zakaz.sum() == 27
+    for name, info in zip(df.loc[with_zakaz, 'ФИО_норм'], df.loc[with_zakaz, 'Заказные_данные']):
+        assert info is state.zakaz_data['data'][name]
+
+
+def test_integrated_frame_pinned(state):
+    df = state.integrated_data
+
+    assert df.shape == (48, len(INTEGRATED_DTYPES))
+    assert list(df.columns) == list(INTEGRATED_DTYPES)
+    assert {column: str(dtype) for column, dtype in df.dtypes.items()} == INTEGRATED_DTYPES
+    assert df[list(INTEGRATED_TOTALS)].sum().round(2).to_dict() == INTEGRATED_TOTALS
+    assert round(state.calculations['by_employee']['Зарплата_итого'].sum(), 2) == SALARY_TOTAL
+
+
+def test_add_urs_settings_pinned(state, merged):
+    df = DataIntegrator.add_urs_settings(merged, state.urs_data)
+
+    assert list(df.index) == list(range(len(df)))
+    assert df[list(URS_TOTALS)].sum().round(2).to_dict() == URS_TOTALS
+    assert df['Тип_нормы'].value_counts().to_dict() == {'магазин': 46, 'офис': 2}
+    assert df['Неликвиды_в_котле'].value_counts().to_dict() == {True: 32, False: 16}
+    for department, row in zip(df['Отдел'], df[list(DataIntegrator.URS_SETTINGS)].to_dict('records')):
+        assert row == expected_urs_row(state.urs_data, department)
+
+
+def test_add_urs_settings_unknown_departments():
+    urs_data = {
+        'success': True,
+        'оклад_I2': 25000,
+        'departments': {
+            'Керамика БД1': {'минималка': 40000.0, 'коэф_обычных': 0.1, 'неликвиды_в_котле': True,
+                             'тип_нормы': 'магазин', 'норма_часов': 160},
+            'Маркетинг': {},
+        },
+    }
+    df = pd.DataFrame({'ФИО': ['А', 'Б', 'В'], 'Отдел': ['Маркетинг', 'Керамика БД1', 'Склад']}, index=[7, 3, 5])
+
+    df = DataIntegrator.add_urs_settings(df, urs_data)
+
+    assert list(df.index) == [0, 1, 2]
+    assert df[['Оклад', 'Минималка_отдела', 'Коэф_обычных', 'Гарантия_1']].to_dict('list') == {
+        'Оклад': [0.0, 25000.0, 0.0],
+        'Минималка_отдела': [0.0, 40000.0, 0.0],
+        'Коэф_обычных': [0.0, 0.1, 0.0],
+        'Гарантия_1': [0.0, 0.0, 0.0],
+    }
+    assert df['Неликвиды_в_котле'].tolist() == [False, True, False]
+    assert df['Тип_нормы'].tolist() == ['', 'магазин', '']
+    assert df['Норма_часов_из_УРС'].tolist() == [None, 160, None]
+
+
+def test_integrate_schedule_and_staff_edge_cases():
+    df = DataIntegrator.integrate_schedule_and_staff(*schedule_and_staff())
+
+    assert list(df.columns) == MERGED_COLUMNS
+    assert {column: str(dtype) for column, dtype in df.dtypes.items()} == {
+        column: INTEGRATED_DTYPES[column] for column in MERGED_COLUMNS}
+    assert df.reset_index(drop=True).to_dict('list') == {
+        'ФИО': ['Иванов Иван Иванович', 'Новиков Олег Ильич', '  петров  Петр Петрович'],
+        'ФИО_норм': ['ИВАНОВ ИВАН ИВАНОВИЧ', 'НОВИКОВ ОЛЕГ ИЛЬИЧ', 'ПЕТРОВ ПЕТР ПЕТРОВИЧ'],
+        'Часы_всего': [150.0, 0.0, 120.0],
+        'Выходные_дни': [9, 0, 11],
+        'Отпуск_дни': [1, 0, 3],
+        'Больничные_дни': [1, 0, 0],
+        'Источник_график': ['Да', 'Нет', 'Да'],
+        'Филиал': ['БД1', 'БД1', 'БД3'],
+        'Отдел': ['Керамика БД1', 'Маркетинг', 'Керамика БД3'],
+        'Директор_филиала': ['Цветков В.Ю.', 'Цветков В.Ю.', 'Новиков Н.Н.'],
+        'Источник_сотрудники': ['Да', 'Да', 'Да'],
+        'Данные_продаж': [None, None, None],
+        'Выручка': [0.0, 0.0, 0.0],
+        'Прибыль': [0.0, 0.0, 0.0],
+        'Бонусные_продажи': [0.0, 0.0, 0.0],
+        'Неликвидные_продажи': [0.0, 0.0, 0.0],
+    }
+
+
+def test_integrate_schedule_and_staff_pinned(merged):
+    assert list(merged.columns) == MERGED_COLUMNS
+    assert len(merged) == 48
+    assert (merged['Источник_график'] == 'Да').all()
+    assert merged[['Часы_всего', 'Выходные_дни', 'Отпуск_дни', 'Больничные_дни']].sum().to_dict() == {
+        'Часы_всего': 7893.0, 'Выходные_дни': 714, 'Отпуск_дни': 26, 'Больничные_дни': 17}
+    # Порядок строк - филиал, отдел, ФИО
+    assert merged[['Филиал', 'Отдел', 'ФИО']].equals(
+        merged[['Филиал', 'Отдел', 'ФИО']].sort_values(['Филиал', 'Отдел', 'ФИО']))
+    assert merged['Данные_продаж'].map(lambda value: value is None).all()
@@ -0,0 +1,45 @@
+# test_parse_cache.py
+"""Ключ кэша парсинга меняется вместе с версией общего модуля, от которого зависит парсер"""
+
+import numpy as np
+
+from модули import columnar_store, seller_names
+from модули.parse_cache import cache_key, cached_parse
+from модули.parse_sales_analysis import parse_sales_analysis
+from модули.parse_staff_universal import parse_staff_departments
+
+
+def test_helper_version_changes_dependent_keys(tmp_path, monkeypatch):
+    path = tmp_path / "файл.xlsx"
+    path.write_bytes(b"xlsx")
+    sales_key = cache_key(parse_sales_analysis, str(path), (set(), set(), []))
+    staff_key = cache_key(parse_staff_departments, str(path))
+
+    monkeypatch.setattr(seller_names, 'PARSER_VERSION', seller_names.PARSER_VERSION + 1)
+    assert cache_key(parse_sales_analysis, str(path), (set(), set(), [])) != sales_key
+    assert cache_key(parse_staff_departments, str(path)) == staff_key
+
+    monkeypatch.setattr(columnar_store, 'STORE_VERSION', columnar_store.STORE_VERSION + 1)
+    assert cache_key(parse_staff_departments, str(path)) != staff_key
+
+
+def test_cached_parse_reuses_result(generated_month, tmp_path):
+    path = generated_month['files']['staff']
+    first = cached_parse(parse_staff_departments, path, cache_dir=str(tmp_path))
+    second = cached_parse(parse_staff_departments, path, cache_dir=str(tmp_path))
+
+    assert second == first
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+
+def test_code_arrays_differ_in_key(tmp_path):
+    # repr() сокращает длинные массивы - ключ должен зависеть от всех кодов
+    path = tmp_path / "файл.xlsx"
+    path.write_bytes(b"xlsx")
+    codes = np.arange(5000, dtype=np.int64)
+    changed = codes.copy()
+    changed[2500] = -1
+
+    key = cache_key(parse_sales_analysis, str(path), (codes, codes, []))
+    assert cache_key(parse_sales_analysis, str(path), (codes.copy(), codes, [])) == key
+    assert cache_key(parse_sales_analysis, str(path), (changed, codes, [])) != key
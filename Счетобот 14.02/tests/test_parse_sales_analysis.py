@@ -0,0 +1,141 @@
+# test_parse_sales_analysis.py
+"""
+Разбор 'Анализа продаж' синтетического месяца: итоги и запись продавца закреплены
+по результату исходного построчного парсера. Пересчет после замены списка
+бонусов равен разбору файла с новым списком
+"""
+
+import pandas as pd
+import pytest
+
+from модули.parse_bonus_integrated import parse_bonus_items_improved
+from модули.parse_sales_analysis import SALE_TYPES, parse_sales_analysis, reclassify_sales
+from модули.parse_urs_integrated import parse_urs_settings
+
+TOTALS = {
+    'total_revenue': 3063978.81,
+    'total_profit': 766746.03,
+    'total_items_count': 1143.0,
+    'total_bonus_items_count': 93.0,
+    'total_bonus_revenue': 101582.53,
+    'total_bonus_profit': 27278.0,
+    'total_non_liquid_items_count': 17.0,
+    'total_non_liquid_revenue': 15829.01,
+    'total_non_liquid_profit': -42.11,
+}
+REVENUE_BY_TYPE = {
+    'Оптовая продажа': 274060.09,
+    'Розничная (по чекам)': 2712990.29,
+    'Розничная (прочая)': 76928.43,
+}
+
+
+def empty_sale_type(**values):
+    record = dict.fromkeys(['revenue', 'profit', 'items_count', 'bonus_items_count', 'bonus_revenue',
+                            'bonus_profit', 'non_liquid_items_count', 'non_liquid_revenue',
+                            'non_liquid_profit', 'regular_profit', 'regular_revenue'], 0.0)
+    record.update(values)
+    return record
+
+
+# Продавец со всеми тремя типами продаж, бонусами и неликвидом
+SELLER = 'КОРОЛЕВ РУСЛАН ВЯЧЕСЛАВОВИЧ'
+SELLER_RECORD = {
+    'department': 'Не указан',
+    'sales_by_type': {
+        'Оптовая продажа': empty_sale_type(revenue=6793.69, profit=1664.79, items_count=10.0,
+                                           regular_profit=1664.79, regular_revenue=6793.69),
+        'Розничная (по чекам)': empty_sale_type(revenue=27368.66, profit=8297.96, items_count=19.0,
+                                                bonus_items_count=7.0, bonus_revenue=8068.95,
+                                                bonus_profit=2922.11, non_liquid_items_count=1.0,
+                                                non_liquid_revenue=233.5, non_liquid_profit=3.59,
+                                                regular_profit=5372.26, regular_revenue=19066.21),
+        'Розничная (прочая)': empty_sale_type(revenue=5452.23, profit=1044.26, items_count=4.0,
+                                              regular_profit=1044.26, regular_revenue=5452.23),
+    },
+    'total_revenue': 39614.58,
+    'total_profit': 11007.01,
+    'total_items_count': 33.0,
+    'total_bonus_items_count': 7.0,
+    'total_bonus_revenue': 8068.95,
+    'total_bonus_profit': 2922.11,
+    'total_non_liquid_items_count': 1.0,
+    'total_non_liquid_revenue': 233.5,
+    'total_non_liquid_profit': 3.59,
+    'original_name': 'Королев Руслан Вячеславович',
+    'row_number': 444,
+    'продажи_чеки': {'выручка': 27368.66, 'прибыль': 8297.96, 'прибыль_обычная': 5372.26,
+                     'прибыль_бонусная': 2922.11, 'выручка_неликвидов': 233.5, 'прибыль_неликвидов': 3.59},
+    'продажи_опт': {'прибыль': 1664.79, 'выручка': 6793.69, 'items_count': 10.0},
+    'продажи_прочая': {'выручка': 5452.23, 'прибыль': 1044.26, 'items_count': 4.0},
+}
+
+
+def rounded(value):
+    """Суммы в записи продавца - с точностью до копейки"""
+    if isinstance(value, dict):
+        return {key: rounded(item) for key, item in value.items()}
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+@pytest.fixture
+def sales_data(generated_month):
+    files = generated_month['files']
+    bonus_data = parse_bonus_items_improved(files['bonus'])
+    exclusions = parse_urs_settings(files['urs'])['exclusions']
+    return parse_sales_analysis(files['sales'], bonus_data['bonus_items'],
+                                bonus_data['non_liquid_items'], exclusions)
+
+
+def test_sales_totals_pinned(sales_data):
+    assert len(sales_data) == 46
+    totals = {key: round(sum(seller[key] for seller in sales_data.values()), 2) for key in TOTALS}
+    assert totals == TOTALS
+    by_type = {sale_type: round(sum(seller['sales_by_type'][sale_type]['revenue']
+                                    for seller in sales_data.values()), 2)
+               for sale_type in SALE_TYPES}
+    assert by_type == REVENUE_BY_TYPE
+
+
+def test_sales_seller_record_pinned(sales_data):
+    assert rounded(sales_data[SELLER]) == SELLER_RECORD
+    # Ключи и порядок вложенных словарей - как у исходного парсера
+    assert list(sales_data[SELLER]) == list(SELLER_RECORD)
+    assert list(sales_data[SELLER]['sales_by_type']) == SALE_TYPES
+
+
+def modified_lists(bonus_data, facts):
+    """Новый список: половина бонусов уходит в неликвид, десять обычных товаров становятся бонусами"""
+    bonus = sorted(bonus_data['bonus_items'])
+    non_liquid = set(bonus_data['non_liquid_items'])
+    regular = sorted({str(code) for code in facts['item_code'].unique()} - set(bonus) - non_liquid)
+    half = len(bonus) // 2
+    return set(bonus[half:]) | set(regular[:10]), non_liquid | set(bonus[:half])
+
+
+def test_reclassify_matches_fresh_parse(generated_month):
+    files = generated_month['files']
+    bonus_data = parse_bonus_items_improved(files['bonus'])
+    sales_data, facts = parse_sales_analysis(files['sales'], bonus_data['bonus_items'],
+                                             bonus_data['non_liquid_items'], return_facts=True)
+    bonus, non_liquid = modified_lists(bonus_data, facts)
+
+    stats = reclassify_sales(sales_data, facts, bonus, non_liquid)
+    expected_sales, expected_facts = parse_sales_analysis(files['sales'], bonus, non_liquid, return_facts=True)
+
+    assert stats['changed_rows'] > 0
+    assert sales_data == expected_sales
+    pd.testing.assert_frame_equal(facts, expected_facts)
+
+
+def test_reclassify_same_list_changes_nothing(generated_month):
+    files = generated_month['files']
+    bonus_data = parse_bonus_items_improved(files['bonus'])
+    sales_data, facts = parse_sales_analysis(files['sales'], bonus_data['bonus_items'],
+                                             bonus_data['non_liquid_items'], return_facts=True)
+
+    stats = reclassify_sales(sales_data, facts, bonus_data['bonus_codes'], bonus_data['non_liquid_codes'])
+
+    assert stats == {'changed_codes': 0, 'changed_rows': 0, 'affected_sellers': 0}
@@ -0,0 +1,72 @@
+# test_parse_schedule.py
+"""
+Ось дат графика: период с двузначным и четырехзначным годом. Таблица
+сотрудников синтетического месяца закреплена по результату исходного
+построчного подсчета кодов
+"""
+
+from datetime import date
+
+import pytest
+
+from модули.parse_schedule import _day_dates, parse_schedule
+
+EMPLOYEE_DTYPES = {
+    'ФИО': 'str',
+    'Часы_всего': 'float64',
+    'Выходные_дни': 'int64',
+    'Отпуск_дни': 'int64',
+    'Невыход_дни': 'int64',
+    'Больничные_дни': 'int64',
+}
+COLUMN_TOTALS = {'Часы_всего': 7893.0, 'Выходные_дни': 714, 'Отпуск_дни': 26,
+                 'Невыход_дни': 2, 'Больничные_дни': 17}
+# Первые строки и сотрудники с кодами Н и Б
+EMPLOYEES = [
+    {'ФИО': 'Цветкова Вера Ивановна', 'Часы_всего': 121.0, 'Выходные_дни': 12, 'Отпуск_дни': 8,
+     'Невыход_дни': 0, 'Больничные_дни': 0},
+    {'ФИО': 'Иванов Михаил Васильевич', 'Часы_всего': 176.0, 'Выходные_дни': 15, 'Отпуск_дни': 0,
+     'Невыход_дни': 0, 'Больничные_дни': 0},
+    {'ФИО': 'Соколова Любовь Евгеньевна', 'Часы_всего': 132.0, 'Выходные_дни': 12, 'Отпуск_дни': 0,
+     'Невыход_дни': 0, 'Больничные_дни': 7},
+    {'ФИО': 'Лебедева Марина Александровна', 'Часы_всего': 165.0, 'Выходные_дни': 15, 'Отпуск_дни': 0,
+     'Невыход_дни': 1, 'Больничные_дни': 0},
+]
+
+
+@pytest.mark.parametrize("period", [
+    "С 01.12.25 по 31.12.25",
+    "С 01.12.2025 по 31.12.2025",
+])
+def test_day_dates_both_year_formats(period):
+    dates = _day_dates(period, [1, 2, 31])
+    assert dates == [date(2025, 12, 1), date(2025, 12, 2), date(2025, 12, 31)]
+
+
+@pytest.mark.parametrize("period", [
+    "С 16.12.25 по 15.01.26",
+    "С 16.12.2025 по 15.01.2026",
+])
+def test_day_dates_cross_month(period):
+    dates = _day_dates(period, [16, 31, 1, 15])
+    assert dates == [date(2025, 12, 16), date(2025, 12, 31), date(2026, 1, 1), date(2026, 1, 15)]
+
+
+def test_day_dates_without_period():
+    assert _day_dates("", [1, 2]) == [None, None]
+    assert _day_dates("График работы", [1]) == [None]
+
+
+def test_schedule_employees_pinned(generated_month):
+    result = parse_schedule(generated_month['files']['schedule'])
+    employees = result['employees_df']
+
+    assert result['period'] == "График работы  С 01.03.2025 по 31.03.2025"
+    assert (result['period_row'], result['header_row'], result['hours_col']) == (0, 2, 34)
+    assert list(employees.columns) == list(EMPLOYEE_DTYPES)
+    assert {column: str(dtype) for column, dtype in employees.dtypes.items()} == EMPLOYEE_DTYPES
+    assert list(employees.index) == list(range(48))
+    assert employees[list(COLUMN_TOTALS)].sum().to_dict() == COLUMN_TOTALS
+    by_name = employees.set_index('ФИО', drop=False)
+    for employee in EMPLOYEES:
+        assert by_name.loc[employee['ФИО']].to_dict() == employee
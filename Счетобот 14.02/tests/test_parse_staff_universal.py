@@ -0,0 +1,114 @@
+# test_parse_staff_universal.py
+"""
+Список сотрудников: колоночная очистка и группировки groupby дают ту же
+структуру, что и прежний построчный разбор (группировки ниже собраны так же,
+как он их собирал - по одному сотруднику за раз)
+"""
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from модули.parse_staff_universal import parse_staff_departments
+
+# Лишние пробелы, строки-заголовки, пустое и слишком короткое ФИО, один человек дважды
+MESSY_ROWS = [
+    ['Сотрудник', 'Филиал', 'Директор', 'Отдел'],
+    ['  Иванов   Иван Иванович ', 'БД1', 'Петров  П.П.', 'Керамика  БД1'],
+    ['Сидорова Анна Петровна', ' БД1 ', 'Петров П.П.', 'Керамика БД1'],
+    ['Кузнецов Олег Игоревич', 'БД1', 'Петров П.П.', 'Маркетинг'],
+    ['Орлова Мария Сергеевна', 'БД2', 'Смирнов С.С.', 'Сантехника БД2'],
+    ['ФИО', 'БД2', 'Смирнов С.С.', 'Сантехника БД2'],
+    [None, 'БД2', 'Смирнов С.С.', 'Сантехника БД2'],
+    ['Я', 'БД2', 'Смирнов С.С.', 'Сантехника БД2'],
+    ['Волков Петр Андреевич', 'БД2', 'Смирнов С.С.', 'Сантехника  БД2'],
+    ['Егорова Нина Павловна', 'БД2', 'Смирнов С.С.', 'Керамика БД1'],
+    ['Зайцев Илья Олегович', 'БД3', 'Новиков Н.Н.', 'Керамика БД3'],
+    ['Попов Глеб Ильич', 'БД3', 'Новиков Н.Н.', 'Маркетинг'],
+    ['волков петр андреевич', 'БД2', 'Смирнов  С.С.', 'Керамика БД1'],
+]
+MESSY_EMPLOYEES = [
+    ('Иванов Иван Иванович', 'БД1', 'Керамика БД1', 'Петров П.П.', 2),
+    ('Сидорова Анна Петровна', 'БД1', 'Керамика БД1', 'Петров П.П.', 3),
+    ('Кузнецов Олег Игоревич', 'БД1', 'Маркетинг', 'Петров П.П.', 4),
+    ('Орлова Мария Сергеевна', 'БД2', 'Сантехника БД2', 'Смирнов С.С.', 5),
+    ('Волков Петр Андреевич', 'БД2', 'Сантехника БД2', 'Смирнов С.С.', 9),
+    ('Егорова Нина Павловна', 'БД2', 'Керамика БД1', 'Смирнов С.С.', 10),
+    ('Зайцев Илья Олегович', 'БД3', 'Керамика БД3', 'Новиков Н.Н.', 11),
+    ('Попов Глеб Ильич', 'БД3', 'Маркетинг', 'Новиков Н.Н.', 12),
+    ('волков петр андреевич', 'БД2', 'Керамика БД1', 'Смирнов С.С.', 13),
+]
+
+
+def expected_grouping(employees):
+    """Группировки, как их строил прежний разбор: сотрудники по одному, в порядке строк"""
+    branches, departments = {}, {}
+    for employee in employees:
+        branch = branches.setdefault(employee['Филиал'], {'employees': [], 'departments': set()})
+        branch['employees'].append(employee['ФИО_норм'])
+        branch['departments'].add(employee['Отдел'])
+        branch['director'] = employee['Директор_филиала']
+        department = departments.setdefault(employee['Отдел'], {'employees': [], 'branches': set()})
+        department['employees'].append(employee['ФИО_норм'])
+        department['branches'].add(employee['Филиал'])
+    return {
+        'by_branch': {b: branches[b]['employees'] for b in sorted(branches)},
+        'by_department': {d: departments[d]['employees'] for d in sorted(departments)},
+        'departments_by_branch': {b: sorted(info['departments']) for b, info in branches.items()},
+        'branch_directors': {b: info['director'] for b, info in branches.items()},
+        'branches_by_department': {d: sorted(departments[d]['branches']) for d in sorted(departments)},
+    }
+
+
+def assert_grouping(result):
+    expected = expected_grouping(result['employees'])
+    assert result['grouping'] == expected
+    # Порядок ключей тоже как раньше: по алфавиту или по первому появлению
+    for key, value in expected.items():
+        assert list(result['grouping'][key]) == list(value), key
+
+
+def test_staff_generated_month_pinned(generated_month):
+    result = parse_staff_departments(generated_month['files']['staff'])
+
+    assert result['summary'] == {
+        'total_employees': 48, 'total_branches': 3, 'total_departments': 4,
+        'branches_with_director': 3, 'processed_rows': 48, 'skipped_rows': 0,
+    }
+    assert result['statistics'] == {
+        'branches': ['БД1', 'БД3', 'БД4'],
+        'departments': ['Керамика БД1', 'Керамика БД3', 'Керамика БД4', 'Маркетинг'],
+        'employees_per_branch': {'БД3': 15, 'БД1': 18, 'БД4': 15},
+        'employees_per_department': {'Керамика БД3': 15, 'Керамика БД1': 16, 'Маркетинг': 2, 'Керамика БД4': 15},
+        'avg_employees_per_branch': 16.0,
+        'avg_employees_per_department': 12.0,
+    }
+    assert result['grouping']['branch_directors'] == {
+        'БД3': 'Кузьмина К.Ю.', 'БД1': 'Цветков В.Ю.', 'БД4': 'Сорокин А.П.',
+    }
+    assert result['employees'][0] == {
+        'ФИО': 'Цветкова Вера Ивановна', 'ФИО_норм': 'ЦВЕТКОВА ВЕРА ИВАНОВНА', 'Филиал': 'БД3',
+        'Отдел': 'Керамика БД3', 'Директор_филиала': 'Кузьмина К.Ю.', 'row_index': 2,
+    }
+    assert_grouping(result)
+
+
+def test_staff_messy_rows(tmp_path):
+    workbook = openpyxl.Workbook()
+    for row in MESSY_ROWS:
+        workbook.active.append(row)
+    path = tmp_path / "Сотрудники по отделам.xlsx"
+    workbook.save(path)
+
+    result = parse_staff_departments(str(path))
+
+    assert result['summary'] == {
+        'total_employees': 9, 'total_branches': 3, 'total_departments': 4,
+        'branches_with_director': 3, 'processed_rows': 9, 'skipped_rows': 3,
+    }
+    assert result['employees'] == [
+        {'ФИО': fio, 'ФИО_норм': fio.upper(), 'Филиал': branch, 'Отдел': department,
+         'Директор_филиала': director, 'row_index': row_index}
+        for fio, branch, department, director, row_index in MESSY_EMPLOYEES
+    ]
+    assert_grouping(result)
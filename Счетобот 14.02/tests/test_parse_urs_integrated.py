@@ -0,0 +1,88 @@
+# test_parse_urs_integrated.py
+"""Потоковое чтение листа УРС должно давать те же ячейки, что pd.read_excel(dtype=str)"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from модули.parse_urs_integrated import MAX_COLUMNS, NA_STRINGS, _clean_numeric, _stream_xlsx
+
+ERROR_CELLS = ['#N/A', '#DIV/0!', '#REF!', '#VALUE!', '#NAME?', '#NUM!', '#NULL!']
+NA_TEXT = ['NA', 'None', 'NULL', 'n/a', 'N/A', 'nan', 'null', '<NA>']
+
+
+def _random_value(rng):
+    kind = rng.random()
+    if kind < 0.15:
+        return None
+    if kind < 0.30:
+        return rng.choice(ERROR_CELLS)      # openpyxl записывает как ячейку-ошибку
+    if kind < 0.45:
+        return rng.choice(NA_TEXT)
+    if kind < 0.60:
+        return float(rng.randint(-1000, 100000))
+    if kind < 0.75:
+        return round(rng.uniform(-10, 10), rng.randint(0, 4))
+    if kind < 0.85:
+        return rng.randint(0, 10 ** 6)
+    return rng.choice(['Отдел 1', ' 1 234,5 ', 'да', 'магазин', '0,15', 'текст'])
+
+
+def _write_sheet(path, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _as_cells(df):
+    df = df.astype(object)
+    return df.where(df.notna(), None)
+
+
+def _read_excel_cells(path):
+    """Прежнее чтение листа УРС"""
+    return _as_cells(pd.read_excel(path, dtype=str, header=None, usecols="A:R"))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stream_matches_read_excel(tmp_path, seed):
+    rng = random.Random(seed)
+    rows = [[_random_value(rng) for _ in range(MAX_COLUMNS)] for _ in range(40)]
+    # Первая и последняя колонки заполнены - ширина таблицы одинакова при любом чтении
+    for row in rows:
+        row[0], row[-1] = 'Отдел', 1
+    path = tmp_path / "УРС.xlsx"
+    _write_sheet(path, rows)
+
+    expected = _read_excel_cells(path)
+    actual = _as_cells(_stream_xlsx(path))
+
+    assert actual.shape == expected.shape
+    assert actual.values.tolist() == expected.values.tolist()
+
+
+def test_error_and_na_cells_stay_missing(tmp_path):
+    # D, E, J - ошибки Excel, F - строка 'NA': раньше NaN, а не 0
+    row = ['Отдел', 'x', 'y', '#N/A', '#DIV/0!', 'NA', 10, 20, 30, '#REF!']
+    path = tmp_path / "УРС.xlsx"
+    _write_sheet(path, [row])
+
+    cells = _stream_xlsx(path)
+    for column in (3, 4, 5, 9):
+        assert cells.iat[0, column] is None
+        assert np.isnan(_clean_numeric(cells[column]).iat[0])
+    assert _clean_numeric(cells[6]).iat[0] == 10.0
+
+
+def test_na_strings_match_pandas_defaults():
+    # Список пропусков pandas не публичный: сверяем, пока он есть в этом месте
+    parsers = pytest.importorskip("pandas._libs.parsers")
+    if not hasattr(parsers, 'STR_NA_VALUES'):
+        pytest.skip("pandas не отдает STR_NA_VALUES")
+    assert NA_STRINGS == set(parsers.STR_NA_VALUES)
@@ -0,0 +1,77 @@
+# test_parse_zakaz_sales.py
+"""
+Сопоставление продавцов Заказ.xlsx с сотрудниками: индекс имен выбирает того же
+сотрудника, что и прежний перебор, а итоги синтетического месяца закреплены по
+результату исходного парсера
+"""
+
+import random
+
+import pytest
+
+from модули.name_index import NameIndex, match_linear
+from модули.parse_staff_universal import parse_staff_departments
+from модули.parse_urs_integrated import parse_urs_settings
+from модули.parse_zakaz_sales import parse_zakaz_sales
+
+STATISTICS = {
+    'total_unordered_items': 505.0,
+    'total_unordered_revenue': 1191607.78,
+    'total_unordered_profit': 289374.31,
+    'total_ordered_items': 167.0,
+    'total_ordered_revenue': 382905.63,
+    'total_ordered_profit': 92113.07,
+    'vendors_count': 27,
+    'matched_employees': 27,
+}
+SELLER = 'АБРАМОВ ДМИТРИЙ АЛЕКСАНДРОВИЧ'
+SELLER_RECORD = {
+    'fio': 'Абрамов Дмитрий Александрович',
+    'unordered': {'items': 24.0, 'revenue': 36164.35, 'profit': 7074.92},
+    'ordered': {'items': 8.0, 'revenue': 12401.09, 'profit': 2426.06},
+}
+
+
+@pytest.fixture
+def staff_data(generated_month):
+    return parse_staff_departments(generated_month['files']['staff'])
+
+
+def test_zakaz_matches_pinned(generated_month, staff_data):
+    files = generated_month['files']
+    exclusions = parse_urs_settings(files['urs'])['exclusions']
+    result = parse_zakaz_sales(files['zakaz'], staff_data, exclusions)
+
+    assert result['success']
+    statistics = {key: round(value, 2) if isinstance(value, float) else value
+                  for key, value in result['statistics'].items()}
+    assert statistics == STATISTICS
+    assert len(result['data']) == 27
+    assert set(result['data']) <= {employee['ФИО_норм'] for employee in staff_data['employees']}
+    assert result['data'][SELLER] == SELLER_RECORD
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_name_index_matches_linear_scan(staff_data, seed):
+    rng = random.Random(seed)
+    names = [employee['ФИО_норм'] for employee in staff_data['employees']]
+    # Однофамильцы и вложенные имена: выигрывает первый сотрудник в исходном порядке
+    names += [name.split()[0] for name in rng.sample(names, 5)]
+    names += [name + " МЛАДШИЙ" for name in rng.sample(names, 5)]
+
+    vendors = []
+    for name in rng.sample(names, 20):
+        words = name.split()
+        vendors += [
+            name,
+            words[0],
+            " ".join(words[:2]),
+            name[1:-1],
+            f"ИП {name} (СКЛАД)",
+            name[:rng.randint(1, 4)],
+        ]
+    vendors += ["ООО РОМАШКА", "ЯЯЯ"]
+
+    index = NameIndex(names)
+    for vendor in vendors:
+        assert index.match(vendor) == match_linear(names, vendor), vendor
@@ -0,0 +1,49 @@
+# test_pipeline.py
+"""Замена списка бонусов в загруженном периоде: сброс интеграции и тот же итог, что у нового расчета"""
+
+import shutil
+
+import pandas as pd
+
+from conftest import MONTH
+from модули import workload_generator
+from модули.data_integrator_simple import DataIntegrator
+from модули.pipeline import reload_bonus_list, run_period
+from модули.salary_calculator import SalaryCalculator
+
+OFFICE_NORM_HOURS = 168
+
+
+def write_changed_bonus_list(folder):
+    """Переписывает список бонусов: бонусы становятся неликвидом, 30 обычных товаров - бонусами"""
+    catalog = workload_generator.make_catalog(MONTH['employees'] * MONTH['items_per_seller'], MONTH['seed'])
+    status = catalog['status'].to_numpy().copy()
+    regular = (status == 0).nonzero()[0]
+    status[status == 1] = 2
+    status[regular[:30]] = 1
+    catalog['status'] = status
+    return workload_generator._write_sheet(workload_generator.bonus_sheet(catalog), folder, 'bonus', 'xlsx')
+
+
+def test_reload_bonus_list_resets_stale_integration(generated_month, tmp_path):
+    folder = str(tmp_path / "данные")
+    shutil.copytree(generated_month['folder'], folder)
+
+    state, _ = run_period(folder, OFFICE_NORM_HOURS, dashboard=False)
+    stale = state.integrated_data
+    bonus_path = write_changed_bonus_list(folder)
+
+    stats = reload_bonus_list(state, bonus_path)
+
+    assert stats['changed_rows'] > 0
+    assert state.integrated_data is None
+    assert state.calculations is None
+    assert state.dashboard_path is None
+
+    state.integrated_data = DataIntegrator.create_integrated_dataframe(state, OFFICE_NORM_HOURS)
+    state.calculations = SalaryCalculator().calculate_salary(state.integrated_data, OFFICE_NORM_HOURS)
+    fresh, _ = run_period(folder, OFFICE_NORM_HOURS, dashboard=False)
+
+    assert not stale['Бонусные_продажи'].equals(state.integrated_data['Бонусные_продажи'])
+    pd.testing.assert_frame_equal(state.integrated_data, fresh.integrated_data)
+    pd.testing.assert_frame_equal(state.calculations['by_employee'], fresh.calculations['by_employee'])
@@ -0,0 +1,108 @@
+# background_worker.py
+"""
+Выполнение этапов расчета в фоновом потоке
+
+Загрузка, интеграция, расчет и дашборд на больших файлах занимают минуты -
+в главном потоке окно все это время "Не отвечает". Этап запускается в
+потоке, а события прогресса передаются окну через очередь, которую главный
+поток опрашивает через root.after. Сам поток окно не трогает.
+
+Отмена - мягкая: работа получает функцию progress(...) и вызывает ее между
+файлами, шагами или отделами; после нажатия "Отмена" очередной вызов
+progress выбрасывает RunCancelled, и этап останавливается в этой точке.
+"""
+
+import queue
+import threading
+import traceback
+
+POLL_MS = 100
+
+
+class RunCancelled(Exception):
+    """Этап остановлен пользователем"""
+
+
+class BackgroundWorker:
+    """Один фоновый этап за раз; обработчики результата вызываются в главном потоке"""
+
+    def __init__(self, root, on_progress=None, poll_ms=POLL_MS):
+        self.root = root
+        self.on_progress = on_progress
+        self.poll_ms = poll_ms
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.stage = None
+        self._handlers = None
+
+    @property
+    def busy(self):
+        return self._handlers is not None
+
+    def progress(self, message=None, **counters):
+        """
+        Событие прогресса из потока этапа и точка отмены
+
+        counters: files_done/files_total, rows, departments_done/departments_total и т.п.
+        """
+        if self.cancel_event.is_set():
+            raise RunCancelled(self.stage)
+        self.events.put(('progress', dict(counters, stage=self.stage, message=message)))
+
+    def start(self, stage, work, on_done, on_error=None, on_cancel=None):
+        """
+        Запускает work(progress) в фоновом потоке
+
+        on_done(результат), on_error(исключение, traceback), on_cancel() -
+        вызываются в главном потоке. Возвращает False, если уже идет другой этап.
+        """
+        if self.busy:
+            return False
+
+        self.stage = stage
+        self.cancel_event.clear()
+        self._handlers = (on_done, on_error, on_cancel)
+
+        def target():
+            try:
+                result = work(self.progress)
+            except RunCancelled:
+                self.events.put(('cancelled', None))
+            except Exception as e:
+                self.events.put(('error', (e, traceback.format_exc())))
+            else:
+                self.events.put(('done', result))
+
+        threading.Thread(target=target, name=f"stage-{stage}", daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+        return True
+
+    def cancel(self):
+        """Просит этап остановиться в ближайшей точке progress"""
+        if self.busy:
+            self.cancel_event.set()
+
+    def _poll(self):
+        """Разбирает накопившиеся события (главный поток)"""
+        while True:
+            try:
+                kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'progress':
+                if self.on_progress:
+                    self.on_progress(payload)
+                continue
+
+            on_done, on_error, on_cancel = self._handlers
+            self._handlers = None
+            if kind == 'done':
+                on_done(payload)
+            elif kind == 'error' and on_error:
+                on_error(*payload)
+            elif kind == 'cancelled' and on_cancel:
+                on_cancel()
+            return
+
+        self.root.after(self.poll_ms, self._poll)
@@ -0,0 +1,504 @@
+# benchmark_suite.py
+"""
+Замеры скорости: парсеры, интеграция, расчет зарплаты, дашборд
+
+Для каждого масштаба (модули/workload_generator.py, SCALES) генерируются
+входные файлы (один раз, данные/.бенчмарк), затем каждый этап выполняется
+repeat раз: в отчет идут лучшее и медианное время, пик памяти этапа
+(tracemalloc, отдельный прогон) и контрольная сумма результата.
+
+Контрольная сумма не зависит от порядка строк таблиц и ключей словарей,
+деньги округляются до копеек - ускорение, которое переставило строки,
+сумму не меняет, а изменившаяся зарплата - меняет.
+
+Результаты сохраняются в JSON; базовый файл (BASELINE_FILE) хранит последние
+принятые замеры по масштабам, compare_results сравнивает с ним: этап
+медленнее порога - регрессия, другая контрольная сумма - изменился результат.
+
+Парсеры вызываются мимо кэша парсинга; колоночные копии Excel прогреваются
+первым (неучтенным) вызовом - замеряется повторное чтение, как при работе.
+"""
+
+import copy
+import gc
+import hashlib
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from модули.parallel_loader import PARSERS, load_all_files_parallel, result_rows, parser_arguments
+from модули.workload_generator import SCALES, generate_month
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
+BENCH_DIR = os.path.join("отчётные_папки", "бенчмарки")
+BASELINE_FILE = os.path.join(BENCH_DIR, "базовый.json")
+INPUTS_DIR = os.path.join("данные", ".бенчмарк")
+RESULTS_VERSION = 1
+
+DEFAULT_SCALES = ('branch', 'network')
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10     # +10% времени или памяти - регрессия
+MIN_DELTA_SECONDS = 0.02     # разница меньше - шум таймера
+MIN_DELTA_MB = 1.0
+OFFICE_NORM_HOURS = 168
+INPUT_YEAR, INPUT_MONTH = 2025, 1
+
+# Этапы в порядке выполнения: имя -> тип файла парсера (None - этап расчета)
+STAGES = {
+    'parse_schedule': 'schedule',
+    'parse_urs_settings': 'urs',
+    'parse_sales_analysis': 'sales',
+    'parse_zakaz_sales': 'zakaz',
+    'create_integrated_dataframe': None,
+    'calculate_salary': None,
+    'dashboard_generate': None,
+}
+
+
+# ===== КОНТРОЛЬНЫЕ СУММЫ =====
+
+def _round_money(values):
+    """Округление до копеек; +0.0 убирает -0.0"""
+    return np.round(np.asarray(values, dtype=float), 2) + 0.0
+
+
+def _value_digest(value):
+    """64-битный хэш одного значения (для ячеек со словарями и списками)"""
+    h = hashlib.blake2b(digest_size=8)
+    _feed(h, value)
+    return int.from_bytes(h.digest(), 'little')
+
+
+def _column_hashes(series):
+    """Хэш каждой ячейки колонки (uint64)"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return pd.util.hash_array(series.to_numpy())
+    if pd.api.types.is_float_dtype(series):
+        return pd.util.hash_array(_round_money(series.to_numpy()))
+    try:
+        return pd.util.hash_pandas_object(series, index=False).to_numpy()
+    except TypeError:
+        # Ячейки со словарями (Данные_продаж) - по значению
+        return np.fromiter((_value_digest(v) for v in series), dtype=np.uint64, count=len(series))
+
+
+def _feed_frame(h, df):
+    """Таблица: набор строк без учета порядка строк и колонок"""
+    columns = sorted(df.columns, key=str)
+    h.update(repr([str(c) for c in columns]).encode())
+    rows = np.zeros(len(df), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in columns:
+            rows = rows * np.uint64(1000003) ^ _column_hashes(df[column])
+    h.update(np.sort(rows).tobytes())
+
+
+def _feed(h, value):
+    if value is None or isinstance(value, (bool, np.bool_, str)):
+        h.update(repr(value).encode())
+    elif isinstance(value, (int, np.integer)):
+        h.update(repr(int(value)).encode())
+    elif isinstance(value, (float, np.floating)):
+        h.update(repr(float(_round_money(value))).encode())
+    elif isinstance(value, dict):
+        h.update(b'{')
+        for key in sorted(value, key=str):
+            _feed(h, key)
+            _feed(h, value[key])
+        h.update(b'}')
+    elif isinstance(value, (set, frozenset)):
+        h.update(b'<')
+        for item in sorted(value, key=repr):
+            _feed(h, item)
+        h.update(b'>')
+    elif isinstance(value, (list, tuple)):
+        h.update(b'[')
+        for item in value:
+            _feed(h, item)
+        h.update(b']')
+    elif isinstance(value, pd.DataFrame):
+        _feed_frame(h, value)
+    elif isinstance(value, pd.Series):
+        _feed_frame(h, value.to_frame())
+    elif isinstance(value, np.ndarray):
+        h.update(f"{value.dtype.kind}{value.shape}".encode())
+        if value.dtype.kind == 'f':
+            h.update(_round_money(value).tobytes())
+        elif value.dtype.kind in 'biu':
+            h.update(np.ascontiguousarray(value).tobytes())
+        else:
+            for item in value.ravel().tolist():
+                _feed(h, item)
+    else:
+        h.update(repr(value).encode())
+
+
+def checksum(value):
+    """Контрольная сумма результата этапа (16 hex-символов)"""
+    h = hashlib.blake2b(digest_size=8)
+    _feed(h, value)
+    return h.hexdigest()
+
+
+# ===== ВХОДНЫЕ ДАННЫЕ =====
+
+def prepare_inputs(scale, seed=0, inputs_dir=INPUTS_DIR):
+    """Папка с входными файлами масштаба (генерируется, если ее нет или параметры другие)"""
+    spec = dict(SCALES[scale], seed=seed, year=INPUT_YEAR, month=INPUT_MONTH)
+    folder = os.path.join(inputs_dir, f"{scale}-{seed}")
+    spec_path = os.path.join(folder, "параметры.json")
+
+    if os.path.exists(spec_path):
+        with open(spec_path, encoding='utf-8') as f:
+            if json.load(f) == spec:
+                return folder, spec
+
+    logger.warning("🧪 Генерирую входные данные '%s' (%s сотрудников)...", scale, spec['employees'])
+    generate_month(folder, INPUT_YEAR, INPUT_MONTH, employees=spec['employees'], branches=spec['branches'],
+                   items_per_seller=spec['items_per_seller'], seed=seed)
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        json.dump(spec, f, ensure_ascii=False)
+    return folder, spec
+
+
+def _load_state(folder):
+    """Состояние периода после загрузки (через кэш парсинга) - вход этапов расчета"""
+    from модули.pipeline import PipelineState, find_input_files, detect_period
+
+    state = PipelineState(folder)
+    state.found_files = find_input_files(folder)
+    detect_period(state)
+    loaded = load_all_files_parallel(state.found_files, max_workers=1)
+    for key in ('schedule_data', 'staff_data', 'urs_data', 'bonus_data',
+                'sales_data', 'sales_facts', 'zakaz_data'):
+        setattr(state, key, loaded[key])
+    return state
+
+
+# ===== ЭТАПЫ =====
+
+def _stage_calls(state, reports_dir):
+    """
+    Этап -> (setup, run, rows): setup() готовит вход (не замеряется),
+    run(вход) - замеряемый вызов, rows(результат) - строк на выходе
+    """
+    from модули.data_integrator_simple import DataIntegrator
+    from модули.salary_calculator import SalaryCalculator
+    from модули.manager_dashboard_pro import ManagerDashboardPro
+
+    parsed = {kind: getattr(state, PARSERS[kind][2]) for kind in PARSERS}
+    calls = {}
+
+    def parser_call(kind):
+        module_name, func_name, _ = PARSERS[kind]
+        parser = getattr(importlib.import_module(module_name), func_name)
+        path = state.found_files[kind]
+        args, kwargs = parser_arguments(kind, parsed)
+        return (lambda: None,
+                lambda _: parser(path, *args, **kwargs),
+                lambda result: result_rows(kind, result))
+
+    for stage, kind in STAGES.items():
+        if kind and kind in state.found_files:
+            calls[stage] = parser_call(kind)
+
+    def integrate_setup():
+        # Интеграция не должна видеть изменений предыдущего повтора
+        return copy.copy(state)
+
+    calls['create_integrated_dataframe'] = (
+        integrate_setup,
+        lambda manager: DataIntegrator.create_integrated_dataframe(manager, OFFICE_NORM_HOURS),
+        len,
+    )
+    calls['calculate_salary'] = (
+        lambda: state.integrated_data,
+        lambda integrated: SalaryCalculator().calculate_salary(integrated, OFFICE_NORM_HOURS),
+        lambda result: len(result['by_employee']),
+    )
+
+    def dashboard_run(_):
+        generator = ManagerDashboardPro(state)
+        generator.reports_dir = reports_dir
+        generator.generate()
+        return generator.df
+
+    calls['dashboard_generate'] = (lambda: None, dashboard_run, len)
+    return calls
+
+
+def _measure(setup, run, repeat):
+    """Время повторов (секунды) и результат последнего повтора"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        argument = setup()
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = run(argument)
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _peak_memory(setup, run):
+    """Пик памяти одного прогона этапа (МБ сверх памяти до него)"""
+    argument = setup()
+    gc.collect()
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        run(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started:
+            tracemalloc.stop()
+    return (peak - before) / (1024 * 1024)
+
+
+def _keep_result(state, stage, result):
+    """Следующим этапам нужен результат расчета, как в приложении"""
+    if stage == 'create_integrated_dataframe':
+        state.integrated_data = result
+    elif stage == 'calculate_salary':
+        state.calculations = result
+
+
+def run_scale(scale, repeat=DEFAULT_REPEAT, memory=True, seed=0, stages=None):
+    """
+    Замеры одного масштаба
+
+    Возвращает {'spec': параметры входных данных, 'stages': {этап: {...}}}
+    """
+    folder, spec = prepare_inputs(scale, seed)
+    state = _load_state(folder)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as reports_dir:
+        calls = _stage_calls(state, reports_dir)
+        for stage in STAGES:
+            if stage not in calls:
+                continue
+            setup, run, rows = calls[stage]
+            if stages and stage not in stages:
+                # Пропущенный этап расчета все равно нужен следующим - без замера
+                if STAGES[stage] is None:
+                    _keep_result(state, stage, run(setup()))
+                continue
+
+            # Прогрев: колоночные копии Excel, импорт модулей, классификаторы имен
+            if STAGES[stage]:
+                run(setup())
+
+            times, result = _measure(setup, run, repeat)
+            entry = {
+                'seconds': min(times),
+                'median': statistics.median(times),
+                'repeats': len(times),
+                'rows': rows(result),
+                'checksum': checksum(result),
+                'peak_mb': _peak_memory(setup, run) if memory else None,
+            }
+            results[stage] = entry
+            logger.warning("  ⏱️  %-28s %8.3f с  %s", stage, entry['seconds'], entry['checksum'])
+
+            _keep_result(state, stage, result)
+            del result
+
+    return {'spec': spec, 'stages': results}
+
+
+def environment():
+    """Где снят замер: сравнение с другой машиной или версией pandas - с оговоркой"""
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_suite(scales=DEFAULT_SCALES, repeat=DEFAULT_REPEAT, memory=True, seed=0, stages=None):
+    """
+    Замеры всех масштабов: {'version', 'created', 'environment', 'stages', 'scales': {масштаб: ...}}
+
+    stages - выбранные этапы (None - все); compare_results не считает пропажей
+    этапы, исключенные выбором
+    """
+    unknown = [stage for stage in stages or () if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"Неизвестные этапы: {', '.join(unknown)}")
+    results = {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'stages': list(stages) if stages else None,
+        'scales': {},
+    }
+    for scale in scales:
+        logger.warning("📏 Масштаб '%s'", scale)
+        results['scales'][scale] = run_scale(scale, repeat, memory, seed, stages)
+    return results
+
+
+# ===== ФАЙЛЫ =====
+
+def save_results(results, path=None):
+    """Сохраняет замеры (по умолчанию - бенчмарк_<время>.json в BENCH_DIR)"""
+    if path is None:
+        path = os.path.join(BENCH_DIR, f"бенчмарк_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_baseline(results, path=BASELINE_FILE):
+    """Записывает замеры в базовый файл; масштабы, которых нет в results, остаются прежними"""
+    baseline = load_results(path) if os.path.exists(path) else {'version': RESULTS_VERSION, 'scales': {}}
+    baseline.update({key: value for key, value in results.items() if key != 'scales'})
+    baseline['scales'].update(results['scales'])
+    return save_results(baseline, path)
+
+
+# ===== СРАВНЕНИЕ =====
+
+STATUS_TEXT = {
+    'ok': "✅",
+    'faster': "🚀 быстрее",
+    'slower': "⚠️  медленнее",
+    'memory': "⚠️  память",
+    'checksum': "❌ результат изменился",
+    'inputs': "❔ другие входные данные",
+    'new': "🆕 нет в базовом",
+    'missing': "❌ не замерен",
+}
+FAILING = ('slower', 'memory', 'checksum', 'missing')
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Сравнение с базовыми замерами
+
+    Возвращает список {'scale', 'stage', 'status', 'before', 'after', 'change',
+    'peak_before', 'peak_after'}; статусы регрессий - FAILING.
+    Этап базового масштаба, которого нет в замере (и который не исключен
+    выбором этапов), - 'missing': этап упал или не нашелся его входной файл
+    """
+    rows = []
+    selected = current.get('stages')
+    for scale, measured in current['scales'].items():
+        base_scale = baseline.get('scales', {}).get(scale)
+        if base_scale:
+            for stage, before in base_scale['stages'].items():
+                if stage not in measured['stages'] and (not selected or stage in selected):
+                    rows.append({
+                        'scale': scale, 'stage': stage, 'status': 'missing',
+                        'before': before['seconds'], 'after': None, 'change': None,
+                        'peak_before': before['peak_mb'], 'peak_after': None,
+                    })
+        for stage, after in measured['stages'].items():
+            before = base_scale['stages'].get(stage) if base_scale else None
+            row = {
+                'scale': scale, 'stage': stage, 'after': after['seconds'],
+                'before': None, 'change': None, 'peak_before': None, 'peak_after': after['peak_mb'],
+            }
+            rows.append(row)
+            if before is None:
+                row['status'] = 'new'
+                continue
+
+            row['before'] = before['seconds']
+            row['peak_before'] = before['peak_mb']
+            row['change'] = (after['seconds'] - before['seconds']) / before['seconds'] if before['seconds'] else 0.0
+            delta = after['seconds'] - before['seconds']
+
+            if base_scale['spec'] != measured['spec']:
+                row['status'] = 'inputs'
+            elif before['checksum'] != after['checksum']:
+                row['status'] = 'checksum'
+            elif row['change'] > threshold and delta > MIN_DELTA_SECONDS:
+                row['status'] = 'slower'
+            elif (before['peak_mb'] is not None and after['peak_mb'] is not None and
+                  after['peak_mb'] - before['peak_mb'] > max(MIN_DELTA_MB, before['peak_mb'] * threshold)):
+                row['status'] = 'memory'
+            elif row['change'] < -threshold and -delta > MIN_DELTA_SECONDS:
+                row['status'] = 'faster'
+            else:
+                row['status'] = 'ok'
+    return rows
+
+
+def has_regressions(comparison):
+    return any(row['status'] in FAILING for row in comparison)
+
+
+# ===== ОТЧЕТЫ =====
+
+def _memory_text(value):
+    return f"{value:,.1f}" if value is not None else "-"
+
+
+def format_results(results):
+    """Таблица замеров по масштабам"""
+    lines = []
+    for scale, measured in results['scales'].items():
+        spec = measured['spec']
+        lines.append(f"\n📏 {scale}: сотрудников {spec['employees']:,}, филиалов {spec['branches']}, "
+                     f"строк на продавца {spec['items_per_seller']}")
+        lines.append(f"{'Этап':<30} {'Лучшее, с':>10} {'Медиана, с':>11} {'Пик, МБ':>9} {'Строк':>10}  Сумма")
+        lines.append("-" * 92)
+        for stage, entry in measured['stages'].items():
+            lines.append(f"{stage:<30} {entry['seconds']:>10.3f} {entry['median']:>11.3f} "
+                         f"{_memory_text(entry['peak_mb']):>9} {entry['rows']:>10,}  {entry['checksum']}")
+    return "\n".join(lines)
+
+
+def format_comparison(comparison, threshold=DEFAULT_THRESHOLD):
+    """Таблица сравнения с базовыми замерами"""
+    lines = [
+        f"\nСравнение с базовыми замерами (порог {threshold:.0%})",
+        f"{'Масштаб':<9} {'Этап':<30} {'Было, с':>9} {'Стало, с':>9} {'Изм.':>8} "
+        f"{'Пик было':>9} {'Пик стало':>9}  Статус",
+        "-" * 110,
+    ]
+    for row in comparison:
+        before = f"{row['before']:.3f}" if row['before'] is not None else "-"
+        after = f"{row['after']:.3f}" if row['after'] is not None else "-"
+        change = f"{row['change']:+.0%}" if row['change'] is not None else "-"
+        lines.append(f"{row['scale']:<9} {row['stage']:<30} {before:>9} {after:>9} {change:>8} "
+                     f"{_memory_text(row['peak_before']):>9} {_memory_text(row['peak_after']):>9}  "
+                     f"{STATUS_TEXT[row['status']]}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m модули.benchmark_suite [масштаб ...] - быстрый замер без сохранения
+    from модули.log_setup import configure_logging
+
+    configure_logging('WARNING')
+    chosen = sys.argv[1:] or ['branch']
+    print(format_results(run_suite(chosen, repeat=1, memory=False)))
@@ -0,0 +1,170 @@
+# columnar_store.py
+"""
+Колоночные копии входных файлов (Arrow/Feather)
+
+pd.read_excel - самая дорогая операция приложения: xlrd/openpyxl разбирают
+каждую ячейку в строку Python. При первом чтении книга конвертируется в
+.feather рядом с кэшем парсинга, последующие чтения отображают файл в память
+(memory_map) и занимают доли секунды.
+
+Имя копии: <имя книги>.<хэш содержимого и параметров чтения>.feather - при
+замене файла (новый месяц) старая копия удаляется. Парсеры могут получать и
+готовые .feather/.parquet файлы вместо Excel.
+
+pyarrow - необязательная зависимость: без него все читается через read_excel.
+"""
+
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from модули import run_metrics
+from модули.parse_cache import file_digest
+from модули.log_setup import get_logger
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = get_logger(__name__)
+
+COLUMNAR_DIR = os.path.join("данные", ".columnar")
+COLUMNAR_EXTENSIONS = ('.feather', '.parquet')
+
+# Версия формата копий (увеличивать при изменении способа конвертации)
+STORE_VERSION = 2
+
+
+def _excel_reader(file_path, **read_options):
+    return pd.read_excel(file_path, **read_options)
+
+
+def _copy_prefix(file_path):
+    """
+    Начало имени копий одного входного файла: имя + хэш полного пути
+
+    Одноименные книги разных месяцев (пакетный расчет) не вытесняют копии друг друга
+    """
+    location = hashlib.blake2b(os.path.abspath(file_path).encode(), digest_size=4).hexdigest()
+    return f"{os.path.basename(file_path)}.{location}."
+
+
+def _columnar_path(file_path, reader, read_options, store_dir):
+    """Путь колоночной копии: содержимое файла + способ чтения"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(file_digest(file_path).encode())
+    digest.update(f"{reader.__module__}.{reader.__name__}:{STORE_VERSION}".encode())
+    digest.update(repr(sorted(read_options.items())).encode())
+    return os.path.join(store_dir, f"{_copy_prefix(file_path)}{digest.hexdigest()}.feather")
+
+
+def _normalize_missing(df):
+    """Пустые ячейки - NaN, как после read_excel (pyarrow отдает None в object-колонках)"""
+    object_columns = df.columns[df.dtypes == object]
+    if len(object_columns):
+        df[object_columns] = df[object_columns].where(df[object_columns].notna(), np.nan)
+    return df
+
+
+def read_columnar(file_path, memory_map=True):
+    """Чтение .feather/.parquet файла"""
+    if str(file_path).lower().endswith('.parquet'):
+        df = pd.read_parquet(file_path)
+    else:
+        from pyarrow import feather
+        df = feather.read_table(file_path, memory_map=memory_map).to_pandas()
+
+    # Колонки без заголовка хранятся как '0', '1', ... - возвращаем числовые
+    if [str(c) for c in df.columns] == [str(i) for i in range(len(df.columns))]:
+        df.columns = pd.RangeIndex(len(df.columns))
+    return _normalize_missing(df)
+
+
+def write_columnar(df, path):
+    """Сохраняет DataFrame в .feather (атомарно)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    stored = df.reset_index(drop=True)
+    stored.columns = [str(c) for c in stored.columns]
+    # Имя временного файла уникально для процесса - пакетный расчет пишет параллельно
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    stored.to_feather(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _remove_stale_copies(store_dir, file_path, keep_path):
+    """Удаляет копии прежних версий того же файла"""
+    prefix = _copy_prefix(file_path)
+    for name in os.listdir(store_dir):
+        path = os.path.join(store_dir, name)
+        if name.startswith(prefix) and name.endswith('.feather') and path != keep_path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # уже удалена другим процессом
+
+
+def read_input_frame(file_path, reader=None, store_dir=COLUMNAR_DIR, **read_options):
+    """
+    Читает входной файл как DataFrame через колоночную копию
+
+    file_path: Excel или готовый .feather/.parquet
+    reader: функция reader(file_path, **read_options) -> DataFrame,
+            по умолчанию pd.read_excel (read_options - его параметры)
+    """
+    with run_metrics.span('read_input', file=os.path.basename(str(file_path))) as span:
+        df = _read_input_frame(file_path, reader, store_dir, read_options)
+        span.rows_out = len(df)
+    return df
+
+
+def _read_input_frame(file_path, reader, store_dir, read_options):
+    if str(file_path).lower().endswith(COLUMNAR_EXTENSIONS):
+        return read_columnar(file_path)
+
+    reader = reader or _excel_reader
+    if not HAS_PYARROW:
+        run_metrics.count('columnar.excel')
+        return reader(file_path, **read_options)
+
+    path = _columnar_path(file_path, reader, read_options, store_dir)
+    if os.path.exists(path):
+        try:
+            df = read_columnar(path)
+            run_metrics.count('columnar.hit')
+            return df
+        except Exception as e:
+            logger.warning("  ⚠️  Колоночная копия повреждена, читаю Excel: %s", e)
+
+    run_metrics.count('columnar.convert')
+    start = time.perf_counter()
+    df = reader(file_path, **read_options)
+    read_time = time.perf_counter() - start
+
+    try:
+        write_columnar(df, path)
+        _remove_stale_copies(store_dir, file_path, path)
+        logger.info("  🗜️  %s: Excel прочитан за %.2f с, сохранена колоночная копия",
+                    os.path.basename(file_path), read_time)
+    except Exception as e:
+        # Например, смешанные типы в колонке - работаем без копии
+        logger.warning("  ⚠️  Не удалось сохранить колоночную копию: %s", e)
+
+    return df
+
+
+def clear_columnar_store(store_dir=COLUMNAR_DIR):
+    """Удаляет все колоночные копии"""
+    if not os.path.isdir(store_dir):
+        return 0
+
+    removed = 0
+    for name in os.listdir(store_dir):
+        if name.endswith('.feather') or ('.feather.' in name and name.endswith('.tmp')):
+            os.remove(os.path.join(store_dir, name))
+            removed += 1
+    return removed
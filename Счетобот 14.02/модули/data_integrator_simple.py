@@ -1,7 +1,14 @@
+import logging
+
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from модули import run_metrics
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
 class DataIntegrator:
     @staticmethod
     def normalize_name(full_name):
@@ -9,100 +16,128 @@ class DataIntegrator:
             return ''
         return ' '.join(str(full_name).strip().split()).upper()
     
+    @staticmethod
+    def normalize_names(names):
+        """normalize_name для колонки имен (пропуски -> '')"""
+        # split/join возвращают object - приводим к строковому типу, как у имен из структуры
+        return names.fillna('').astype(str).str.split().str.join(' ').str.upper().astype(str)
+    
+    # Колонки графика -> тип (нет колонки в графике - нули)
+    SCHEDULE_COLUMNS = {
+        'Часы_всего': float,
+        'Выходные_дни': int,
+        'Отпуск_дни': int,
+        'Больничные_дни': int,
+    }
+    
     @staticmethod
     def integrate_schedule_and_staff(schedule_data, staff_data):
         if 'error' in schedule_data or not staff_data.get('success'):
-            print("❌ Нет данных для интеграции")
+            logger.error("❌ Нет данных для интеграции")
             return None
         
+        # 1. ГРАФИК: ПОСЛЕДНЯЯ СТРОКА НА НОРМАЛИЗОВАННОЕ ИМЯ
         schedule_df = schedule_data.get('employees_df', pd.DataFrame())
-        schedule_dict = {}
-        
-        for _, row in schedule_df.iterrows():
-            fio = row.get('ФИО', '')
-            if fio:
-                fio_norm = DataIntegrator.normalize_name(fio)
-                schedule_dict[fio_norm] = {
-                    'ФИО_оригинал': fio,
-                    'Часы_всего': float(row.get('Часы_всего', 0)),
-                    'Выходные_дни': int(row.get('Выходные_дни', 0)),
-                    'Отпуск_дни': int(row.get('Отпуск_дни', 0)),
-                    'Больничные_дни': int(row.get('Больничные_дни', 0))
-                }
-        
-        print(f"📅 Данных из графика: {len(schedule_dict)} сотрудников")
-        
-        staff_employees = staff_data.get('employees', [])
-        staff_dict = {}
-        
-        for emp in staff_employees:
-            fio_norm = emp.get('ФИО_норм', '')
-            dept_name = emp.get('Отдел', '')
-            
-            if not dept_name or dept_name == 'Не указан':
-                continue
-                
-            if fio_norm:
-                staff_dict[fio_norm] = {
-                    'ФИО_оригинал': emp.get('ФИО', ''),
-                    'Филиал': emp.get('Филиал', 'Не указан'),
-                    'Отдел': dept_name,
-                    'Директор_филиала': emp.get('Директор_филиала', 'Не указан')
-                }
-        
-        print(f"👥 Данных о сотрудниках (с отделом): {len(staff_dict)} сотрудников")
-        
-        integrated_records = []
-        all_employees = set(list(schedule_dict.keys()) + list(staff_dict.keys()))
-        
-        for fio_norm in all_employees:
-            schedule_info = schedule_dict.get(fio_norm, {})
-            staff_info = staff_dict.get(fio_norm, {})
-            
-            if fio_norm not in staff_dict:
-                continue
-                
-            fio_original = schedule_info.get('ФИО_оригинал') or staff_info.get('ФИО_оригинал') or fio_norm
-            
-            record = {
-                'ФИО': fio_original,
-                'ФИО_норм': fio_norm,
-                'Часы_всего': schedule_info.get('Часы_всего', 0.0),
-                'Выходные_дни': schedule_info.get('Выходные_дни', 0),
-                'Отпуск_дни': schedule_info.get('Отпуск_дни', 0),
-                'Больничные_дни': schedule_info.get('Больничные_дни', 0),
-                'Источник_график': 'Да' if fio_norm in schedule_dict else 'Нет',
-                'Филиал': staff_info.get('Филиал', 'Не указан'),
-                'Отдел': staff_info.get('Отдел', 'Не указан'),
-                'Директор_филиала': staff_info.get('Директор_филиала', 'Не указан'),
-                'Источник_сотрудники': 'Да',
-                'Данные_продаж': None,
-                'Выручка': 0.0,
-                'Прибыль': 0.0,
-                'Бонусные_продажи': 0.0,
-                'Неликвидные_продажи': 0.0
-            }
-            
-            integrated_records.append(record)
-        
-        if not integrated_records:
-            print("❌ Нет данных для интеграции после фильтрации")
+        schedule = pd.DataFrame({'ФИО_график': schedule_df.get('ФИО', pd.Series(dtype=object))})
+        for column, dtype in DataIntegrator.SCHEDULE_COLUMNS.items():
+            schedule[column] = schedule_df[column].astype(dtype) if column in schedule_df else dtype(0)
+        schedule['ФИО_норм'] = DataIntegrator.normalize_names(schedule['ФИО_график'])
+        schedule = schedule[schedule['ФИО_норм'] != ''].drop_duplicates('ФИО_норм', keep='last')
+        schedule['Источник_график'] = 'Да'
+        
+        logger.info("📅 Данных из графика: %s сотрудников", len(schedule))
+        
+        # 2. СОТРУДНИКИ С ОТДЕЛОМ: ПОСЛЕДНЯЯ ЗАПИСЬ НА ИМЯ
+        staff = pd.DataFrame(staff_data.get('employees', []))
+        for column, default in (('ФИО', ''), ('ФИО_норм', ''), ('Отдел', ''),
+                                ('Филиал', 'Не указан'), ('Директор_филиала', 'Не указан')):
+            if column not in staff:
+                staff[column] = default
+        has_department = staff['Отдел'].notna() & ~staff['Отдел'].isin(['', 'Не указан'])
+        has_name = staff['ФИО_норм'].notna() & (staff['ФИО_норм'] != '')
+        staff = staff[has_department & has_name].drop_duplicates('ФИО_норм', keep='last')
+        
+        logger.info("👥 Данных о сотрудниках (с отделом): %s сотрудников", len(staff))
+        
+        # 3. ЛЕВОЕ СОЕДИНЕНИЕ: В ТАБЛИЦУ ПОПАДАЮТ ТОЛЬКО СОТРУДНИКИ ИЗ СТРУКТУРЫ
+        merged = staff[['ФИО', 'ФИО_норм', 'Филиал', 'Отдел', 'Директор_филиала']].merge(
+            schedule, on='ФИО_норм', how='left')
+        
+        # Имена графика, не найденные среди сотрудников с отделом, в таблицу не попадают
+        not_in_staff = ~schedule['ФИО_норм'].isin(staff['ФИО_норм'])
+        unmatched = int(not_in_staff.sum())
+        run_metrics.count('integrate.schedule_unmatched', unmatched)
+        if unmatched:
+            logger.warning("⚠️  Из графика без сотрудника в структуре (с отделом): %s", unmatched)
+            if logger.isEnabledFor(logging.DEBUG):
+                for fio in schedule.loc[not_in_staff, 'ФИО_график']:
+                    logger.debug("   • %s", fio)
+        
+        has_schedule = merged['Источник_график'].notna()
+        
+        # ФИО: из графика, иначе из структуры, иначе нормализованное
+        fio = merged['ФИО_график'].fillna('')
+        fio = fio.mask(fio == '', merged['ФИО'].fillna(''))
+        fio = fio.mask(fio == '', merged['ФИО_норм']).astype(str)
+        
+        integrated_df = pd.DataFrame({
+            'ФИО': fio,
+            'ФИО_норм': merged['ФИО_норм'],
+            **{column: merged[column].where(has_schedule, 0).astype(dtype)
+               for column, dtype in DataIntegrator.SCHEDULE_COLUMNS.items()},
+            'Источник_график': merged['Источник_график'].fillna('Нет'),
+            'Филиал': merged['Филиал'],
+            'Отдел': merged['Отдел'],
+            'Директор_филиала': merged['Директор_филиала'],
+            'Источник_сотрудники': 'Да',
+            # None, а не NaN: пустая ячейка 'нет продаж', как в прежней таблице
+            'Данные_продаж': pd.Series([None] * len(merged), index=merged.index, dtype=object),
+            'Выручка': 0.0,
+            'Прибыль': 0.0,
+            'Бонусные_продажи': 0.0,
+            'Неликвидные_продажи': 0.0
+        })
+        
+        if integrated_df.empty:
+            logger.error("❌ Нет данных для интеграции после фильтрации")
             return None
             
-        integrated_df = pd.DataFrame(integrated_records)
         integrated_df = integrated_df.sort_values(['Филиал', 'Отдел', 'ФИО'])
         integrated_df = integrated_df[integrated_df['Отдел'] != 'Не указан']
         
-        print(f"✅ Итоговый размер: {len(integrated_df)} сотрудников с отделами")
+        logger.info("✅ Итоговый размер: %s сотрудников с отделами", len(integrated_df))
         
         no_schedule = integrated_df[integrated_df['Источник_график'] == 'Нет']
         if not no_schedule.empty:
-            print(f"⚠️  Сотрудники без графика ({len(no_schedule)}):")
-            for _, row in no_schedule.iterrows():
-                print(f"   • {row['ФИО']} - {row['Отдел']}")
+            logger.warning("⚠️  Сотрудники без графика (%s):", len(no_schedule))
+            for fio, dept in zip(no_schedule['ФИО'], no_schedule['Отдел']):
+                logger.warning("   • %s - %s", fio, dept)
 
         return integrated_df
     
+    # Итоги продавца (parse_sales_analysis) -> колонка интегрированной таблицы
+    SALES_TOTALS = {
+        'Выручка': 'total_revenue',
+        'Прибыль': 'total_profit',
+        'Бонусные_продажи': 'total_bonus_revenue',
+        'Неликвидные_продажи': 'total_non_liquid_revenue',
+    }
+    
+    @staticmethod
+    def _match_by_name(names, mapping):
+        """
+        Поиск записей mapping (нормализованное имя -> данные) для колонки имен
+        
+        Возвращает (codes, values): codes[i] - номер записи для строки i или -1,
+        values - записи массивом object с None в конце, так что values[codes]
+        дает None для строк без записи. Хэш-поиск по индексу ключей - время
+        растет линейно с числом строк и записей
+        """
+        values = np.empty(len(mapping) + 1, dtype=object)
+        values[:-1] = list(mapping.values())
+        codes = pd.Index(list(mapping), dtype=object).get_indexer(names)
+        return codes, values
+    
     @staticmethod
     def add_sales_data(integrated_df, sales_data, manager=None):
         if integrated_df.empty or not sales_data:
@@ -126,28 +161,65 @@ class DataIntegrator:
             seller_norm = DataIntegrator.normalize_name(seller_name)
             normalized_sales[seller_norm] = sales_info
         
-        # 4. ЗАПОЛНЯЕМ ДАННЫМИ (ВЕКТОРИЗОВАННО)
-        for norm_name, sales_info in normalized_sales.items():
-            mask = df['ФИО_норм'] == norm_name
-            
-            if mask.any():
-                df.loc[mask, 'Данные_продаж'] = df.loc[mask, 'ФИО_норм'].apply(lambda x: sales_info)
-                df.loc[mask, 'Выручка'] = float(sales_info.get('total_revenue', 0))
-                df.loc[mask, 'Прибыль'] = float(sales_info.get('total_profit', 0))
-                df.loc[mask, 'Бонусные_продажи'] = float(sales_info.get('total_bonus_revenue', 0))
-                df.loc[mask, 'Неликвидные_продажи'] = float(sales_info.get('total_non_liquid_revenue', 0))
-        
-        # 5. ЗАПОЛНЯЕМ ДАННЫЕ ПО ЗАКАЗНЫМ ТОВАРАМ
+        # 4. ЗАПОЛНЯЕМ ДАННЫМИ - ОДИН ПОИСК ПО ИМЕНИ ВМЕСТО МАСКИ НА КАЖДОГО ПРОДАВЦА
+        codes, sales_infos = DataIntegrator._match_by_name(df['ФИО_норм'], normalized_sales)
+        df['Данные_продаж'] = sales_infos[codes]
+        for column, key in DataIntegrator.SALES_TOTALS.items():
+            # Итог на продавца (а не на строку); последний элемент - 0.0 для строк без продаж
+            totals = np.array([float(info.get(key, 0)) for info in sales_infos[:-1]] + [0.0])
+            df[column] = totals[codes]
+        
+        # 5. ЗАПОЛНЯЕМ ДАННЫЕ ПО ЗАКАЗНЫМ ТОВАРАМ (ключи zakaz_data уже нормализованы)
         if manager and hasattr(manager, 'zakaz_data') and manager.zakaz_data and manager.zakaz_data.get('success'):
             zakaz_dict = manager.zakaz_data.get('data', {})
-            for norm_name, zakaz_info in zakaz_dict.items():
-                mask = df['ФИО_норм'] == norm_name
-                if mask.any():
-                    df.loc[mask, 'Заказные_данные'] = df.loc[mask, 'ФИО_норм'].apply(lambda x: zakaz_info)
+            codes, zakaz_infos = DataIntegrator._match_by_name(df['ФИО_норм'], zakaz_dict)
+            df['Заказные_данные'] = zakaz_infos[codes]
         
-        print(f"💰 Добавлены данные о продажах для {(df['Выручка'] > 0).sum()} сотрудников")
+        logger.info("💰 Добавлены данные о продажах для %s сотрудников", (df['Выручка'] > 0).sum())
         return df
     
+    # Колонка -> (ключ настроек отдела УРС, тип, значение для отдела без настроек)
+    # Ключ None - оклад из ячейки I2, общий для отделов с настройками.
+    # Тип None - как определит pandas (строки); object - значения как есть (bool, None)
+    URS_SETTINGS = {
+        'Базовая_часть': ('базовая_часть', 'float64', 0.0),
+        'Оклад': (None, 'float64', 0.0),
+        'Минималка_отдела': ('минималка', 'float64', 0.0),
+        'Средняя_ЗП': ('средняя_зп', 'float64', 0.0),
+        'Неликвиды_в_котле': ('неликвиды_в_котле', 'object', False),
+        'Неликвид_процент': ('неликвид_процент', 'float64', 0.0),
+        'Коэф_обычных': ('коэф_обычных', 'float64', 0.0),
+        'Коэф_бонусных': ('коэф_бонусных', 'float64', 0.0),
+        'Коэф_неликвидов': ('коэф_неликвидов', 'float64', 0.0),
+        'Коэф_оптовых': ('коэф_оптовых', 'float64', 0.0),
+        'Гарантия_1': ('гарантия_1', 'float64', 0.0),
+        'Гарантия_2': ('гарантия_2', 'float64', 0.0),
+        'Гарантия_3': ('гарантия_3', 'float64', 0.0),
+        'Гарантия_4': ('гарантия_4', 'float64', 0.0),
+        'Гарантия_5': ('гарантия_5', 'float64', 0.0),
+        'Тип_нормы': ('тип_нормы', None, ''),
+        'Норма_часов_из_УРС': ('норма_часов', 'object', None),
+    }
+    
+    @staticmethod
+    def urs_settings_table(departments_settings, оклад_I2=0):
+        """
+        Настройки отделов УРС таблицей: строка на отдел + строка значений
+        по умолчанию в конце
+        
+        Возвращает (settings_df, dept_index): dept_index.get_indexer(отделы)
+        дает номер строки или -1 - последнюю строку, т.е. значения по умолчанию
+        """
+        departments = [dept for dept, settings in departments_settings.items() if settings]
+        columns = {}
+        for column, (key, dtype, default) in DataIntegrator.URS_SETTINGS.items():
+            if key is None:
+                values = [float(оклад_I2)] * len(departments)
+            else:
+                values = [departments_settings[dept].get(key, default) for dept in departments]
+            columns[column] = pd.Series(values + [default], dtype=dtype)
+        return pd.DataFrame(columns), pd.Index(departments, dtype=object)
+    
     @staticmethod
     def add_urs_settings(integrated_df, urs_data):
         if integrated_df.empty or not urs_data.get('success'):
@@ -159,98 +231,78 @@ class DataIntegrator:
         departments_settings = urs_data.get('departments', {})
         оклад_I2 = urs_data.get('оклад_I2', 0)
         
-        print(f"🔍 Отделов в УРС: {len(departments_settings)}")
-        print(f"💰 Оклад из ячейки I2: {оклад_I2:,.0f} руб.")
+        logger.info("🔍 Отделов в УРС: %s", len(departments_settings))
+        logger.info("💰 Оклад из ячейки I2: %.0f руб.", оклад_I2)
         
-        for idx, row in integrated_df.iterrows():
-            dept_name = row['Отдел']
-            dept_settings = departments_settings.get(dept_name)
-            
-            if dept_settings:
-                # БАЗОВЫЕ НАСТРОЙКИ
-                integrated_df.loc[idx, 'Базовая_часть'] = float(dept_settings.get('базовая_часть', 0))
-                integrated_df.loc[idx, 'Оклад'] = float(оклад_I2)
-                integrated_df.loc[idx, 'Минималка_отдела'] = float(dept_settings.get('минималка', 0))
-                integrated_df.loc[idx, 'Средняя_ЗП'] = float(dept_settings.get('средняя_зп', 0))
-                integrated_df.loc[idx, 'Неликвиды_в_котле'] = dept_settings.get('неликвиды_в_котле', False)
-                integrated_df.loc[idx, 'Неликвид_процент'] = float(dept_settings.get('неликвид_процент', 0.0))
-                
-                # КОЭФФИЦИЕНТЫ
-                integrated_df.loc[idx, 'Коэф_обычных'] = float(dept_settings.get('коэф_обычных', 0.0))
-                integrated_df.loc[idx, 'Коэф_бонусных'] = float(dept_settings.get('коэф_бонусных', 0.0))
-                integrated_df.loc[idx, 'Коэф_неликвидов'] = float(dept_settings.get('коэф_неликвидов', 0.0))
-                integrated_df.loc[idx, 'Коэф_оптовых'] = float(dept_settings.get('коэф_оптовых', 0.0))
-                
-                # ГАРАНТИИ (1-5 места)
-                integrated_df.loc[idx, 'Гарантия_1'] = float(dept_settings.get('гарантия_1', 0.0))
-                integrated_df.loc[idx, 'Гарантия_2'] = float(dept_settings.get('гарантия_2', 0.0))
-                integrated_df.loc[idx, 'Гарантия_3'] = float(dept_settings.get('гарантия_3', 0.0))
-                integrated_df.loc[idx, 'Гарантия_4'] = float(dept_settings.get('гарантия_4', 0.0))
-                integrated_df.loc[idx, 'Гарантия_5'] = float(dept_settings.get('гарантия_5', 0.0))
-                
-                # НОРМЫ ЧАСОВ
-                integrated_df.loc[idx, 'Тип_нормы'] = dept_settings.get('тип_нормы', '')
-                integrated_df.loc[idx, 'Норма_часов_из_УРС'] = dept_settings.get('норма_часов', None)
-            else:
-                # НЕТ НАСТРОЕК - ЗАПОЛНЯЕМ НУЛЯМИ
-                integrated_df.loc[idx, 'Базовая_часть'] = 0.0
-                integrated_df.loc[idx, 'Оклад'] = 0.0
-                integrated_df.loc[idx, 'Минималка_отдела'] = 0.0
-                integrated_df.loc[idx, 'Средняя_ЗП'] = 0.0
-                integrated_df.loc[idx, 'Неликвиды_в_котле'] = False
-                integrated_df.loc[idx, 'Неликвид_процент'] = 0.0
-                integrated_df.loc[idx, 'Коэф_обычных'] = 0.0
-                integrated_df.loc[idx, 'Коэф_бонусных'] = 0.0
-                integrated_df.loc[idx, 'Коэф_неликвидов'] = 0.0
-                integrated_df.loc[idx, 'Коэф_оптовых'] = 0.0
-                integrated_df.loc[idx, 'Гарантия_1'] = 0.0
-                integrated_df.loc[idx, 'Гарантия_2'] = 0.0
-                integrated_df.loc[idx, 'Гарантия_3'] = 0.0
-                integrated_df.loc[idx, 'Гарантия_4'] = 0.0
-                integrated_df.loc[idx, 'Гарантия_5'] = 0.0
-                integrated_df.loc[idx, 'Тип_нормы'] = ''
-                integrated_df.loc[idx, 'Норма_часов_из_УРС'] = None
+        # ТАБЛИЦА НАСТРОЕК ОТДЕЛОВ И ЛЕВОЕ СОЕДИНЕНИЕ ПО ОТДЕЛУ
+        # Последняя строка таблицы - нули для отделов без настроек (codes == -1)
+        settings_df, dept_index = DataIntegrator.urs_settings_table(departments_settings, оклад_I2)
+        codes = dept_index.get_indexer(integrated_df['Отдел'])
+        for column in settings_df.columns:
+            values = settings_df[column].iloc[codes]
+            values.index = integrated_df.index
+            integrated_df[column] = values
         
         return integrated_df
     
     @staticmethod
-    def create_integrated_dataframe(manager, office_norm_hours=168):
-        print("\n" + "="*60)
-        print("ИНТЕГРАЦИЯ ДАННЫХ")
-        print("="*60)
-        
-        integrated_df = DataIntegrator.integrate_schedule_and_staff(
-            manager.schedule_data, 
-            manager.staff_data
-        )
-        
-        if integrated_df is None:
-            return None
-        
-        float_columns = ['Выручка', 'Прибыль', 'Бонусные_продажи', 'Неликвидные_продажи', 
-                 'Базовая_часть', 'Оклад', 'Минималка_отдела', 'Средняя_ЗП', 'Часы_всего',
-                 'Коэф_обычных', 'Коэф_бонусных', 'Коэф_неликвидов', 'Коэф_оптовых',
-                 'Гарантия_1', 'Гарантия_2', 'Гарантия_3', 'Гарантия_4', 'Гарантия_5']
-        
-        for col in float_columns:
-            if col not in integrated_df.columns:
-                integrated_df[col] = 0.0
-            else:
-                integrated_df[col] = integrated_df[col].astype(float)
-        
-        if manager.sales_data:
-            integrated_df = DataIntegrator.add_sales_data(integrated_df, manager.sales_data, manager)
-        
-        if manager.urs_data and manager.urs_data.get('success'):
-            integrated_df = DataIntegrator.add_urs_settings(integrated_df, manager.urs_data)
-                
-        integrated_df = DataIntegrator.add_calculated_fields(integrated_df, manager, office_norm_hours)
-        
-        print(f"\n✅ Интеграция завершена!")
-        print(f"📊 Итоговая таблица: {len(integrated_df)} записей")
-        print(f"   С графиком: {(integrated_df['Источник_график'] == 'Да').sum()}")
-        print(f"   Со структурой: {(integrated_df['Источник_сотрудники'] == 'Да').sum()}")
-        print(f"   С продажами: {len([x for x in integrated_df['Данные_продаж'] if x is not None])}")
+    def create_integrated_dataframe(manager, office_norm_hours=168, progress=None):
+        # progress(сообщение, rows=) - после каждого шага (фоновый этап окна, точка отмены)
+        # Шаги - интервалы метрик integrate.* (run_metrics)
+        logger.info("\n%s\nИНТЕГРАЦИЯ ДАННЫХ\n%s", "="*60, "="*60)
+        
+        with run_metrics.span('integrate') as integrate_span:
+            with run_metrics.span('integrate.schedule_staff') as step:
+                integrated_df = DataIntegrator.integrate_schedule_and_staff(
+                    manager.schedule_data, 
+                    manager.staff_data
+                )
+                if integrated_df is not None:
+                    step.rows_out = len(integrated_df)
+            
+            if integrated_df is None:
+                return None
+            integrate_span.rows_in = len(integrated_df)
+            if progress:
+                progress("График и сотрудники объединены", rows=len(integrated_df))
+            
+            float_columns = ['Выручка', 'Прибыль', 'Бонусные_продажи', 'Неликвидные_продажи', 
+                     'Базовая_часть', 'Оклад', 'Минималка_отдела', 'Средняя_ЗП', 'Часы_всего',
+                     'Коэф_обычных', 'Коэф_бонусных', 'Коэф_неликвидов', 'Коэф_оптовых',
+                     'Гарантия_1', 'Гарантия_2', 'Гарантия_3', 'Гарантия_4', 'Гарантия_5']
+            
+            for col in float_columns:
+                if col not in integrated_df.columns:
+                    integrated_df[col] = 0.0
+                else:
+                    integrated_df[col] = integrated_df[col].astype(float)
+            
+            if manager.sales_data:
+                with run_metrics.span('integrate.sales', rows_in=len(integrated_df)) as step:
+                    integrated_df = DataIntegrator.add_sales_data(integrated_df, manager.sales_data, manager)
+                    step.rows_out = len(integrated_df)
+                if progress:
+                    progress("Добавлены продажи", rows=len(integrated_df))
+            
+            if manager.urs_data and manager.urs_data.get('success'):
+                with run_metrics.span('integrate.urs', rows_in=len(integrated_df)) as step:
+                    integrated_df = DataIntegrator.add_urs_settings(integrated_df, manager.urs_data)
+                    step.rows_out = len(integrated_df)
+                if progress:
+                    progress("Добавлены настройки УРС", rows=len(integrated_df))
+                    
+            with run_metrics.span('integrate.calculated_fields', rows_in=len(integrated_df)) as step:
+                integrated_df = DataIntegrator.add_calculated_fields(integrated_df, manager, office_norm_hours)
+                step.rows_out = len(integrated_df)
+            integrate_span.rows_out = len(integrated_df)
+            if progress:
+                progress("Рассчитаны нормы часов", rows=len(integrated_df))
+        
+        logger.info("\n✅ Интеграция завершена!")
+        logger.info("📊 Итоговая таблица: %s записей", len(integrated_df))
+        logger.info("   С графиком: %s", (integrated_df['Источник_график'] == 'Да').sum())
+        logger.info("   Со структурой: %s", (integrated_df['Источник_сотрудники'] == 'Да').sum())
+        logger.info("   С продажами: %s", len([x for x in integrated_df['Данные_продаж'] if x is not None]))
         
         return integrated_df
 
@@ -303,10 +355,10 @@ class DataIntegrator:
         shop_count = mask_shop.sum()
         office_count = mask_office.sum()
         
-        print(f"📊 НОРМЫ ЧАСОВ УСТАНОВЛЕНЫ:")
-        print(f"  ✅ Магазин: {shop_norm_hours} часов ({shop_count} сотрудников)")
-        print(f"  ✅ Офис: {office_norm_hours} часов ({office_count} сотрудников)")
-        print(f"  ✅ Всего: {len(df_result)} сотрудников, 0 ошибок")
+        logger.info("📊 НОРМЫ ЧАСОВ УСТАНОВЛЕНЫ:")
+        logger.info("  ✅ Магазин: %s часов (%s сотрудников)", shop_norm_hours, shop_count)
+        logger.info("  ✅ Офис: %s часов (%s сотрудников)", office_norm_hours, office_count)
+        logger.info("  ✅ Всего: %s сотрудников, 0 ошибок", len(df_result))
         
         return df_result
 
@@ -0,0 +1,128 @@
+# log_setup.py
+"""
+Журнал приложения: уровни, ленивое форматирование, пакетный вывод в окно
+
+Модули получают логгер через get_logger(__name__) и пишут
+    logger.info("Отдел: %s", dept)
+    logger.debug("Доля: %.1f%%", share)
+Строка собирается только если уровень включен, поэтому отладочные
+сообщения в циклах по сотрудникам при обычной работе почти ничего не стоят.
+Отладочные блоки из нескольких строк дополнительно оборачиваются в
+    if logger.isEnabledFor(logging.DEBUG):
+
+Уровень: переменная окружения SCHETOBOT_LOG_LEVEL (DEBUG, INFO, WARNING)
+или configure_logging('DEBUG'). Уровень записывается и в окружение, чтобы
+его унаследовали процессы пула загрузки.
+
+TextWidgetHandler собирает записи в очередь (из любого потока) и раз в
+FLUSH_MS переносит накопленное в текстовое поле одним вызовом insert.
+Модуль не импортирует tkinter - им пользуется и консольный cli.py.
+"""
+
+import logging
+import os
+import sys
+from collections import deque
+from datetime import datetime
+
+ROOT_LOGGER = "счетобот"
+LEVEL_ENV = "SCHETOBOT_LOG_LEVEL"
+DEFAULT_LEVEL = "INFO"
+FLUSH_MS = 100
+
+
+def get_logger(name):
+    """
+    Логгер модуля: 'счетобот.<имя модуля>'
+
+    Имя берется без пакета, чтобы модуль, запущенный как скрипт или
+    импортированный как 'модули.x', писал в один и тот же логгер
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{name.rsplit('.', 1)[-1]}")
+
+
+def configure_logging(level=None):
+    """
+    Консольный вывод журнала (повторный вызов только меняет уровень)
+
+    level: имя или число; по умолчанию - из SCHETOBOT_LOG_LEVEL или INFO
+    """
+    level = level or os.environ.get(LEVEL_ENV) or DEFAULT_LEVEL
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+    os.environ[LEVEL_ENV] = logging.getLevelName(level)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level)
+    if not any(getattr(handler, '_schetobot_console', False) for handler in root.handlers):
+        # Сообщения уже содержат значки и отступы - печатаем как есть, как прежний print
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter("%(message)s"))
+        console._schetobot_console = True
+        root.addHandler(console)
+    root.propagate = False
+    return root
+
+
+class TextWidgetHandler(logging.Handler):
+    """
+    Пакетный вывод записей в текстовое поле Tk
+
+    emit только кладет запись в очередь (можно из фонового потока).
+    Раз в flush_ms главный поток забирает все накопленное и вставляет одним
+    insert с тегами цвета - вместо insert + update на каждую строку.
+    color_for(запись) -> имя тега; цвет можно передать явно: extra={'color': ...}
+    """
+
+    def __init__(self, widget, color_for=None, flush_ms=FLUSH_MS, on_flush=None):
+        super().__init__()
+        self.widget = widget
+        self.color_for = color_for
+        self.flush_ms = flush_ms
+        self.on_flush = on_flush
+        self.pending = deque()
+        self._job = None
+
+    def emit(self, record):
+        try:
+            color = getattr(record, 'color', None)
+            if color is None and self.color_for:
+                color = self.color_for(record)
+            self.pending.append((record.created, self.format(record), color or "black"))
+        except Exception:
+            self.handleError(record)
+
+    def start(self):
+        """Запускает периодический перенос очереди в поле (из главного потока)"""
+        if self._job is None:
+            self._job = self.widget.after(self.flush_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        self.flush()
+        self._job = self.widget.after(self.flush_ms, self._tick)
+
+    def discard(self):
+        """Отбрасывает еще не выведенные записи (перед очисткой поля)"""
+        self.pending.clear()
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunks = []
+        last_message = None
+        while self.pending:
+            created, message, color = self.pending.popleft()
+            timestamp = datetime.fromtimestamp(created).strftime("%H:%M:%S")
+            chunks.extend((f"[{timestamp}] ", "gray", message + "\n", color))
+            last_message = message
+        self.widget.insert("end", *chunks)
+        self.widget.see("end")
+        if self.on_flush:
+            self.on_flush(last_message)
@@ -3,11 +3,17 @@
 Glass-morphism, градиенты, все секции как в примере
 """
 
+import logging
 import pandas as pd
 import json
 import os
 from datetime import datetime
 
+from модули import run_metrics
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
 class ManagerDashboardPro:
     """
     Профессиональный дашборд с точным дизайном из ТЗ
@@ -42,21 +48,22 @@ class ManagerDashboardPro:
             df_calc['Филиал'] = df_calc['Филиал'].astype(str).str.replace(r'\s+', '', regex=True)
             df_calc['Филиал'] = df_calc['Филиал'].str.upper()
         
-        print(f"🔍 [Дашборд Pro] Загружено {len(df_calc)} записей")
+        logger.info("🔍 [Дашборд Pro] Загружено %s записей", len(df_calc))
         
         dashboard_data = []
 
 
         # Проверка наличия колонки Дол_прем
-        print(f"\n=== ПРОВЕРКА В load_from_calculations ===")
-        print(f"Колонки в df_calc: {list(df_calc.columns)}")
-        print(f"Есть колонка 'Дол_прем': {'Дол_прем' in df_calc.columns}")
+        logger.debug("\n=== ПРОВЕРКА В load_from_calculations ===")
+        logger.debug("Колонки в df_calc: %s", list(df_calc.columns))
+        logger.debug("Есть колонка 'Дол_прем': %s", 'Дол_прем' in df_calc.columns)
         if 'Дол_прем' in df_calc.columns:
-            print(f"Примеры значений Дол_прем:")
-            print(df_calc[['ФИО', 'Отдел', 'Дол_прем']].head(5))
+            logger.debug("Примеры значений Дол_прем:")
+            logger.debug("%s", df_calc[['ФИО', 'Отдел', 'Дол_прем']].head(5))
         
 
         
+        debug = logger.isEnabledFor(logging.DEBUG)
         for idx, row in df_calc.iterrows():
             # Базовые данные
             филиал = str(row.get('Филиал', '')).replace(' ', '').replace('БД', 'bd').lower()
@@ -145,11 +152,12 @@ class ManagerDashboardPro:
             премия_опт = row.get('Оптовая_прибыль', 0) * (коэф_опт / 100)
             премия_прочая = row.get('Розн_прочая_прибыль', 0) * (коэф_опт / 100)
 
-            # Отладка
-            print(f"DEBUG: ФИО={фио[:20]}, Дол.прем={дол_прем:.0f}")
-            print(f"       Обычные: {доля_обычн:.1%} × {дол_прем:.0f} = {обычные:.0f}")
-            print(f"       Бонусные: {доля_бонус:.1%} × {дол_прем:.0f} = {бонусные:.0f}")
-            print(f"       Неликвиды: {доля_нелик:.1%} × {дол_прем:.0f} = {неликвид:.0f}")         
+            # Отладка (только при уровне DEBUG)
+            if debug:
+                logger.debug("DEBUG: ФИО=%s, Дол.прем=%.0f", фио[:20], дол_прем)
+                logger.debug("       Обычные: %.1f%% × %.0f = %.0f", доля_обычн * 100, дол_прем, обычные)
+                logger.debug("       Бонусные: %.1f%% × %.0f = %.0f", доля_бонус * 100, дол_прем, бонусные)
+                logger.debug("       Неликвиды: %.1f%% × %.0f = %.0f", доля_нелик * 100, дол_прем, неликвид)
             # Схема и гарантии
             схема = row.get('Зарплата_с_минималкой', 0)
             гарантии = row.get('Применена_гарантия', 0)
@@ -224,91 +232,101 @@ class ManagerDashboardPro:
             dashboard_data.append(record)
         
         self.df = pd.DataFrame(dashboard_data)
-        print(f"✅ [Дашборд Pro] Создано {len(self.df)} записей")
-        print("\n=== ПРОВЕРКА ПЕРЕДАЧИ dol_prem ===")
-        print(f"Всего записей: {len(self.df)}")
+        logger.info("✅ [Дашборд Pro] Создано %s записей", len(self.df))
+        logger.debug("\n=== ПРОВЕРКА ПЕРЕДАЧИ dol_prem ===")
+        logger.debug("Всего записей: %s", len(self.df))
         if not self.df.empty:
-            print(f"Колонки: {list(self.df.columns)}")
-            print(f"Первые 3 записи dol_prem:")
+            logger.debug("Колонки: %s", list(self.df.columns))
+            logger.debug("Первые 3 записи dol_prem:")
             for i, row in self.df.head(3).iterrows():
-                print(f"  {row['fio']}: dol_prem={row['dol_prem']} (тип: {type(row['dol_prem'])})")
-        print("\n=== ПРОВЕРКА ЗАКАЗНЫХ ТОВАРОВ В self.df ===")
+                logger.debug("  %s: dol_prem=%s (тип: %s)",
+                             row['fio'], row['dol_prem'], type(row['dol_prem']))
+        logger.debug("\n=== ПРОВЕРКА ЗАКАЗНЫХ ТОВАРОВ В self.df ===")
         if not self.df.empty:
-            print(f"Колонка 'заказные_колво' в DataFrame: {'заказные_колво' in self.df.columns}")
+            logger.debug("Колонка 'заказные_колво' в DataFrame: %s", 'заказные_колво' in self.df.columns)
             if 'заказные_колво' in self.df.columns:
-                print(f"Первые 3 значения:")
+                logger.debug("Первые 3 значения:")
                 for i, row in self.df.head(3).iterrows():
-                    print(f"  {row['fio']}: заказные_колво={row.get('заказные_колво', 'НЕТ')}")
+                    logger.debug("  %s: заказные_колво=%s", row['fio'], row.get('заказные_колво', 'НЕТ'))
         return self.df
     
     def generate(self, output_file=None):
         """
         Генерирует HTML дашборд с ТОЧНЫМ дизайном из примера
+
+        Интервалы метрик: dashboard.generate (строк на входе и в дашборде),
+        внутри - dashboard.load и dashboard.html
         """
-        if self.df is None:
-            self.load_from_calculations()
+        with run_metrics.span('dashboard.generate') as span:
+            if self.df is None:
+                with run_metrics.span('dashboard.load'):
+                    self.load_from_calculations()
+            span.rows_in = len(self.df)
         
-        if output_file is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-            period = self.dm.report_period.replace(" ", "_") if hasattr(self.dm, 'report_period') else "Декабрь_2025"
-            output_file = f"дашборд_про_{period}_{timestamp}.html"
+            if output_file is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+                period = self.dm.report_period.replace(" ", "_") if hasattr(self.dm, 'report_period') else "Декабрь_2025"
+                output_file = f"дашборд_про_{period}_{timestamp}.html"
         
-        filepath = os.path.join(self.reports_dir, output_file)
-        print(f"🔍 [Дашборд] Генерация в файл: {filepath}")
+            filepath = os.path.join(self.reports_dir, output_file)
+            logger.info("🔍 [Дашборд] Генерация в файл: %s", filepath)
         
-        # Подготавливаем данные для JS
-        data_by_branch = {
-            'bd1': [],
-            'bd3': [],
-            'bd4': []
-        }
+            # Подготавливаем данные для JS
+            data_by_branch = {
+                'bd1': [],
+                'bd3': [],
+                'bd4': []
+            }
         
-        # Распределяем по филиалам
-        for _, row in self.df.iterrows():
-            branch = row.get('branch', 'bd1')
+            # Распределяем по филиалам
+            for _, row in self.df.iterrows():
+                branch = row.get('branch', 'bd1')
             
-            if branch in data_by_branch:
-                data_by_branch[branch].append({
-                    'fio': row['fio'],
-                    'dept': row['dept'],
-                    'vacation': row['vacation'],
-                    'weekend': row['weekend'],
-                    'sick': row['sick'],
-                    'worked': row['worked'],
-                    'norm': row['norm'],
-                    'rating': row['rating'],
-                    'dol_prem': row.get('dol_prem', 0),
-                    'regular': row['regular'],
-                    'bonus': row['bonus'],
-                    'nonliquid': row['nonliquid'],
-                    'premWholesale': row['premWholesale'],
-                    'premOther': row['premOther'],
-                    'scheme': row['scheme'],
-                    'guarantee': row['guarantee'],
-                    'diff': row['diff'],
-                    'total': row['total'],
-                    'розница_колво': row['розница_колво'],
-                    'розница_бонус_колво': row['розница_бонус_колво'],
-                    'розница_неликвид_колво': row['розница_неликвид_колво'],
-                    'опт_колво': row['опт_колво'],
-                    'прочая_колво': row['прочая_колво'],
-                    'розница_общая_колво': row['розница_общая_колво'],
-                    'обычные_колво': row['обычные_колво'],
-                    'заказные_колво': row.get('заказные_колво', 0),
-                    'незаказные_колво': row.get('незаказные_колво', 0),
-                    'заказные_прибыль': row.get('заказные_прибыль', 0),
-                    'незаказные_прибыль': row.get('незаказные_прибыль', 0)
+                if branch in data_by_branch:
+                    data_by_branch[branch].append({
+                        'fio': row['fio'],
+                        'dept': row['dept'],
+                        'vacation': row['vacation'],
+                        'weekend': row['weekend'],
+                        'sick': row['sick'],
+                        'worked': row['worked'],
+                        'norm': row['norm'],
+                        'rating': row['rating'],
+                        'dol_prem': row.get('dol_prem', 0),
+                        'regular': row['regular'],
+                        'bonus': row['bonus'],
+                        'nonliquid': row['nonliquid'],
+                        'premWholesale': row['premWholesale'],
+                        'premOther': row['premOther'],
+                        'scheme': row['scheme'],
+                        'guarantee': row['guarantee'],
+                        'diff': row['diff'],
+                        'total': row['total'],
+                        'розница_колво': row['розница_колво'],
+                        'розница_бонус_колво': row['розница_бонус_колво'],
+                        'розница_неликвид_колво': row['розница_неликвид_колво'],
+                        'опт_колво': row['опт_колво'],
+                        'прочая_колво': row['прочая_колво'],
+                        'розница_общая_колво': row['розница_общая_колво'],
+                        'обычные_колво': row['обычные_колво'],
+                        'заказные_колво': row.get('заказные_колво', 0),
+                        'незаказные_колво': row.get('незаказные_колво', 0),
+                        'заказные_прибыль': row.get('заказные_прибыль', 0),
+                        'незаказные_прибыль': row.get('незаказные_прибыль', 0)
                     
-                })
+                    })
         
-        # Генерируем HTML
-        html_content = self._generate_html(data_by_branch)
+            span.rows_out = sum(len(records) for records in data_by_branch.values())
+            
+            # Генерируем HTML
+            with run_metrics.span('dashboard.html', rows_in=span.rows_out):
+                html_content = self._generate_html(data_by_branch)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(html_content)
         
-        print(f"✅ Дашборд Pro создан: {filepath}")
-        return filepath
+            logger.info("✅ Дашборд Pro создан: %s", filepath)
+            return filepath
         
     def _generate_html(self, data_by_branch):
         import os
@@ -324,21 +342,21 @@ class ManagerDashboardPro:
         for path in possible_paths:
             if os.path.exists(path):
                 template_path = path
-                print(f"✅ Найден шаблон: {path}")
+                logger.info("✅ Найден шаблон: %s", path)
                 break
 
         if not template_path:
-            print(f"❌ Файл шаблона не найден. Искал в:")
+            logger.error("❌ Файл шаблона не найден. Искал в:")
             for path in possible_paths:
                 exists = "✅ существует" if os.path.exists(path) else "❌ не существует"
-                print(f"   • {path} ({exists})")
+                logger.info("   • %s (%s)", path, exists)
             return "<html><body><h1>Шаблон не найден</h1></body></html>"
         
         # Загружаем шаблон
         with open(template_path, "r", encoding="utf-8") as f:
             template = f.read()
         
-        print(f"✅ Шаблон загружен: {len(template)} символов")
+        logger.info("✅ Шаблон загружен: %s символов", len(template))
         
         # Подготавливаем данные
         data_json = json.dumps(data_by_branch, ensure_ascii=False)
@@ -353,16 +371,19 @@ class ManagerDashboardPro:
                          .replace("{data_json}", data_json_escaped)\
                          .replace("{passwords_json}", passwords_json)
         
-        print(f"✅ HTML сгенерирован: {len(result)} символов")
+        logger.info("✅ HTML сгенерирован: %s символов", len(result))
         # Отладка: проверим данные первого сотрудника
         if data_by_branch and data_by_branch.get('bd1'):
             sample = data_by_branch['bd1'][0]
-            print(f"🔍 [DEBUG] Поля в данных: {list(sample.keys())}")
-            print(f"🔍 [DEBUG] заказные_колво: {sample.get('заказные_колво', 'НЕТ')}")
+            logger.debug("🔍 [DEBUG] Поля в данных: %s", list(sample.keys()))
+            logger.debug("🔍 [DEBUG] заказные_колво: %s", sample.get('заказные_колво', 'НЕТ'))
         return result
 
 # Тестирование
 if __name__ == "__main__":
+    from модули.log_setup import configure_logging
+    configure_logging()
+
     # Создаем тестовые данные
     class MockDataManager:
         def __init__(self):
@@ -0,0 +1,154 @@
+# name_index.py
+"""
+Индекс для сопоставления имен продавцов из файлов продаж с сотрудниками
+
+Семантика та же, что у прежнего перебора в parse_zakaz_sales: сотрудники
+просматриваются в исходном порядке, выигрывает первый, у которого
+    emp_norm == vendor_norm  или  emp_norm in vendor_norm  или  vendor_norm in emp_norm
+
+Вместо перебора всех сотрудников на каждую строку:
+1. emp in vendor - проверяем по словарю подстроки имени продавца только тех длин,
+   которые встречаются среди имен сотрудников (точное совпадение - частный случай)
+2. vendor in emp - кандидаты из индекса триграмм (пересечение списков сотрудников,
+   содержащих каждую триграмму), затем проверка подстроки
+Из всех кандидатов берется сотрудник с наименьшим порядковым номером.
+"""
+
+import random
+import time
+
+NGRAM = 3
+
+# Версия сопоставления для кэша парсинга заказов (увеличивать при изменении семантики)
+PARSER_VERSION = 1
+
+
+class NameIndex:
+    """Индекс имен сотрудников: нормализованное ФИО -> порядковый номер"""
+
+    def __init__(self, names):
+        self.order = {}
+        for name in names:
+            if name and name not in self.order:
+                self.order[name] = len(self.order)
+        self.names = list(self.order)
+        self.lengths = sorted({len(name) for name in self.names})
+
+        # Триграмма -> множество номеров сотрудников, в имени которых она есть
+        self.ngrams = {}
+        for position, name in enumerate(self.names):
+            for i in range(len(name) - NGRAM + 1):
+                self.ngrams.setdefault(name[i:i + NGRAM], set()).add(position)
+
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _contained_in(self, vendor):
+        """Минимальный номер сотрудника, чье имя является подстрокой vendor (или равно ему)"""
+        best = None
+        order = self.order
+        for length in self.lengths:
+            if length > len(vendor):
+                break
+            for start in range(len(vendor) - length + 1):
+                position = order.get(vendor[start:start + length])
+                if position is not None and (best is None or position < best):
+                    best = position
+        return best
+
+    def _containing(self, vendor):
+        """Минимальный номер сотрудника, имя которого содержит vendor"""
+        if len(vendor) < NGRAM:
+            # Слишком короткая строка для триграмм - обычный перебор
+            return next((i for i, name in enumerate(self.names) if vendor in name), None)
+
+        postings = []
+        for i in range(len(vendor) - NGRAM + 1):
+            posting = self.ngrams.get(vendor[i:i + NGRAM])
+            if not posting:
+                return None
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return None
+
+        for position in sorted(candidates):
+            if vendor in self.names[position]:
+                return position
+        return None
+
+    def match(self, vendor):
+        """
+        Находит сотрудника для нормализованного имени продавца
+
+        Возвращает нормализованное ФИО сотрудника или None
+        """
+        if vendor in self._cache:
+            return self._cache[vendor]
+
+        found = None
+        if vendor:
+            candidates = [p for p in (self._contained_in(vendor), self._containing(vendor)) if p is not None]
+            if candidates:
+                found = self.names[min(candidates)]
+
+        self._cache[vendor] = found
+        return found
+
+
+def match_linear(names, vendor):
+    """Прежний перебор всех сотрудников (для сравнения в бенчмарке)"""
+    for emp_norm in names:
+        if emp_norm == vendor or emp_norm in vendor or vendor in emp_norm:
+            return emp_norm
+    return None
+
+
+if __name__ == "__main__":
+    # Бенчмарк: 5 000 сотрудников x 50 000 строк продаж
+    rng = random.Random(42)
+    letters = 'АБВГДЕЖЗИКЛМНОПРСТУФХЦЧШЭЮЯ'
+
+    def random_word(low, high):
+        return rng.choice(letters) + ''.join(rng.choice(letters.lower()) for _ in range(rng.randint(low, high))).upper()
+
+    employees = [f"{random_word(5, 9)} {random_word(3, 6)} {random_word(6, 10)}" for _ in range(5000)]
+    vendors = []
+    for _ in range(50000):
+        kind = rng.random()
+        emp = rng.choice(employees)
+        if kind < 0.6:
+            vendors.append(emp)                                  # точное совпадение
+        elif kind < 0.75:
+            vendors.append(emp.rsplit(' ', 1)[0])                # без отчества
+        elif kind < 0.85:
+            vendors.append(emp + ' (СТАЖЕР)')                    # с припиской
+        else:
+            vendors.append(f"{random_word(5, 9)} {random_word(3, 6)}")  # нет в списке
+
+    start = time.perf_counter()
+    index = NameIndex(employees)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.match(v) for v in vendors]
+    index_time = time.perf_counter() - start
+
+    sample = 1000
+    start = time.perf_counter()
+    linear = [match_linear(employees, v) for v in vendors[:sample]]
+    linear_time = (time.perf_counter() - start) * len(vendors) / sample
+
+    assert indexed[:sample] == linear, "Результаты индекса и перебора различаются"
+
+    print(f"👥 Сотрудников: {len(employees):,}, строк: {len(vendors):,}")
+    print(f"🔧 Построение индекса: {build_time:.2f} с")
+    print(f"⚡ Индекс: {index_time:.2f} с ({len(vendors) / index_time:,.0f} строк/с)")
+    print(f"🐢 Перебор (оценка по {sample} строкам): {linear_time:.1f} с")
+    print(f"✅ Совпадений: {sum(1 for m in indexed if m)}")
@@ -0,0 +1,212 @@
+# parallel_loader.py
+"""
+Параллельная загрузка входных файлов с учетом зависимостей
+
+Независимые парсеры (график, сотрудники, УРС, бонусы) запускаются сразу в пуле
+процессов. Зависимые стартуют, как только готовы их входные данные:
+- Анализ продаж ждет бонусы (коды товаров) и УРС (исключения)
+- Заказ.xls ждет сотрудников и УРС (исключения)
+
+Время загрузки примерно равно самой длинной цепочке, а не сумме всех файлов.
+Все парсеры вызываются через кэш (parse_cache).
+
+Каждый парсер - интервал метрик 'parse.<тип>' (run_metrics); в процессе пула
+интервалы пишутся в отдельный запуск и добавляются к запуску родителя.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from модули import run_metrics
+from модули.parse_cache import cached_parse
+from модули.log_setup import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+# Тип файла -> (модуль, функция парсера, ключ результата в DataManager)
+PARSERS = {
+    'schedule': ('модули.parse_schedule', 'parse_schedule', 'schedule_data'),
+    'staff': ('модули.parse_staff_universal', 'parse_staff_departments', 'staff_data'),
+    'urs': ('модули.parse_urs_integrated', 'parse_urs_settings', 'urs_data'),
+    'bonus': ('модули.parse_bonus_integrated', 'parse_bonus_items_improved', 'bonus_data'),
+    'sales': ('модули.parse_sales_analysis', 'parse_sales_analysis', 'sales_data'),
+    'zakaz': ('модули.parse_zakaz_sales', 'parse_zakaz_sales', 'zakaz_data'),
+}
+
+# Тип файла -> от каких файлов зависит
+DEPENDENCIES = {
+    'schedule': (),
+    'staff': (),
+    'urs': (),
+    'bonus': (),
+    'sales': ('bonus', 'urs'),
+    'zakaz': ('staff', 'urs'),
+}
+
+
+def run_parser(kind, file_path, args, kwargs, force, trace_metrics=None):
+    """
+    Запуск одного парсера через кэш - в процессе пула или в текущем
+    (прогрев справочников в pipeline.warm_reference_cache)
+
+    trace_metrics: None - интервал пишется в текущий запуск метрик (если есть);
+    True/False - процесс пула: свой запуск метрик (с tracemalloc или без),
+    его export() возвращается последним элементом
+    """
+    import importlib
+
+    # В процессе пула (spawn) журнал не настроен - уровень берется из окружения
+    configure_logging()
+    module_name, func_name, _ = PARSERS[kind]
+    parser = getattr(importlib.import_module(module_name), func_name)
+
+    run = run_metrics.start_run(kind, trace_metrics) if trace_metrics is not None else None
+    start = time.perf_counter()
+    with run_metrics.span(f"parse.{kind}", file=os.path.basename(file_path)) as span:
+        result = cached_parse(parser, file_path, *args, force=force, **kwargs)
+        span.rows_out = result_rows(kind, result)
+    seconds = time.perf_counter() - start
+    exported = run_metrics.finish_run(run).export() if run else None
+    return kind, result, seconds, exported
+
+
+def parser_arguments(kind, results):
+    """
+    Аргументы парсера, вычисляемые из результатов других файлов
+
+    Отчетный период парсерам не передается: записи кэша справочников (УРС,
+    сотрудники, бонусы) не зависят от месяца и переиспользуются между периодами
+    """
+    urs_data = results.get('urs') or {}
+    exclusions = urs_data.get('exclusions', []) if urs_data.get('success') else []
+
+    if kind == 'sales':
+        bonus_data = results.get('bonus') or {}
+        # Коды - готовые отсортированные массивы int64: парсер не разбирает set строк заново.
+        # Таблица фактов нужна для пересчета при замене списка бонусов (reclassify_sales)
+        if bonus_data.get('success'):
+            return (bonus_data['bonus_codes'], bonus_data['non_liquid_codes'], exclusions), {'return_facts': True}
+        no_codes = np.array([], dtype=np.int64)
+        return (no_codes, no_codes, exclusions), {'return_facts': True}
+
+    if kind == 'zakaz':
+        return (results.get('staff'), exclusions), {}
+
+    return (), {}
+
+
+def _empty_result(kind):
+    """Результат для отсутствующего файла - в том же виде, что и ошибка парсера"""
+    if kind == 'sales':
+        return {}
+    if kind == 'schedule':
+        return {'error': 'Файл не найден'}
+    return {'success': False, 'error': 'Файл не найден', 'data': {}}
+
+
+def result_rows(kind, result):
+    """Сколько записей дал файл (для отчетов о прогрессе и скорости)"""
+    if kind == 'sales':
+        if isinstance(result, tuple):
+            return len(result[1]) if result[1] is not None else len(result[0] or {})
+        return len(result or {})
+    if not isinstance(result, dict):
+        return 0
+    if kind == 'schedule':
+        return len(result.get('employees_df', ())) if 'error' not in result else 0
+    if kind == 'staff':
+        return len(result.get('employees', ()))
+    if kind == 'urs':
+        return len(result.get('departments', {}))
+    if kind == 'bonus':
+        return len(result.get('items_info', {}))
+    return len(result.get('data', {}))
+
+
+def load_all_files_parallel(files, max_workers=None, force=False, progress=None):
+    """
+    Загружает все входные файлы
+
+    files: {'schedule': путь, 'staff': путь, 'urs': путь, 'bonus': путь, 'sales': путь, 'zakaz': путь}
+           (отсутствующие файлы можно не указывать)
+    max_workers: число процессов; 1 - последовательная загрузка в текущем процессе
+    force: холодная загрузка мимо кэша
+    progress: progress(сообщение, files_done=, files_total=, rows=) после каждого файла
+              (фоновый этап окна; может прервать загрузку исключением между файлами)
+
+    Возвращает словарь с ключами schedule_data, staff_data, urs_data, bonus_data,
+    sales_data, sales_facts (таблица фактов продаж), zakaz_data и timings ({тип файла: секунды})
+    """
+    if max_workers is None:
+        max_workers = min(len(PARSERS), os.cpu_count() or 1)
+
+    available = {kind: path for kind, path in files.items()
+                 if kind in PARSERS and path and os.path.exists(path)}
+    results = {}
+    timings = {}
+
+    logger.info("📂 Загрузка %s файлов (процессов: %s)", len(available), max_workers)
+    total_start = time.perf_counter()
+
+    pending = [kind for kind in PARSERS if kind in available]
+    for kind in PARSERS:
+        if kind not in available:
+            results[kind] = _empty_result(kind)
+
+    def ready(kind):
+        return all(dep in results for dep in DEPENDENCIES[kind])
+
+    def finish(kind, result, seconds, metrics=None):
+        run_metrics.merge(metrics, load_span)
+        results[kind] = result
+        timings[kind] = seconds
+        logger.info("  ⏱️  %s: %s - %.2f с", kind, os.path.basename(available[kind]), seconds)
+        if progress:
+            progress(f"{os.path.basename(available[kind])}: {seconds:.2f} с",
+                     files_done=len(timings), files_total=len(available),
+                     rows=result_rows(kind, result))
+
+    # Процессам пула - свой запуск метрик, если у родителя запуск есть
+    run = run_metrics.current_run()
+    trace_metrics = run.trace_memory if run else None
+
+    with run_metrics.span('load', rows_in=len(available)) as load_span:
+        if max_workers <= 1:
+            # Последовательно, но в порядке зависимостей
+            while pending:
+                kind = next(k for k in pending if ready(k))
+                pending.remove(kind)
+                args, kwargs = parser_arguments(kind, results)
+                finish(*run_parser(kind, available[kind], args, kwargs, force))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                running = {}
+                while pending or running:
+                    for kind in [k for k in pending if ready(k)]:
+                        pending.remove(kind)
+                        args, kwargs = parser_arguments(kind, results)
+                        running[pool.submit(run_parser, kind, available[kind], args, kwargs, force,
+                                            trace_metrics)] = kind
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        running.pop(future)
+                        finish(*future.result())
+        load_span.rows_out = sum(result_rows(kind, results[kind]) for kind in available)
+
+    total = time.perf_counter() - total_start
+    logger.info("  ✅ Загрузка завершена за %.2f с (сумма по файлам: %.2f с)", total, sum(timings.values()))
+
+    # Продажи приходят парой (sales_data, facts)
+    sales_facts = None
+    if isinstance(results['sales'], tuple):
+        results['sales'], sales_facts = results['sales']
+
+    loaded = {PARSERS[kind][2]: results[kind] for kind in PARSERS}
+    loaded['sales_facts'] = sales_facts
+    loaded['timings'] = timings
+    loaded['total_time'] = total
+    return loaded
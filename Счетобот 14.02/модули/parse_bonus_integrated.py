@@ -1,7 +1,38 @@
 # parse_bonus_integrated.py
+import numpy as np
 import pandas as pd
 import re
 
+from модули.columnar_store import read_input_frame
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Версия формата результата для кэша парсинга (увеличивать при изменении вывода)
+PARSER_VERSION = 2
+
+def item_codes_to_int64(codes):
+    """
+    Коды товаров -> int64 (пробелы, дефисы и точки убираются, как в анализе продаж)
+    
+    Возвращает (массив int64, маска разобранных кодов); неразобранные коды = -1
+    """
+    cleaned = (pd.Series(list(codes), dtype=object).astype(str).str.strip()
+               .str.replace(' ', '', regex=False)
+               .str.replace('-', '', regex=False)
+               .str.replace('.', '', regex=False))
+    valid = cleaned.str.fullmatch(r'[0-9]{1,18}').fillna(False).to_numpy(dtype=bool)
+    
+    values = np.full(len(cleaned), -1, dtype=np.int64)
+    if valid.any():
+        values[valid] = cleaned[valid].astype(np.int64).to_numpy()
+    return values, valid
+
+def item_code_array(codes):
+    """Множество кодов -> (отсортированный массив int64 без повторов, число неразобранных)"""
+    values, valid = item_codes_to_int64(codes)
+    return np.unique(values[valid]), int((~valid).sum())
+
 def parse_bonus_items_improved(file_path):
     """
     Улучшенный парсер бонусных позиций
@@ -9,17 +40,18 @@ def parse_bonus_items_improved(file_path):
     Возвращает словарь с:
     - bonus_items: set кодов бонусных товаров
     - non_liquid_items: set кодов неликвидов
+    - bonus_codes, non_liquid_codes: те же коды как отсортированные массивы int64
     - items_info: dict с полной информацией {код: {статус, название, ...}}
     - statistics: статистика по файлу
     """
     
-    print(f"🎁 Парсинг файла бонусов: {file_path}")
+    logger.info("🎁 Парсинг файла бонусов: %s", file_path)
     
     try:
         # Читаем файл
-        df = pd.read_excel(file_path, header=None, dtype=str)
+        df = read_input_frame(file_path, header=None, dtype=str)
         
-        print(f"  📊 Размер файла: {len(df)} строк × {len(df.columns)} колонок")
+        logger.info("  📊 Размер файла: %s строк × %s колонок", len(df), len(df.columns))
         
         # 1. Находим колонки
         col_mapping = {}
@@ -38,13 +70,13 @@ def parse_bonus_items_improved(file_path):
         
         # Если не нашли по заголовкам, используем логику из оригинала
         if not col_mapping:
-            print("  ⚠️  Заголовки не найдены, использую стандартные позиции")
+            logger.warning("  ⚠️  Заголовки не найдены, использую стандартные позиции")
             if len(df.columns) >= 5:
                 col_mapping = {'код': 0, 'статус': 4}
                 if len(df.columns) > 1:
                     col_mapping['товар'] = 1
         
-        print(f"  📋 Определены колонки: {col_mapping}")
+        logger.info("  📋 Определены колонки: %s", col_mapping)
         
         # 2. Определяем стартовую строку данных
         start_row = 0
@@ -56,7 +88,7 @@ def parse_bonus_items_improved(file_path):
                     start_row = i
                     break
         
-        print(f"  🔍 Данные начинаются с строки: {start_row + 1}")
+        logger.info("  🔍 Данные начинаются с строки: %s", start_row + 1)
         
         # 3. Обрабатываем данные
         bonus_items = set()
@@ -102,7 +134,7 @@ def parse_bonus_items_improved(file_path):
             
             # Определяем категорию
             if processed < 5:  # Отладка для первых 5 товаров
-                print(f"    Товар {code}: статус='{status}', товар='{товар[:30]}...'")
+                logger.debug("    Товар %s: статус='%s', товар='%s...'", code, status, товар[:30])
             
             # Нормализуем статус еще раз для надежности
             status_normalized = ' '.join(status.lower().split())
@@ -146,10 +178,15 @@ def parse_bonus_items_improved(file_path):
             processed += 1
         
         # 4. Формируем результат
+        bonus_codes, bonus_unparseable = item_code_array(bonus_items)
+        non_liquid_codes, non_liquid_unparseable = item_code_array(non_liquid_items)
+        
         result = {
             'success': True,
             'bonus_items': bonus_items,
             'non_liquid_items': non_liquid_items,
+            'bonus_codes': bonus_codes,
+            'non_liquid_codes': non_liquid_codes,
             'items_info': items_info,
             'statistics': {
                 'total_processed': processed,
@@ -157,38 +194,42 @@ def parse_bonus_items_improved(file_path):
                 'bonus_count': len(bonus_items),
                 'non_liquid_count': len(non_liquid_items),
                 'total_unique': len(items_info),
+                'unparseable_codes': bonus_unparseable + non_liquid_unparseable,
                 'columns_mapped': col_mapping,
                 'start_row': start_row
             }
         }
         
-        print(f"\n  ✅ Обработано: {processed} товаров")
-        print(f"  ✗ Пропущено: {skipped} строк")
-        print(f"  🎁 Бонусных: {len(bonus_items)}")
-        print(f"  📦 Неликвидов: {len(non_liquid_items)}")
+        logger.info("\n  ✅ Обработано: %s товаров", processed)
+        logger.info("  ✗ Пропущено: %s строк", skipped)
+        logger.info("  🎁 Бонусных: %s", len(bonus_items))
+        logger.info("  📦 Неликвидов: %s", len(non_liquid_items))
+        if bonus_unparseable or non_liquid_unparseable:
+            logger.warning("  ⚠️  Коды не числовые (не сравниваются с продажами): бонусных %s, неликвидов %s",
+                           bonus_unparseable, non_liquid_unparseable)
         
         # Примеры для проверки
         if bonus_items:
-            print(f"\n  📋 Примеры бонусных товаров (первые 3):")
+            logger.info("\n  📋 Примеры бонусных товаров (первые 3):")
             for i, code in enumerate(list(bonus_items)[:3]):
                 info = items_info.get(code, {})
                 name = info.get('название', 'Нет названия')[:40]
                 status_info = info.get('статус', '?')
-                print(f"    {i+1}. {code} - {name}... [{status_info}]")
+                logger.info("    %s. %s - %s... [%s]", i + 1, code, name, status_info)
         
         if non_liquid_items:
-            print(f"\n  📋 Примеры неликвидов (первые 3):")
+            logger.info("\n  📋 Примеры неликвидов (первые 3):")
             for i, code in enumerate(list(non_liquid_items)[:3]):
                 info = items_info.get(code, {})
                 name = info.get('название', 'Нет названия')[:40]
                 original_status = info.get('исходный_статус', '')[:20]
-                print(f"    {i+1}. {code} - {name}... ['{original_status}']")
+                logger.info("    %s. %s - %s... ['%s']", i + 1, code, name, original_status)
         
         return result
         
     except Exception as e:
         import traceback
-        print(f"❌ Ошибка парсинга: {str(e)}")
+        logger.error("❌ Ошибка парсинга: %s", e)
         return {
             'success': False,
             'error': f"Ошибка парсинга: {str(e)}",
@@ -238,6 +279,9 @@ class BonusDataProcessor:
 
 # Пример использования
 if __name__ == "__main__":
+    from модули.log_setup import configure_logging
+    configure_logging()
+
     # Тестируем парсер
     file_path = "Список бонусные позиции Декабрь.xlsx"
     result = parse_bonus_items_improved(file_path)
@@ -0,0 +1,198 @@
+# parse_cache.py
+"""
+Кэш результатов парсеров на диске
+
+Ключ записи: хэш содержимого входного файла + имя и версия парсера + дополнительные
+аргументы (бонусные коды, исключения УРС и т.д.). Версия парсера - PARSER_VERSION его
+модуля и версии модулей проекта, из которых он импортирует функции (колоночные копии,
+правила имен продавцов, индекс имен...): изменение общего модуля тоже обновляет ключ.
+Результат хранится в pickle - быстро читается и сохраняет DataFrame и set как есть.
+Если файл не менялся, повторная загрузка занимает миллисекунды.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import time
+import types
+
+import numpy as np
+
+from модули import run_metrics
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_DIR = os.path.join("данные", ".кэш")
+MAX_CACHE_BYTES = 512 * 1024 * 1024  # 512 МБ, дальше удаляем самые старые записи
+CACHE_EXTENSION = ".pkl"
+
+# Константы версий в модулях проекта, входящие в ключ записи
+VERSION_NAMES = ('PARSER_VERSION', 'STORE_VERSION')
+PACKAGE = "модули"
+
+# Хэши файлов в рамках одного запуска: (путь, размер, время изменения) -> хэш
+_digest_memo = {}
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """Хэш содержимого файла (blake2b), повторно не считается, пока файл не изменился"""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _digest_memo:
+        return _digest_memo[memo_key]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+    _digest_memo[memo_key] = digest.hexdigest()
+    return _digest_memo[memo_key]
+
+
+def _canonical(value):
+    """Приводит аргументы к виду, не зависящему от порядка элементов в set/dict"""
+    if isinstance(value, dict):
+        return ('dict', sorted((repr(k), _canonical(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return ('set', sorted(repr(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, [_canonical(v) for v in value])
+    if isinstance(value, np.ndarray):
+        # repr() большого массива сокращается до '...' - разные массивы дали бы один ключ
+        content = hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest()
+        return ('ndarray', str(value.dtype), value.shape, content)
+    return repr(value)
+
+
+def _project_modules(module):
+    """Модуль и модули проекта, из которых он (и они) импортирует функции, классы или модули"""
+    found = {module.__name__: module}
+    pending = [module]
+    while pending:
+        for value in vars(pending.pop()).values():
+            name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+            if (isinstance(name, str) and name.startswith(PACKAGE + ".") and name not in found
+                    and name in sys.modules):
+                found[name] = sys.modules[name]
+                pending.append(found[name])
+    return found
+
+
+def parser_version(parser):
+    """
+    Версия парсера для ключа кэша: 'модуль:версия' его модуля (PARSER_VERSION, по
+    умолчанию 1) и модулей проекта, от которых он зависит и где есть константа версии
+    """
+    module = sys.modules.get(parser.__module__)
+    if module is None:
+        return "1"
+    versions = {}
+    for name, dependency in _project_modules(module).items():
+        for constant in VERSION_NAMES:
+            if hasattr(dependency, constant):
+                versions[name] = getattr(dependency, constant)
+                break
+    versions.setdefault(module.__name__, 1)
+    return ",".join(f"{name}:{version}" for name, version in sorted(versions.items()))
+
+
+def cache_key(parser, file_path, args=(), kwargs=None):
+    """Ключ записи кэша для вызова parser(file_path, *args, **kwargs)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(file_digest(file_path).encode())
+    digest.update(f"{parser.__module__}.{parser.__name__}:{parser_version(parser)}".encode())
+    digest.update(repr(_canonical((list(args), kwargs or {}))).encode())
+    return f"{parser.__name__}_{digest.hexdigest()}"
+
+
+def _is_cacheable(result):
+    """Ошибки парсинга не кэшируем, чтобы исправленный файл перечитывался"""
+    if isinstance(result, tuple):
+        result = result[0] if result else None
+    if not result:
+        return False
+    if isinstance(result, dict):
+        if result.get('success') is False or result.get('error'):
+            return False
+    return True
+
+
+def cached_parse(parser, file_path, *args, force=False, cache_dir=CACHE_DIR, **kwargs):
+    """
+    Вызывает parser(file_path, *args, **kwargs) через кэш
+
+    force=True - холодная загрузка: парсер вызывается всегда, запись перезаписывается
+    """
+    key = cache_key(parser, file_path, args, kwargs)
+    cache_path = os.path.join(cache_dir, key + CACHE_EXTENSION)
+
+    if not force and os.path.exists(cache_path):
+        start = time.perf_counter()
+        try:
+            with open(cache_path, 'rb') as f:
+                result = pickle.load(f)
+            # Обновляем время доступа для вытеснения по давности
+            os.utime(cache_path)
+            logger.info("  ⚡ %s: из кэша за %.3f с", os.path.basename(file_path), time.perf_counter() - start)
+            run_metrics.count('parse_cache.hit')
+            return result
+        except Exception as e:
+            logger.warning("  ⚠️  Запись кэша повреждена, перечитываю файл: %s", e)
+
+    run_metrics.count('parse_cache.miss')
+    result = parser(file_path, *args, **kwargs)
+
+    if _is_cacheable(result):
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Имя временного файла уникально для процесса - пакетный расчет пишет параллельно
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+            evict_cache(cache_dir)
+        except Exception as e:
+            logger.warning("  ⚠️  Не удалось сохранить кэш: %s", e)
+
+    return result
+
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Удаляет самые давно использованные записи, пока кэш больше max_bytes"""
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(CACHE_EXTENSION):
+            path = os.path.join(cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def clear_parse_cache(cache_dir=CACHE_DIR):
+    """Полностью очищает кэш (следующая загрузка будет холодной)"""
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith(CACHE_EXTENSION) or (CACHE_EXTENSION + "." in name and name.endswith(".tmp")):
+            os.remove(os.path.join(cache_dir, name))
+            removed += 1
+
+    return removed
@@ -1,79 +1,345 @@
 # parse_sales_analysis.py
+import logging
+
 import pandas as pd
+import numpy as np
 import re
 
+from модули.columnar_store import read_input_frame
+from модули.parse_bonus_integrated import item_code_array, item_codes_to_int64
+from модули.seller_names import get_seller_classifier
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Версия формата результата для кэша парсинга (увеличивать при изменении вывода)
+PARSER_VERSION = 3
+
 def is_valid_seller_name(name, excluded_firms=None):
     """
     Проверяет, является ли строка валидным ФИО продавца
     
     name: строка для проверки
     excluded_firms: список названий фирм для исключения
+    
+    Правила - в модули/seller_names.py (профиль 'sales')
+    """
+    return get_seller_classifier(excluded_firms, 'sales').is_valid(name)
+
+# Типы продаж в порядке кодов движка
+SALE_TYPES = ['Оптовая продажа', 'Розничная (по чекам)', 'Розничная (прочая)']
+# Коды строк типа продаж: 0-2 — индекс в SALE_TYPES, 3 — "тип не определен"
+SALE_TYPE_UNKNOWN = 3
+# Классы товаров в таблице фактов
+ITEM_TYPES = ['regular', 'bonus', 'non_liquid']
+
+def _new_seller_record(fio, row_number):
+    """Пустая запись продавца с детализацией по типам продаж"""
+    return {
+        'department': "Не указан",
+        'sales_by_type': {
+            sale_type: {
+                'revenue': 0.0, 'profit': 0.0, 'items_count': 0,
+                'bonus_items_count': 0, 'bonus_revenue': 0.0, 'bonus_profit': 0.0,
+                'non_liquid_items_count': 0, 'non_liquid_revenue': 0.0, 'non_liquid_profit': 0.0,
+                'regular_profit': 0.0, 'regular_revenue': 0.0
+            }
+            for sale_type in SALE_TYPES
+        },
+        'total_revenue': 0.0,
+        'total_profit': 0.0,
+        'total_items_count': 0,
+        'total_bonus_items_count': 0,
+        'total_bonus_revenue': 0.0,
+        'total_bonus_profit': 0.0,
+        'total_non_liquid_items_count': 0,
+        'total_non_liquid_revenue': 0.0,
+        'total_non_liquid_profit': 0.0,
+        'original_name': fio,
+        'row_number': row_number
+    }
+
+def _to_number(values):
+    """Векторный аналог float(ячейка.replace(',', '.').replace(' ', '')) с нулем при ошибке"""
+    numbers = pd.to_numeric(values, errors='coerce')
+    
+    # Медленный путь только для ячеек вида "1 234,5"
+    retry = numbers.isna() & values.notna()
+    if retry.any():
+        cleaned = values[retry].astype(str).str.replace(',', '.', regex=False).str.replace(' ', '', regex=False)
+        numbers[retry] = pd.to_numeric(cleaned.str.strip(), errors='coerce')
+    
+    return numbers.fillna(0.0).to_numpy(dtype=float)
+
+def build_sales_facts(df, first_row, bonus_items_set, non_liquid_items_set, exclusions):
+    """
+    Векторный разбор иерархии 'Анализа продаж' в таблицу фактов.
+    
+    Каждая строка колонки A классифицируется как: продавец, тип продаж, товар,
+    фирма/отдел (заглавные буквы) или пустая. Продавец и тип продаж
+    протягиваются вниз (ffill) до конца блока.
+    
+    Возвращает DataFrame - одна строка на товарную строку файла:
+    - seller: ключ продавца (category, категории - все продавцы в порядке появления)
+    - sale_type: тип продаж (category из SALE_TYPES)
+    - item_code: код товара (int64; товарная строка - это и есть строка с числовым кодом)
+    - items_count, revenue, profit: float64
+    - item_type: класс товара (category из ITEM_TYPES)
+    
+    В facts.attrs: original_names и row_numbers (по категориям seller), valid_sellers
+    """
+    body = df.iloc[first_row:]
+    row_numbers = np.arange(first_row, len(df)) + 1
+    
+    # 1. КЛАССИФИКАЦИЯ СТРОК
+    # Значения колонки A сильно повторяются (коды товаров, типы продаж), поэтому
+    # строковые проверки делаются по уникальным значениям и раздаются строкам
+    # через коды factorize. Пустые ячейки получают код -1 и попадают
+    # на последний элемент - пустую строку.
+    codes, uniques = pd.factorize(body.iloc[:, 0])
+    text = pd.Series(list(uniques) + [''], dtype=object).astype(str).str.strip()
+    lower = text.str.lower()
+    
+    u_blank = lower.isin(['', 'nan', 'none']).to_numpy()
+    
+    clean_code = text.str.replace(' ', '', regex=False).str.replace('-', '', regex=False).str.replace('.', '', regex=False)
+    u_item = (clean_code.str.isdigit() & clean_code.str.len().between(3, 8)).to_numpy()
+    
+    u_sale_type = lower.str.contains('оптовая|розничная|продажа', regex=True).to_numpy()
+    u_sale_type_code = np.select(
+        [
+            lower.str.contains('оптовая', regex=False).to_numpy(),
+            (lower.str.contains('розничная', regex=False) & lower.str.contains('по чек', regex=False)).to_numpy(),
+            lower.str.contains('розничная', regex=False).to_numpy()
+        ],
+        [0, 1, 2],
+        default=SALE_TYPE_UNKNOWN
+    )
+    
+    # ФИО проверяем только для значений, которые не товары и не пустые
+    u_seller = ~u_blank & ~u_item
+    u_seller[u_seller] = get_seller_classifier(exclusions, 'sales').classify_column(text[u_seller])
+    
+    # Фирма или отдел заглавными буквами закрывает блок продавца
+    u_firm = (text.str.isupper() & (text.str.len() > 5)).to_numpy()
+    u_reset = u_blank | (~u_seller & ~u_sale_type & ~u_item & u_firm)
+    
+    is_seller = u_seller[codes]
+    is_reset = u_reset[codes]
+    is_sale_type = u_sale_type[codes]
+    is_item = u_item[codes]
+    
+    # 2. ПРОДАВЦЫ В ПОРЯДКЕ ПЕРВОГО ПОЯВЛЕНИЯ
+    seller_rows = np.flatnonzero(is_seller)
+    seller_names = text.iloc[codes[seller_rows]]
+    seller_keys = seller_names.str.split().str.join(' ').str.upper()
+    seller_codes, unique_keys = pd.factorize(seller_keys)
+    
+    _, first_positions = np.unique(seller_codes, return_index=True)
+    
+    for n, (name, row) in enumerate(zip(seller_names[:3], seller_rows[:3]), 1):
+        logger.debug("  ✅ Найден продавец %s: '%s' (строка %s)", n, name, row_numbers[row])
+    
+    # 3. ПРОТЯГИВАНИЕ ПРОДАВЦА И ТИПА ПРОДАЖ ВНИЗ ПО БЛОКУ
+    owner = np.full(len(body), np.nan)
+    owner[seller_rows] = seller_codes
+    owner[is_reset] = -1
+    owner = pd.Series(owner).ffill().fillna(-1).to_numpy(dtype=np.int64)
+    in_block = owner >= 0
+    
+    sale_type_code = np.full(len(body), np.nan)
+    sale_type_rows = is_sale_type & ~is_seller & in_block
+    sale_type_code[sale_type_rows] = u_sale_type_code[codes[sale_type_rows]]
+    # Новый продавец или конец блока сбрасывают тип продаж
+    sale_type_code[is_seller | is_reset] = SALE_TYPE_UNKNOWN
+    sale_type_code = pd.Series(sale_type_code).ffill().fillna(SALE_TYPE_UNKNOWN).to_numpy(dtype=np.int64)
+    # Если тип продаж не указан, используем "Оптовая продажа" по умолчанию
+    sale_type_code[sale_type_code == SALE_TYPE_UNKNOWN] = 0
+    
+    # 4. ТАБЛИЦА ФАКТОВ ПО ТОВАРНЫМ СТРОКАМ
+    item_rows = np.flatnonzero(is_item & ~is_sale_type & in_block)
+    items = body.iloc[item_rows]
+    
+    # Коды товаров - int64 (разбор по уникальным значениям), класс - одна проверка
+    # вхождения по всей колонке кодов
+    u_code_int, _ = item_codes_to_int64(clean_code.where(u_item, ''))
+    item_codes = u_code_int[codes[item_rows]]
+    item_type_code = classify_item_codes(item_codes, bonus_items_set, non_liquid_items_set)
+    
+    facts = pd.DataFrame({
+        'seller': pd.Categorical.from_codes(owner[item_rows], categories=pd.Index(unique_keys, dtype=object)),
+        'sale_type': pd.Categorical.from_codes(sale_type_code[item_rows], categories=SALE_TYPES),
+        'item_code': item_codes,
+        'items_count': _to_number(items.iloc[:, 3].reset_index(drop=True)),
+        'revenue': _to_number(items.iloc[:, 5].reset_index(drop=True)),
+        'profit': _to_number(items.iloc[:, 6].reset_index(drop=True)),
+        'item_type': pd.Categorical.from_codes(item_type_code, categories=ITEM_TYPES)
+    })
+    facts.attrs['original_names'] = seller_names.iloc[first_positions].tolist()
+    facts.attrs['row_numbers'] = row_numbers[seller_rows[first_positions]].tolist()
+    facts.attrs['valid_sellers'] = len(seller_rows)
+    
+    # Отладочный вывод для первых товаров (только при уровне DEBUG)
+    if logger.isEnabledFor(logging.DEBUG):
+        shown = facts[facts['items_count'].cumsum() <= 10]
+        type_text = {'regular': 'обычный', 'bonus': 'БОНУС', 'non_liquid': 'НЕЛИКВИД'}
+        for pos, line in zip(shown.index, shown.itertuples(index=False)):
+            item_name = str(items.iloc[pos, 1]).strip()[:30]
+            logger.debug("    → Товар: %s (%s) - %s шт. = %.0f руб. [%s]",
+                         line.item_code, item_name, line.items_count, line.revenue, type_text[line.item_type])
+    
+    return facts
+
+def aggregate_sales_facts(facts, sellers=None):
     """
-    if excluded_firms is None:
-        excluded_firms = []
+    Собирает словарь sales_data по продавцам из таблицы фактов одной группировкой.
+    Продавцы без товарных строк тоже попадают в словарь (с нулями).
     
-    if not name or not isinstance(name, str):
-        return False
+    sellers: собрать только этих продавцов (ключи), по умолчанию - всех
+    """
+    sales_data = {}
+    for key, name, row_number in zip(facts['seller'].cat.categories,
+                                     facts.attrs['original_names'],
+                                     facts.attrs['row_numbers']):
+        if sellers is None or key in sellers:
+            sales_data[key] = _new_seller_record(name, int(row_number))
     
-    name_clean = name.strip()
-    name_lower = name_clean.lower()
+    if sellers is not None:
+        facts = facts[facts['seller'].isin(sellers)]
     
-    if len(name_clean) < 4:
-        return False
+    grouped = facts.groupby(['seller', 'sale_type', 'item_type'], observed=True, sort=False)[
+        ['items_count', 'revenue', 'profit']
+    ].sum()
     
-    # 1. ТОЧНОЕ СОВПАДЕНИЕ С ИСКЛЮЧЕНИЯМИ
-    for exclusion in excluded_firms:
-        if not exclusion or not isinstance(exclusion, str):
-            continue
-        exclusion_lower = exclusion.lower().strip()
+    for (seller_key, sale_type, kind), items_count, revenue, profit in zip(
+            grouped.index,
+            grouped['items_count'].tolist(),
+            grouped['revenue'].tolist(),
+            grouped['profit'].tolist()):
+        seller = sales_data[seller_key]
+        type_data = seller['sales_by_type'][sale_type]
+        
+        type_data['items_count'] += items_count
+        type_data['revenue'] += revenue
+        type_data['profit'] += profit
+        
+        if kind == 'regular':
+            type_data['regular_revenue'] += revenue
+            type_data['regular_profit'] += profit
+        else:
+            type_data[f'{kind}_items_count'] += items_count
+            type_data[f'{kind}_revenue'] += revenue
+            type_data[f'{kind}_profit'] += profit
+            
+            seller[f'total_{kind}_items_count'] += items_count
+            seller[f'total_{kind}_revenue'] += revenue
+            seller[f'total_{kind}_profit'] += profit
         
-        # Точное совпадение
-        if name_lower == exclusion_lower:
-            return False
-    
-    # 2. ЗАПРЕЩЁННЫЕ СЛОВА
-    forbidden_patterns = [
-        'итого', 'всего', 'БД1', 'наименование', 'БД3', 'компания',
-        'оптовая', 'розничная', 'продажа', 'БД4', 'прочая', 'отдел',
-        'подразделение', 'филиал', 'управление', 'департамент',
-        '!!!!', 'nan', 'none',
-        'оптова', 'розничн', 'по чек', 'прочая', 'керамика',
-        'сантехника', 'инструмент', 'отпуск', 'в отпуске', 'болен',
-        'больничный', 'самообслуж', 'монтаж', 'ламинат', 'обои ',
-        ' обои', 'паркет', 'электр', 'продаж'
-    ]
-    
-    # Проверяем, не является ли строка типом продаж (содержит "продажа" но не только это)
-    if 'продажа' in name_lower and len(name_clean.split()) <= 3:
-        return False
-    
-    for pattern in forbidden_patterns:
-        if pattern in name_lower:
-            return False
-    
-    # 3. ПРОВЕРКА НА ФИО
-    words = name_clean.split()
-    if len(words) < 2:
-        return False
-    
-    russian_letters = set('абвгдеёжзийклмнопрстуфхцчшщъыьэюя')
-    for word in words:
-        has_russian = any(c.lower() in russian_letters for c in word)
-        if not has_russian:
-            return False
-    
-    if name_clean.isupper() and len(name_clean) > 20:
-        return False
-    
-    if any(char.isdigit() for char in name_clean):
-        return False
-    
-    if any(symbol in name_clean for symbol in ['"', '«', '»', '()', 'ООО', 'ИП', 'АО', 'ЗАО']):
-        return False
-    
-    return True
+        seller['total_revenue'] += revenue
+        seller['total_profit'] += profit
+        seller['total_items_count'] += items_count
+    
+    return sales_data
 
-def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclusions=None):
+def add_calculation_views(sales_data):
+    """Добавляет продавцам поля для нового расчета: продажи_чеки, продажи_опт, продажи_прочая"""
+    for seller_key, seller_data in sales_data.items():
+        # Переименовываем поля для ясности
+        sales_by_type = seller_data['sales_by_type']
+        
+        # 1. Розничная (по чекам) - для личного показателя
+        розничная_чеки = sales_by_type.get('Розничная (по чекам)', {})
+        seller_data['продажи_чеки'] = {
+            'выручка': розничная_чеки.get('revenue', 0),
+            'прибыль': розничная_чеки.get('profit', 0),
+            'прибыль_обычная': розничная_чеки.get('regular_profit', 0),
+            'прибыль_бонусная': розничная_чеки.get('bonus_profit', 0),
+            'выручка_неликвидов': розничная_чеки.get('non_liquid_revenue', 0),
+            'прибыль_неликвидов': розничная_чеки.get('non_liquid_profit', 0)
+        }
+        
+        # 2. Оптовая продажа
+        оптовая = sales_by_type.get('Оптовая продажа', {})
+        seller_data['продажи_опт'] = {
+            'прибыль': оптовая.get('profit', 0),
+            'выручка': оптовая.get('revenue', 0),
+            'items_count': оптовая.get('items_count', 0)
+        }
+        
+        # 3. Розничная (прочая)
+        розничная_прочая = sales_by_type.get('Розничная (прочая)', {})
+        seller_data['продажи_прочая'] = {
+            'выручка': розничная_прочая.get('revenue', 0),
+            'прибыль': розничная_прочая.get('profit', 0),
+            'items_count': розничная_прочая.get('items_count', 0)
+        }
+        
+        # Итоговые поля для обратной совместимости
+        seller_data['total_revenue'] = seller_data.get('total_revenue', 0)
+        seller_data['total_profit'] = seller_data.get('total_profit', 0)
+        seller_data['total_bonus_profit'] = seller_data.get('total_bonus_profit', 0)
+        seller_data['total_non_liquid_revenue'] = seller_data.get('total_non_liquid_revenue', 0)
+    
+    return sales_data
+
+def _code_array(codes):
+    """Коды из списка бонусов (set строк или готовый массив int64) -> отсортированный int64"""
+    if isinstance(codes, np.ndarray) and codes.dtype == np.int64:
+        return codes
+    return item_code_array(codes)[0]
+
+def classify_item_codes(item_codes, bonus_items, non_liquid_items):
+    """
+    Коды классов товаров (индексы ITEM_TYPES) для массива кодов int64: бонус важнее неликвида
+    
+    bonus_items, non_liquid_items: set строк из parse_bonus_items_improved или массивы int64
+    """
+    item_codes = np.asarray(item_codes, dtype=np.int64)
+    return np.select(
+        [np.isin(item_codes, _code_array(bonus_items)), np.isin(item_codes, _code_array(non_liquid_items))],
+        [1, 2],
+        default=0
+    )
+
+def reclassify_sales(sales_data, facts, bonus_items_set, non_liquid_items_set):
+    """
+    Пересчет после изменения списка бонусных/неликвидных товаров без перечитывания файла
+    
+    Классы пересчитываются по уникальным кодам товаров, затем заново собираются
+    только продавцы, у которых есть строки с изменившимися кодами.
+    sales_data и facts обновляются на месте.
+    
+    Возвращает статистику: changed_codes, changed_rows, affected_sellers
+    """
+    categories, codes = np.unique(facts['item_code'].to_numpy(), return_inverse=True)
+    codes = codes.reshape(-1)
+    
+    # Текущий класс каждого кода (у всех строк одного кода он одинаковый)
+    new_by_code = classify_item_codes(categories, bonus_items_set, non_liquid_items_set)
+    old_by_code = new_by_code.copy()
+    old_by_code[codes] = facts['item_type'].cat.codes.to_numpy()
+    
+    changed = old_by_code != new_by_code
+    changed_rows = changed[codes]
+    
+    statistics = {
+        'changed_codes': int(changed.sum()),
+        'changed_rows': int(changed_rows.sum()),
+        'affected_sellers': 0
+    }
+    if not changed_rows.any():
+        return statistics
+    
+    facts['item_type'] = pd.Categorical.from_codes(new_by_code[codes], categories=ITEM_TYPES)
+    
+    affected = set(facts['seller'][changed_rows].unique())
+    updated = add_calculation_views(aggregate_sales_facts(facts, sellers=affected))
+    sales_data.update(updated)
+    
+    statistics['affected_sellers'] = len(affected)
+    return statistics
+
+def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclusions=None, return_facts=False):
     """
     Парсер файла 'Анализ продаж' для структуры:
     A: ФИО/фирма/тип/код | B: Наименование | C: Ед. | D: Кол | E: Себестоимость | F: Продажи | G: Прибыль
@@ -83,23 +349,29 @@ def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclu
     - Продажи по типам (опт, розница по чекам, розница прочая)
     - Бонусные товары (количество, выручка, прибыль)
     - Неликвидные товары (количество, выручка, прибыль=0)
+    
+    bonus_items_set, non_liquid_items_set: коды из списка бонусов - set строк или
+    отсортированные массивы int64 (bonus_codes/non_liquid_codes)
+    
+    При return_facts=True возвращает кортеж (sales_data, facts), где facts -
+    таблица фактов по товарным строкам (см. build_sales_facts)
     """
-    print(f"📊 Парсинг файла продаж: {file_path}")
+    logger.info("📊 Парсинг файла продаж: %s", file_path)
     
     if exclusions is None:
         exclusions = []
     
-    print(f"  🚫 Исключений из УРС: {len(exclusions)}")
+    logger.info("  🚫 Исключений из УРС: %s", len(exclusions))
     
     try:
         # Читаем файл
-        df = pd.read_excel(file_path, header=None, dtype=str)
+        df = read_input_frame(file_path, header=None, dtype=str)
         
         # Получаем период из ячейки B5
         period_cell = ""
         if len(df) > 4 and df.shape[1] > 1:
             period_cell = str(df.iloc[4, 1]).strip()
-            print(f"📅 Период: {period_cell}")
+            logger.info("📅 Период: %s", period_cell)
         
         # Ищем начало таблицы с продажами
         start_row = None
@@ -110,8 +382,8 @@ def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclu
             
             if any(word in cell_a for word in ['продавец', 'фио', 'сотрудник', 'менеджер']):
                 start_row = i
-                print(f"🔍 Найден заголовок таблицы: строка {start_row + 1}")
-                print(f"   Содержимое: '{str(df.iloc[i, 0]).strip()}'")
+                logger.info("🔍 Найден заголовок таблицы: строка %s", start_row + 1)
+                logger.info("   Содержимое: '%s'", str(df.iloc[i, 0]).strip())
                 break
         
         if start_row is None:
@@ -120,13 +392,13 @@ def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclu
                 cell_a = str(df.iloc[i, 0]).strip()
                 if is_valid_seller_name(cell_a, exclusions):
                     start_row = i - 1
-                    print(f"🔍 Найден первый продавец: строка {i + 1}")
-                    print(f"   Устанавливаем начало таблицы: строка {start_row + 1}")
+                    logger.info("🔍 Найден первый продавец: строка %s", i + 1)
+                    logger.info("   Устанавливаем начало таблицы: строка %s", start_row + 1)
                     break
         
         if start_row is None:
             start_row = 5
-            print(f"⚠️  Не найден заголовок, начинаем со строки {start_row + 1}")
+            logger.warning("⚠️  Не найден заголовок, начинаем со строки %s", start_row + 1)
         
         # ОПРЕДЕЛЯЕМ КОЛОНКИ ПО ФИКСИРОВАННОЙ СТРУКТУРЕ
         col_mapping = {
@@ -139,240 +411,42 @@ def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclu
             'прибыль': 6     # Колонка G: Прибыль
         }
         
-        print(f"📋 Структура колонок (фиксированная):")
-        print(f"  A (0): ФИО/фирма/тип/код")
-        print(f"  B (1): Наименование товара")
-        print(f"  C (2): Единица измерения")
-        print(f"  D (3): Количество")
-        print(f"  E (4): Себестоимость")
-        print(f"  F (5): Продажи (выручка)")
-        print(f"  G (6): Прибыль")
+        logger.debug("📋 Структура колонок (фиксированная):")
+        logger.debug("  A (0): ФИО/фирма/тип/код")
+        logger.debug("  B (1): Наименование товара")
+        logger.debug("  C (2): Единица измерения")
+        logger.debug("  D (3): Количество")
+        logger.debug("  E (4): Себестоимость")
+        logger.debug("  F (5): Продажи (выручка)")
+        logger.debug("  G (6): Прибыль")
         
         # Проверяем, что файл имеет достаточно колонок
         if df.shape[1] < 7:
-            print(f"❌ ОШИБКА: Файл имеет только {df.shape[1]} колонок, нужно минимум 7")
-            return {}
+            logger.error("❌ ОШИБКА: Файл имеет только %s колонок, нужно минимум 7", df.shape[1])
+            return ({}, None) if return_facts else {}
         
-        # Парсим данные с учетом иерархии
-        sales_data = {}
+        # Парсим данные с учетом иерархии (векторный разбор всех строк сразу)
+        logger.info("\n🔍 Начинаю парсинг данных со строки %s...", start_row + 1)
         
-        # Переменные для отслеживания текущего состояния
-        current_seller = None
-        current_seller_normalized = None
-        current_sale_type = None
-        in_seller_block = False
-        
-        valid_sellers = 0
-        items_count_total = 0
-        
-        print(f"\n🔍 Начинаю парсинг данных со строки {start_row + 1}...")
-        
-        for i in range(start_row + 1, len(df)):
-            # Получаем данные из колонки A
-            cell_a = str(df.iloc[i, 0]).strip() if df.shape[1] > 0 else ""
-            
-            # Пропускаем пустые строки
-            if not cell_a or cell_a.lower() in ['', 'nan', 'none']:
-                if in_seller_block:
-                    in_seller_block = False
-                    current_seller = None
-                    current_seller_normalized = None
-                    current_sale_type = None
-                continue
-            
-            # Проверяем, является ли это валидным ФИО продавца
-            if is_valid_seller_name(cell_a, exclusions):
-                # НАЧАЛО НОВОГО ПРОДАВЦА
-                fio = cell_a
-                fio_normalized = ' '.join(fio.split()).upper()
-                current_seller = fio
-                current_seller_normalized = fio_normalized
-                current_sale_type = None
-                in_seller_block = True
-                valid_sellers += 1
-                
-                # Инициализируем нового продавца с ДЕТАЛИЗАЦИЕЙ
-                if fio_normalized not in sales_data:
-                    sales_data[fio_normalized] = {
-                        'department': "Не указан",
-                        'sales_by_type': {
-                            'Оптовая продажа': {
-                                'revenue': 0.0, 'profit': 0.0, 'items_count': 0,
-                                'bonus_items_count': 0, 'bonus_revenue': 0.0, 'bonus_profit': 0.0,
-                                'non_liquid_items_count': 0, 'non_liquid_revenue': 0.0, 'non_liquid_profit': 0.0,
-                                'regular_profit': 0.0, 'regular_revenue': 0.0  # ← ДОБАВЬ
-                            },
-                            'Розничная (по чекам)': {
-                                'revenue': 0.0, 'profit': 0.0, 'items_count': 0,
-                                'bonus_items_count': 0, 'bonus_revenue': 0.0, 'bonus_profit': 0.0,
-                                'non_liquid_items_count': 0, 'non_liquid_revenue': 0.0, 'non_liquid_profit': 0.0,
-                                'regular_profit': 0.0, 'regular_revenue': 0.0  # ← ДОБАВЬ
-                            },
-                            'Розничная (прочая)': {
-                                'revenue': 0.0, 'profit': 0.0, 'items_count': 0,
-                                'bonus_items_count': 0, 'bonus_revenue': 0.0, 'bonus_profit': 0.0,
-                                'non_liquid_items_count': 0, 'non_liquid_revenue': 0.0, 'non_liquid_profit': 0.0,
-                                'regular_profit': 0.0, 'regular_revenue': 0.0  # ← ДОБАВЬ
-                            }
-                        },
-                        'total_revenue': 0.0,
-                        'total_profit': 0.0,
-                        'total_items_count': 0,
-                        'total_bonus_items_count': 0,
-                        'total_bonus_revenue': 0.0,
-                        'total_bonus_profit': 0.0,
-                        'total_non_liquid_items_count': 0,
-                        'total_non_liquid_revenue': 0.0,
-                        'total_non_liquid_profit': 0.0,
-                        'original_name': fio,
-                        'row_number': i + 1
-                    }
-                
-                if valid_sellers <= 3:
-                    print(f"  ✅ Найден продавец {valid_sellers}: '{fio}' (строка {i + 1})")
-                
-                continue
-            
-            # Если мы в блоке продавца
-            if in_seller_block and current_seller_normalized and current_seller_normalized in sales_data:
-                
-                # Проверяем, является ли строка типом продаж
-                cell_a_lower = cell_a.lower()
-                if any(sale_type in cell_a_lower for sale_type in ['оптовая', 'розничная', 'продажа']):
-                    # Определяем тип продаж
-                    if 'оптовая' in cell_a_lower:
-                        current_sale_type = 'Оптовая продажа'
-                        if valid_sellers <= 3:
-                            print(f"    → Тип продаж: 'Оптовая продажа'")
-                    elif 'розничная' in cell_a_lower and 'по чек' in cell_a_lower:
-                        current_sale_type = 'Розничная (по чекам)'
-                    elif 'розничная' in cell_a_lower:
-                        current_sale_type = 'Розничная (прочая)'
-                    else:
-                        current_sale_type = None
-                    continue
-                
-                # Проверяем, является ли строка товаром (начинается с цифрового кода)
-                clean_cell_a = cell_a.replace(' ', '').replace('-', '').replace('.', '')
-                if clean_cell_a.isdigit() and 3 <= len(clean_cell_a) <= 8:
-                    # ЭТО ТОВАР - обрабатываем
-                    item_code = clean_cell_a
-                    
-                    # Получаем количество единиц (колонка D)
-                    items_count = 0
-                    if df.shape[1] > 3:
-                        qty_cell = str(df.iloc[i, 3]).strip()
-                        if qty_cell and qty_cell.lower() not in ['', 'nan', 'none']:
-                            try:
-                                qty_cell_clean = qty_cell.replace(',', '.').replace(' ', '')
-                                items_count = float(qty_cell_clean)
-                            except:
-                                items_count = 0
-                    
-                    # Получаем выручку (колонка F)
-                    revenue = 0.0
-                    if df.shape[1] > 5:
-                        revenue_cell = str(df.iloc[i, 5]).strip()
-                        if revenue_cell and revenue_cell.lower() not in ['', 'nan', 'none']:
-                            try:
-                                revenue_cell_clean = revenue_cell.replace(',', '.').replace(' ', '')
-                                revenue = float(revenue_cell_clean)
-                            except:
-                                revenue = 0.0
-                    
-                    # Получаем прибыль (колонка G)
-                    profit = 0.0
-                    if df.shape[1] > 6:
-                        profit_cell = str(df.iloc[i, 6]).strip()
-                        if profit_cell and profit_cell.lower() not in ['', 'nan', 'none']:
-                            try:
-                                profit_cell_clean = profit_cell.replace(',', '.').replace(' ', '')
-                                profit = float(profit_cell_clean)
-                            except:
-                                profit = 0.0
-                    
-                    # Определяем тип товара по коду
-                    if item_code in bonus_items_set:
-                        item_type = 'bonus'
-                    elif item_code in non_liquid_items_set:
-                        item_type = 'non_liquid'
-                    else:
-                        item_type = 'regular'
-                    
-                    # Если нет типа продаж, используем "Оптовая продажа" по умолчанию
-                    if not current_sale_type:
-                        current_sale_type = 'Оптовая продажа'
-                    
-                    # Получаем данные текущего типа продаж (ПОСЛЕ определения типа продаж!)
-                    type_data = sales_data[current_seller_normalized]['sales_by_type'][current_sale_type]
-                    
-                    # Общие показатели типа продаж
-                    type_data['items_count'] += items_count
-                    type_data['revenue'] += revenue
-                    type_data['profit'] += profit
-                    
-                    # РАЗДЕЛЕНИЕ ПО ТИПАМ ТОВАРОВ (ДОБАВЛЕНО)
-                    if item_type == 'regular':
-                        type_data['regular_revenue'] = type_data.get('regular_revenue', 0) + revenue
-                        type_data['regular_profit'] = type_data.get('regular_profit', 0) + profit
-                    
-                    elif item_type == 'bonus':
-                        type_data['bonus_items_count'] += items_count
-                        type_data['bonus_revenue'] += revenue
-                        type_data['bonus_profit'] += profit
-                        
-                        sales_data[current_seller_normalized]['total_bonus_items_count'] += items_count
-                        sales_data[current_seller_normalized]['total_bonus_revenue'] += revenue
-                        sales_data[current_seller_normalized]['total_bonus_profit'] += profit
-                    
-                    elif item_type == 'non_liquid':
-                        type_data['non_liquid_items_count'] += items_count
-                        type_data['non_liquid_revenue'] += revenue
-                        type_data['non_liquid_profit'] += profit  # ← Теперь сохраняем прибыль неликвидов
-                        
-                        sales_data[current_seller_normalized]['total_non_liquid_items_count'] += items_count
-                        sales_data[current_seller_normalized]['total_non_liquid_revenue'] += revenue
-                        sales_data[current_seller_normalized]['total_non_liquid_profit'] += profit
-                    
-                    # Общие показатели продавца
-                    sales_data[current_seller_normalized]['total_revenue'] += revenue
-                    sales_data[current_seller_normalized]['total_profit'] += profit
-                    sales_data[current_seller_normalized]['total_items_count'] += items_count
-                    
-                    items_count_total += items_count
-                    
-                    # Отладочный вывод для первых товаров
-                    if items_count_total <= 10:
-                        item_name = str(df.iloc[i, 1]).strip()[:30] if df.shape[1] > 1 else "нет названия"
-                        type_text = {
-                            'regular': 'обычный',
-                            'bonus': 'БОНУС',
-                            'non_liquid': 'НЕЛИКВИД'
-                        }.get(item_type, '?')
-                        print(f"    → Товар: {item_code} ({item_name}) - {items_count} шт. = {revenue:,.0f} руб. [{type_text}]")
-                    
-                    continue
-            
-            # Если строка содержит название фирмы или отдела (заглавные буквы)
-            if cell_a.isupper() and len(cell_a) > 5:
-                # Вероятно, это фирма или отдел - конец блока продавца
-                in_seller_block = False
-                current_seller = None
-                current_seller_normalized = None
-                current_sale_type = None
+        facts = build_sales_facts(df, start_row + 1, bonus_items_set, non_liquid_items_set, exclusions)
+        sales_data = aggregate_sales_facts(facts)
+        valid_sellers = facts.attrs['valid_sellers']
+        items_count_total = float(facts['items_count'].sum()) if len(facts) else 0
         
         # Статистика
-        print(f"\n✅ СТАТИСТИКА ПАРСИНГА:")
-        print(f"   • Валидных продавцов: {valid_sellers}")
-        print(f"   • Уникальных продавцов: {len(sales_data)}")
-        print(f"   • Общая выручка: {sum(s['total_revenue'] for s in sales_data.values()):,.0f} руб.")
-        print(f"   • Всего единиц товара: {items_count_total:,.0f} шт.")
-        print(f"   • Бонусных товаров: {sum(s['total_bonus_items_count'] for s in sales_data.values()):,.0f} шт.")
-        print(f"   • Неликвидных товаров: {sum(s['total_non_liquid_items_count'] for s in sales_data.values()):,.0f} шт.")
+        logger.info("\n✅ СТАТИСТИКА ПАРСИНГА:")
+        logger.info("   • Валидных продавцов: %s", valid_sellers)
+        logger.info("   • Уникальных продавцов: %s", len(sales_data))
+        logger.info("   • Общая выручка: %.0f руб.", sum(s['total_revenue'] for s in sales_data.values()))
+        logger.info("   • Всего единиц товара: %.0f шт.", items_count_total)
+        logger.info("   • Бонусных товаров: %.0f шт.",
+                    sum(s['total_bonus_items_count'] for s in sales_data.values()))
+        logger.info("   • Неликвидных товаров: %.0f шт.",
+                    sum(s['total_non_liquid_items_count'] for s in sales_data.values()))
         
         # Показываем примеры
         if sales_data:
-            print(f"\n📋 ПРИМЕРЫ ПРОДАВЦОВ (первые 3):")
+            logger.info("\n📋 ПРИМЕРЫ ПРОДАВЦОВ (первые 3):")
             for i, (key, data) in enumerate(list(sales_data.items())[:3], 1):
                 name = data.get('original_name', key)
                 revenue = data.get('total_revenue', 0)
@@ -382,10 +456,10 @@ def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclu
                 non_liquid_items = data.get('total_non_liquid_items_count', 0)
                 non_liquid_revenue = data.get('total_non_liquid_revenue', 0)
                 
-                print(f"\n  {i}. {name}")
-                print(f"     Выручка: {revenue:,.0f} руб. | Прибыль: {profit:,.0f} руб.")
-                print(f"     Бонусы: {bonus_items} шт. = {bonus_revenue:,.0f} руб.")
-                print(f"     Неликвиды: {non_liquid_items} шт. = {non_liquid_revenue:,.0f} руб.")
+                logger.info("\n  %s. %s", i, name)
+                logger.info("     Выручка: %.0f руб. | Прибыль: %.0f руб.", revenue, profit)
+                logger.info("     Бонусы: %s шт. = %.0f руб.", bonus_items, bonus_revenue)
+                logger.info("     Неликвиды: %s шт. = %.0f руб.", non_liquid_items, non_liquid_revenue)
                 
                 # Детали по типам продаж
                 for sale_type, type_data in data['sales_by_type'].items():
@@ -398,68 +472,33 @@ def parse_sales_analysis(file_path, bonus_items_set, non_liquid_items_set, exclu
                         non_liquid_count = type_data['non_liquid_items_count']
                         non_liquid_rev = type_data['non_liquid_revenue']
                         
-                        print(f"     • {sale_type}: {items} шт. = {type_revenue:,.0f} руб.")
+                        logger.info("     • %s: %s шт. = %.0f руб.", sale_type, items, type_revenue)
                         if bonus_count > 0:
-                            print(f"       Бонусы: {bonus_count} шт. = {bonus_rev:,.0f} руб.")
+                            logger.info("       Бонусы: %s шт. = %.0f руб.", bonus_count, bonus_rev)
                         if non_liquid_count > 0:
-                            print(f"       Неликвиды: {non_liquid_count} шт. = {non_liquid_rev:,.0f} руб.")
+                            logger.info("       Неликвиды: %s шт. = %.0f руб.",
+                                        non_liquid_count, non_liquid_rev)
         else:
-            print(f"\n⚠️  ВНИМАНИЕ: Нет данных о продавцах")
+            logger.warning("\n⚠️  ВНИМАНИЕ: Нет данных о продавцах")
         
         # Преобразуем данные в формат для нового расчета
-        print(f"\n🔄 Преобразование данных для нового расчета...")
-        
-        for seller_key, seller_data in sales_data.items():
-            # Переименовываем поля для ясности
-            sales_by_type = seller_data['sales_by_type']
-            
-            # 1. Розничная (по чекам) - для личного показателя
-            розничная_чеки = sales_by_type.get('Розничная (по чекам)', {})
-            seller_data['продажи_чеки'] = {
-                'выручка': розничная_чеки.get('revenue', 0),
-                'прибыль': розничная_чеки.get('profit', 0),
-                'прибыль_обычная': розничная_чеки.get('regular_profit', 0),
-                'прибыль_бонусная': розничная_чеки.get('bonus_profit', 0),
-                'выручка_неликвидов': розничная_чеки.get('non_liquid_revenue', 0),
-                'прибыль_неликвидов': розничная_чеки.get('non_liquid_profit', 0)
-            }
-            
-            # 2. Оптовая продажа
-            оптовая = sales_by_type.get('Оптовая продажа', {})
-            seller_data['продажи_опт'] = {
-                'прибыль': оптовая.get('profit', 0),
-                'выручка': оптовая.get('revenue', 0),
-                'items_count': оптовая.get('items_count', 0)
-            }
-            
-            # 3. Розничная (прочая)
-            розничная_прочая = sales_by_type.get('Розничная (прочая)', {})
-            seller_data['продажи_прочая'] = {
-                'выручка': розничная_прочая.get('revenue', 0),
-                'прибыль': розничная_прочая.get('profit', 0),
-                'items_count': розничная_прочая.get('items_count', 0)
-            }
-            
-            # Итоговые поля для обратной совместимости
-            seller_data['total_revenue'] = seller_data.get('total_revenue', 0)
-            seller_data['total_profit'] = seller_data.get('total_profit', 0)
-            seller_data['total_bonus_profit'] = seller_data.get('total_bonus_profit', 0)
-            seller_data['total_non_liquid_revenue'] = seller_data.get('total_non_liquid_revenue', 0)
+        logger.info("\n🔄 Преобразование данных для нового расчета...")
+        add_calculation_views(sales_data)
         
         # Выводим статистику по типам
-        print(f"📊 СТАТИСТИКА ПО ТИПАМ ПРОДАЖ:")
+        logger.info("📊 СТАТИСТИКА ПО ТИПАМ ПРОДАЖ:")
         total_чеки = sum(s['продажи_чеки']['выручка'] for s in sales_data.values())
         total_опт = sum(s['продажи_опт']['прибыль'] for s in sales_data.values())
         total_прочая = sum(s['продажи_прочая']['прибыль'] for s in sales_data.values())
         
-        print(f"   • Розничная (по чекам): {total_чеки:,.0f} руб.")
-        print(f"   • Оптовая продажа: {total_опт:,.0f} руб.")
-        print(f"   • Розничная прочая: {total_прочая:,.0f} руб.")
+        logger.info("   • Розничная (по чекам): %.0f руб.", total_чеки)
+        logger.info("   • Оптовая продажа: %.0f руб.", total_опт)
+        logger.info("   • Розничная прочая: %.0f руб.", total_прочая)
         
+        if return_facts:
+            return sales_data, facts
         return sales_data
         
     except Exception as e:
-        import traceback
-        print(f"❌ Ошибка парсинга: {str(e)}")
-        traceback.print_exc()
-        return {}
+        logger.exception("❌ Ошибка парсинга: %s", e)
+        return ({}, None) if return_facts else {}
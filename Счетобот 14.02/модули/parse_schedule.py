@@ -1,9 +1,130 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime
-import re
+from datetime import datetime, date
 import warnings
+from модули.columnar_store import read_input_frame
+from модули.report_period import period_dates
 warnings.filterwarnings('ignore')
 
+# Версия формата результата для кэша парсинга (увеличивать при изменении вывода)
+PARSER_VERSION = 4
+
+# Коды отметок в ячейках графика (результат классификации ячейки)
+MARK_NONE = 0
+MARK_NO_SHOW = 1    # Н - невыход
+MARK_VACATION = 2   # О, ОТ - отпуск
+MARK_WEEKEND = 3    # В, ВЫ - выходной
+MARK_SICK = 4       # Б, БЛ - больничный
+MARK_WORK = 5       # рабочий день (в ячейке часы)
+MARK_OTHER = 6      # прочие отметки (РН, Н/Я и т.д.)
+
+
+def _classify_mark(cell):
+    """Классифицирует одну ячейку дня (значение уже обрезано и в верхнем регистре)"""
+    if not cell or cell in ['NAN', 'NONE']:
+        return MARK_NONE
+    # ТОЛЬКО одна буква "Н" (не "РН", не "Н/Я" и т.д.)
+    if cell == 'Н':
+        return MARK_NO_SHOW
+    if len(cell) <= 2:
+        if 'О' in cell:  # О, ОТ
+            return MARK_VACATION
+        if 'В' in cell:  # В, ВЫ
+            return MARK_WEEKEND
+        if 'Б' in cell:
+            return MARK_SICK
+    return MARK_NONE
+
+
+def _is_fio_cell(cell):
+    """Похоже ли значение ячейки (уже обрезанное) на ФИО"""
+    return bool(
+        cell and cell.lower() not in ['nan', 'none'] and
+        len(cell.split()) >= 2 and  # хотя бы 2 слова
+        not any(c.isdigit() for c in cell[:5]) and  # не начинается с цифр
+        not cell.lower().startswith('итого')
+    )
+
+
+def _parse_hours(cell):
+    """Число часов из ячейки (пустые и нечисловые значения дают 0)"""
+    try:
+        return float(cell.replace(',', '.')) if cell and cell.lower() not in ['nan', 'none'] else 0.0
+    except ValueError:
+        return 0.0
+
+
+def _find_day_axis(codes, texts, header_row, hours_col):
+    """
+    Находит колонки дней месяца в строках заголовка
+
+    Берем строку (заголовок + 2 следующие), где больше всего ячеек с числами 1..31.
+    Возвращает (индексы колонок, номера дней).
+    """
+    def day_number(t):
+        t = t.strip()
+        if t.endswith('.0'):
+            t = t[:-2]
+        return int(t) if t.isdigit() and 1 <= int(t) <= 31 else 0
+
+    day_of = np.array([day_number(t) for t in texts], dtype=np.int16)
+    header_days = day_of[codes[header_row:header_row + 3]]
+    header_days[:, hours_col] = 0
+    if header_days.size == 0 or not header_days.any():
+        return np.array([], dtype=int), []
+
+    best = header_days[(header_days > 0).sum(axis=1).argmax()]
+    day_cols = np.flatnonzero(best)
+    return day_cols, best[day_cols].tolist()
+
+
+def _day_dates(period, days):
+    """
+    Даты дней по периоду "С дд.мм.гг по ..." или "С дд.мм.гггг по ..."
+    (разбор - report_period.period_dates; переход через месяц учитывается)
+    """
+    try:
+        start, _ = period_dates(period)
+    except ValueError:
+        return [None] * len(days)
+
+    month, year = start.month, start.year
+    dates = []
+    previous = 0
+    for day in days:
+        if day < previous:
+            month, year = (1, year + 1) if month == 12 else (month + 1, year)
+        previous = day
+        try:
+            dates.append(date(year, month, day))
+        except ValueError:
+            dates.append(None)
+    return dates
+
+
+def _factorize_grid(df):
+    """
+    Кодирует всю таблицу как матрицу индексов уникальных значений
+
+    Строковые проверки выполняются один раз на уникальное значение, а результат
+    раскладывается на матрицу индексированием numpy. Пустые ячейки - пустая строка.
+    """
+    codes, uniques = pd.factorize(df.to_numpy(dtype=object).ravel())
+    texts = np.array([str(u) for u in uniques] + [''], dtype=object)
+    codes = np.where(codes < 0, len(texts) - 1, codes).reshape(df.shape)
+    return codes, texts
+
+
+def _unique_mask(texts, predicate):
+    """Булев признак для каждого уникального значения"""
+    return np.fromiter((predicate(t) for t in texts), dtype=bool, count=len(texts))
+
+
+def _first_true(mask):
+    """Индекс первого True в векторе или -1"""
+    return int(mask.argmax()) if mask.any() else -1
+
+
 def parse_schedule(file_path):
     """
     Парсит график из Excel-файла.
@@ -15,116 +136,70 @@ def parse_schedule(file_path):
     
     try:
         # Загружаем файл без заголовков
-        df = pd.read_excel(file_path, header=None, dtype=str)
+        df = read_input_frame(file_path, header=None, dtype=str)
+        codes, texts = _factorize_grid(df)
+        lowered = np.array([t.lower() for t in texts], dtype=object)
         
         # 1. Находим строку с периодом (ищем "С ... по ...")
         period = ""
         period_row = -1
         
-        for i in range(min(10, len(df))):
-            for j in range(df.shape[1]):
-                cell = str(df.iloc[i, j])
-                if 'с ' in cell.lower() and ' по ' in cell.lower():
-                    period = cell.strip()
-                    period_row = i
-                    break
-            if period:
-                break
+        is_period = _unique_mask(lowered, lambda t: 'с ' in t and ' по ' in t)
+        period_cells = is_period[codes[:10]]
+        period_row = _first_true(period_cells.any(axis=1))
+        if period_row != -1:
+            period = texts[codes[period_row, period_cells[period_row].argmax()]].strip()
         
         # 2. Находим строку с заголовком "Сотрудник" или "ФИО"
-        header_row = -1
-        for i in range(len(df)):
-            for j in range(df.shape[1]):
-                cell = str(df.iloc[i, j]).lower()
-                if 'сотрудник' in cell or 'фио' in cell:
-                    header_row = i
-                    break
-            if header_row != -1:
-                break
+        is_header = _unique_mask(lowered, lambda t: 'сотрудник' in t or 'фио' in t)
+        header_row = _first_true(is_header[codes].any(axis=1))
         
         if header_row == -1:
             return {"error": "Не найдена строка с заголовком 'Сотрудник' или 'ФИО'"}
         
-        # 3. Находим колонку с итоговыми часами
-        hours_col = -1
-        for j in range(df.shape[1]):
-            # Проверяем несколько строк после заголовка
-            for check_row in range(header_row, min(header_row + 3, len(df))):
-                cell = str(df.iloc[check_row, j]).lower()
-                if 'итого' in cell and 'час' in cell:
-                    hours_col = j
-                    break
-            if hours_col != -1:
-                break
+        # 3. Находим колонку с итоговыми часами (проверяем несколько строк после заголовка)
+        is_hours_header = _unique_mask(lowered, lambda t: 'итого' in t and 'час' in t)
+        hours_col = _first_true(is_hours_header[codes[header_row:header_row + 3]].any(axis=0))
         
         if hours_col == -1:
             return {"error": "Не найдена колонка с итоговыми часами"}
         
-        # 4. Собираем данные сотрудников
-        employees_data = []
-        
-        # Начинаем со строки после заголовка
-        for i in range(header_row + 1, len(df)):
-            # Получаем ФИО (первая непустая ячейка в строке)
-            fio = ""
-            for j in range(df.shape[1]):
-                cell = str(df.iloc[i, j]).strip()
-                if cell and cell.lower() not in ['nan', 'none', '']:
-                    # Проверяем, что это похоже на ФИО (не дата, не число часов)
-                    if (len(cell.split()) >= 2 and  # хотя бы 2 слова
-                        not any(c.isdigit() for c in cell[:5]) and  # не начинается с цифр
-                        not cell.lower().startswith('итого')):
-                        fio = cell
-                        break
-            
-            if not fio:  # Если ФИО не найдено, пропускаем строку
-                continue
-            
-            # Получаем часы
-            try:
-                hours_cell = str(df.iloc[i, hours_col])
-                total_hours = float(hours_cell.replace(',', '.')) if hours_cell and hours_cell.lower() not in ['nan', 'none', ''] else 0.0
-            except:
-                total_hours = 0.0
-            
-            # Подсчитываем выходные, отпуск и невыходы (анализируем все ячейки строки)
-            weekend_days = 0
-            vacation_days = 0
-            no_show_days = 0  # Невыходы
-            sick_days = 0
-            
-            for j in range(df.shape[1]):
-                if j == hours_col:  # Пропускаем колонку с часами
-                    continue
-                    
-                cell = str(df.iloc[i, j]).strip().upper()
-                if not cell or cell in ['NAN', 'NONE', '']:
-                    continue
-                
-                # Учитываем различные варианты обозначений
-                # ТОЛЬКО одна буква "Н" (не "РН", не "Н/Я" и т.д.)
-                if cell == 'Н':
-                    no_show_days += 1
-                elif 'О' in cell and len(cell) <= 2:  # О, ОТ, ОТП
-                    vacation_days += 1
-                elif 'В' in cell and len(cell) <= 2:  # В, ВЫХ
-                    weekend_days += 1
-                elif 'Б' in cell and len(cell) <= 2:
-                    sick_days += 1
-            
-            employees_data.append({
-                'ФИО': fio,
-                'Часы_всего': total_hours,
-                'Выходные_дни': weekend_days,
-                'Отпуск_дни': vacation_days,
-                'Невыход_дни': no_show_days,
-                'Больничные_дни': sick_days
-            })
-        
-        # Создаем DataFrame
-        if employees_data:
-            employees_df = pd.DataFrame(employees_data)
-        else:
+        # 4. Собираем данные сотрудников (все строки после заголовка одной матрицей)
+        body = codes[header_row + 1:]
+        stripped = np.array([t.strip() for t in texts], dtype=object)
+        
+        # ФИО - первая ячейка строки, похожая на ФИО; строки без ФИО пропускаем
+        fio_cells = _unique_mask(stripped, _is_fio_cell)[body]
+        has_fio = fio_cells.any(axis=1)
+        fio_col = fio_cells.argmax(axis=1)
+        body = body[has_fio]
+        fio_col = fio_col[has_fio]
+        
+        # Отметки дней: классифицируем уникальные значения, колонку часов не учитываем
+        marks = np.array([_classify_mark(t.upper()) for t in stripped], dtype=np.int8)[body]
+        marks[:, hours_col] = MARK_NONE
+        
+        hours = np.array([_parse_hours(t) for t in texts], dtype=float)
+        
+        # 5. Посуточная матрица: коды отметок (int8) и часы (float32) по дням месяца
+        day_cols, days = _find_day_axis(codes, texts, header_row, hours_col)
+        day_cells = body[:, day_cols]
+        day_hours = hours[day_cells].astype(np.float32)
+        attendance = marks[:, day_cols]
+        has_text = _unique_mask(stripped, lambda t: bool(t) and t.lower() not in ['nan', 'none'])[day_cells]
+        attendance[(attendance == MARK_NONE) & (day_hours > 0)] = MARK_WORK
+        attendance[(attendance == MARK_NONE) & (day_hours <= 0) & has_text] = MARK_OTHER
+        
+        employees_df = pd.DataFrame({
+            'ФИО': stripped[body[np.arange(len(body)), fio_col]],
+            'Часы_всего': hours[body[:, hours_col]],
+            'Выходные_дни': (marks == MARK_WEEKEND).sum(axis=1),
+            'Отпуск_дни': (marks == MARK_VACATION).sum(axis=1),
+            'Невыход_дни': (marks == MARK_NO_SHOW).sum(axis=1),
+            'Больничные_дни': (marks == MARK_SICK).sum(axis=1)
+        })
+        
+        if employees_df.empty:
             employees_df = pd.DataFrame(columns=['ФИО', 'Часы_всего', 'Выходные_дни', 'Отпуск_дни', 'Невыход_дни'])
         
         return {
@@ -132,7 +207,12 @@ def parse_schedule(file_path):
             'employees_df': employees_df,
             'period_row': period_row,
             'header_row': header_row,
-            'hours_col': hours_col
+            'hours_col': hours_col,
+            'attendance': attendance,   # сотрудники x дни, коды MARK_*
+            'day_hours': day_hours,     # сотрудники x дни, часы
+            'days': days,               # номера дней (колонки матриц)
+            'dates': _day_dates(period, days),
+            'day_cols': day_cols.tolist()
         }
         
     except Exception as e:
@@ -153,6 +233,10 @@ def print_schedule_results(result):
     print(f"📊 Найдено сотрудников: {len(result['employees_df'])}")
     print(f"🔍 Строка заголовка: {result['header_row'] + 1}")
     print(f"🔍 Колонка с часами: {result['hours_col'] + 1}")
+    if 'attendance' in result:
+        attendance = result['attendance']
+        print(f"🗓️  Посуточная матрица: {attendance.shape[0]} x {attendance.shape[1]} дней "
+              f"({(attendance.nbytes + result['day_hours'].nbytes) / 1024:.1f} КБ)")
     
     print("\n" + "=" * 70)
     print("ТАБЛИЦА СОТРУДНИКОВ")
@@ -1,6 +1,13 @@
 # parse_staff_universal.py
 import pandas as pd
-from collections import defaultdict, Counter
+
+from модули.columnar_store import read_input_frame
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Версия формата результата для кэша парсинга (увеличивать при изменении вывода)
+PARSER_VERSION = 1
 
 def normalize_name(full_name):
     """Нормализует ФИО для сравнения"""
@@ -20,19 +27,17 @@ def parse_staff_departments(file_path):
     Колонка 4: Название отдела (любое)
     """
     
-    print("=" * 80)
-    print("УНИВЕРСАЛЬНЫЙ ПАРСЕР ФАЙЛА СОТРУДНИКОВ")
-    print("=" * 80)
+    logger.info("%s\nУНИВЕРСАЛЬНЫЙ ПАРСЕР ФАЙЛА СОТРУДНИКОВ\n%s", "=" * 80, "=" * 80)
     
     try:
         # Читаем файл
-        df = pd.read_excel(file_path, dtype=str)
+        df = read_input_frame(file_path, dtype=str)
         
-        print(f"📁 Файл: {file_path}")
-        print(f"📊 Размер: {len(df)} строк × {len(df.columns)} колонок")
-        print("\n🔍 Обнаруженные колонки:")
+        logger.info("📁 Файл: %s", file_path)
+        logger.info("📊 Размер: %s строк × %s колонок", len(df), len(df.columns))
+        logger.debug("\n🔍 Обнаруженные колонки:")
         for i, col in enumerate(df.columns):
-            print(f"  {i+1:2}. '{col}'")
+            logger.debug("  %2s. '%s'", i + 1, col)
         
         # СТРАТЕГИЯ: Определяем колонки по содержимому и позиции
         col_mapping = {}
@@ -65,7 +70,7 @@ def parse_staff_departments(file_path):
             
             if total_count > 0 and fio_count / total_count > 0.7:  # >70% значений похожи на ФИО
                 col_mapping['ФИО'] = col
-                print(f"✅ Колонка '{col}' определена как 'ФИО'")
+                logger.info("✅ Колонка '%s' определена как 'ФИО'", col)
                 break
         
         # 2. Определяем остальные колонки по порядку и содержимому
@@ -109,14 +114,14 @@ def parse_staff_departments(file_path):
                 col_mapping['Директор'] = remaining_cols[1] 
                 col_mapping['Отдел'] = remaining_cols[2]
                 
-                print(f"📋 Автоматическое сопоставление:")
-                print(f"  Колонка 2 ('{remaining_cols[0]}') → 'Филиал'")
-                print(f"  Колонка 3 ('{remaining_cols[1]}') → 'Директор'")
-                print(f"  Колонка 4 ('{remaining_cols[2]}') → 'Отдел'")
+                logger.debug("📋 Автоматическое сопоставление:")
+                logger.debug("  Колонка 2 ('%s') → 'Филиал'", remaining_cols[0])
+                logger.debug("  Колонка 3 ('%s') → 'Директор'", remaining_cols[1])
+                logger.debug("  Колонка 4 ('%s') → 'Отдел'", remaining_cols[2])
         
         # 3. Если не определили автоматически, используем ручное сопоставление
         if 'Филиал' not in col_mapping and len(df.columns) >= 4:
-            print("⚠️ Автоматическое определение не сработало, использую порядок колонок")
+            logger.warning("⚠️ Автоматическое определение не сработало, использую порядок колонок")
             col_mapping = {
                 'ФИО': df.columns[0],
                 'Филиал': df.columns[1],
@@ -135,78 +140,58 @@ def parse_staff_departments(file_path):
                     "col_mapping": col_mapping
                 }
         
-        print(f"\n✅ Окончательное сопоставление колонок:")
+        logger.info("\n✅ Окончательное сопоставление колонок:")
         for key, col in col_mapping.items():
-            print(f"  {key:15} → '{col}'")
+            logger.info("  %-15s → '%s'", key, col)
         
-        # 5. Обрабатываем данные
-        employees = []
-        branch_info = defaultdict(lambda: {'director': None, 'employees': [], 'departments': set()})
-        department_info = defaultdict(lambda: {'employees': [], 'branches': set()})
+        # 5. Обрабатываем данные (целыми колонками)
+        def column_text(key):
+            """Значения колонки как строки без краевых пробелов (пустая ячейка -> 'nan', как str(NaN))"""
+            if key not in col_mapping:
+                return pd.Series('', index=df.index, dtype=object)
+            return df[col_mapping[key]].astype(object).fillna('nan').astype(str).str.strip()
         
-        processed_count = 0
-        skipped_count = 0
+        def collapse_spaces(values):
+            """Удаляет лишние пробелы внутри значения, пустые -> 'Не указан'"""
+            return values.str.split().str.join(' ').where(values != '', 'Не указан')
         
-        for idx, row in df.iterrows():
-            # Получаем значения
-            fio_raw = str(row[col_mapping['ФИО']]).strip() if col_mapping['ФИО'] in row else ''
-            branch_raw = str(row[col_mapping['Филиал']]).strip() if col_mapping['Филиал'] in row else ''
-            dept_raw = str(row[col_mapping['Отдел']]).strip() if col_mapping['Отдел'] in row else ''
-            
-            # Получаем директора (если есть колонка)
-            director_raw = ''
-            if 'Директор' in col_mapping and col_mapping['Директор'] in row:
-                director_raw = str(row[col_mapping['Директор']]).strip()
-            
-            # Пропускаем пустые или некорректные строки
-            if (not fio_raw or fio_raw.lower() in ['nan', 'none', ''] or
-                len(fio_raw) < 2 or
-                fio_raw.lower() in ['фио', 'сотрудник', 'ф.и.о.']):
-                skipped_count += 1
-                continue
-            
-            # Очищаем данные
-            fio_clean = ' '.join(fio_raw.split())  # Удаляем лишние пробелы
-            branch_clean = ' '.join(branch_raw.split()) if branch_raw else 'Не указан'
-            dept_clean = ' '.join(dept_raw.split()) if dept_raw else 'Не указан'
-            director_clean = ' '.join(director_raw.split()) if director_raw else 'Не указан'
-            
-            # ФИЛЬТРАЦИЯ: Пропускаем сотрудников без отдела
-            if dept_clean == 'Не указан':
-                skipped_count += 1
-                print(f"  ⚠️  Строка {idx+2}: Пропущен сотрудник без отдела - '{fio_clean[:30]}'")
-                continue
-            
-            # Нормализуем ФИО для сравнения
-            fio_norm = normalize_name(fio_clean)
-            
-            # Создаем запись сотрудника
-            employee = {
-                'ФИО': fio_clean,
-                'ФИО_норм': fio_norm,
-                'Филиал': branch_clean,
-                'Отдел': dept_clean,
-                'Директор_филиала': director_clean,
-                'row_index': idx + 2  # +2 потому что Excel строки с 1 и header
-            }
-            employees.append(employee)
-            processed_count += 1
-            
-            # Обновляем информацию о филиале
-            if branch_clean != 'Не указан':
-                branch_info[branch_clean]['employees'].append(fio_norm)
-                branch_info[branch_clean]['departments'].add(dept_clean)
-                if director_clean and director_clean != 'Не указан':
-                    branch_info[branch_clean]['director'] = director_clean
-            
-            # Обновляем информацию об отделе
-            if dept_clean != 'Не указан':
-                department_info[dept_clean]['employees'].append(fio_norm)
-                department_info[dept_clean]['branches'].add(branch_clean)
+        fio_raw = column_text('ФИО')
+        branch_raw = column_text('Филиал')
+        dept_raw = column_text('Отдел')
+        director_raw = column_text('Директор')
+        
+        # Пропускаем пустые или некорректные строки
+        fio_lower = fio_raw.str.lower()
+        invalid = (fio_lower.isin(['nan', 'none', '', 'фио', 'сотрудник', 'ф.и.о.']) |
+                   (fio_raw.str.len() < 2))
+        
+        fio_clean = fio_raw.str.split().str.join(' ')
+        branch_clean = collapse_spaces(branch_raw)
+        dept_clean = collapse_spaces(dept_raw)
+        director_clean = collapse_spaces(director_raw)
+        
+        # ФИЛЬТРАЦИЯ: Пропускаем сотрудников без отдела
+        no_department = ~invalid & (dept_clean == 'Не указан')
+        for idx, fio in fio_clean[no_department].items():
+            logger.warning("  ⚠️  Строка %s: Пропущен сотрудник без отдела - '%s'", idx + 2, fio[:30])
         
-        print(f"\n📊 ОБРАБОТКА ДАННЫХ:")
-        print(f"  ✓ Обработано строк: {processed_count}")
-        print(f"  ✗ Пропущено строк: {skipped_count}")
+        valid = ~invalid & ~no_department
+        processed_count = int(valid.sum())
+        skipped_count = len(df) - processed_count
+        
+        staff = pd.DataFrame({
+            'ФИО': fio_clean[valid],
+            'ФИО_норм': fio_clean[valid].str.upper(),  # нормализованное ФИО для сравнения
+            'Филиал': branch_clean[valid],
+            'Отдел': dept_clean[valid],
+            'Директор_филиала': director_clean[valid],
+            'row_index': df.index[valid.to_numpy()] + 2  # +2 потому что Excel строки с 1 и header
+        })
+        employees = staff.to_dict('records')
+        
+        logger.info("\n📊 ОБРАБОТКА ДАННЫХ:")
+        logger.info("  ✓ Обработано строк: %s", processed_count)
+        logger.info("  ✗ Пропущено строк: %s", skipped_count)
         
         if processed_count == 0:
             return {
@@ -216,17 +201,28 @@ def parse_staff_departments(file_path):
                 "skipped": skipped_count
             }
         
-        # 6. Формируем результат
-        branches = sorted(branch_info.keys())
-        departments = sorted(department_info.keys())
+        # 6. Формируем результат (группировки - groupby, порядок как при построчном обходе)
+        with_branch = staff[staff['Филиал'] != 'Не указан']
+        by_branch = with_branch.groupby('Филиал', sort=False)
+        by_department = staff.groupby('Отдел', sort=False)
+        
+        branches = sorted(by_branch.groups)
+        departments = sorted(by_department.groups)
+        
+        # Директор филиала - последний указанный в файле
+        directors = (with_branch[with_branch['Директор_филиала'] != 'Не указан']
+                     .groupby('Филиал', sort=False)['Директор_филиала'].last())
         
         # Создаем удобные структуры
-        branch_directors = {b: info['director'] for b, info in branch_info.items()}
-        departments_by_branch = {b: sorted(list(info['departments'])) for b, info in branch_info.items()}
+        branch_directors = {b: directors.get(b) for b in by_branch.groups}
+        departments_by_branch = {b: sorted(set(depts)) for b, depts in by_branch['Отдел'].unique().items()}
+        branch_employees = by_branch['ФИО_норм'].agg(list)
+        department_employees = by_department['ФИО_норм'].agg(list)
+        department_branches = by_department['Филиал'].unique()
         
         # Статистика
-        branch_counts = Counter(e['Филиал'] for e in employees)
-        dept_counts = Counter(e['Отдел'] for e in employees)
+        branch_counts = {b: int(n) for b, n in staff.groupby('Филиал', sort=False).size().items()}
+        dept_counts = {d: int(n) for d, n in by_department.size().items()}
         
         result = {
             "success": True,
@@ -244,19 +240,19 @@ def parse_staff_departments(file_path):
             
             # Группировки
             "grouping": {
-                "by_branch": {b: branch_info[b]['employees'] for b in branches},
-                "by_department": {d: department_info[d]['employees'] for d in departments},
+                "by_branch": {b: branch_employees[b] for b in branches},
+                "by_department": {d: department_employees[d] for d in departments},
                 "departments_by_branch": departments_by_branch,
                 "branch_directors": branch_directors,
-                "branches_by_department": {d: sorted(list(department_info[d]['branches'])) for d in departments}
+                "branches_by_department": {d: sorted(set(department_branches[d])) for d in departments}
             },
             
             # Статистика
             "statistics": {
                 "branches": branches,
                 "departments": departments,
-                "employees_per_branch": dict(branch_counts),
-                "employees_per_department": dict(dept_counts),
+                "employees_per_branch": branch_counts,
+                "employees_per_department": dept_counts,
                 "avg_employees_per_branch": len(employees) / len(branches) if branches else 0,
                 "avg_employees_per_department": len(employees) / len(departments) if departments else 0
             },
@@ -368,6 +364,8 @@ def print_detailed_report(result):
 # Основная функция
 def main():
     """Основная функция для тестирования"""
+    from модули.log_setup import configure_logging
+    configure_logging()
     
     # Укажите путь к файлу
     FILE_PATH = "Сотрудники по отделам.xlsx"
@@ -1,7 +1,14 @@
+import logging
 import pandas as pd
 import re
-from datetime import datetime
-import math
+
+from модули.columnar_store import read_input_frame
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Версия формата результата для кэша парсинга (увеличивать при изменении вывода)
+PARSER_VERSION = 3
 
 def normalize_department_name(name):
     """Нормализует название отдела для точного сравнения"""
@@ -19,52 +26,151 @@ def normalize_department_name(name):
     
     return name
 
+# Колонки с числами: ключ настройки -> значение для пустой ячейки
+# (None - оставляем NaN, как и раньше давал float('nan') для пустой строки)
+NUMERIC_COLUMNS = {
+    'базовая_часть': None,
+    'средняя_зп': None,
+    'минималка': None,
+    'неликвид_процент': None,
+    'коэф_обычных': None,
+    'коэф_бонусных': None,
+    'коэф_неликвидов': None,
+    'коэф_оптовых': None,
+}
+GUARANTEE_KEYS = ['гарантия_1', 'гарантия_2', 'гарантия_3', 'гарантия_4', 'гарантия_5']
+MAX_COLUMNS = 18  # A:R
+
+# Текст ячеек, который pd.read_excel по умолчанию читает как пропуск (na_values pandas) -
+# потоковое чтение дает те же пропуски
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+
+def _cell_to_text(cell):
+    """
+    Ячейка openpyxl -> строка, как при pd.read_excel(dtype=str)
+
+    Ошибки Excel (#N/A, #DIV/0!, #REF!) и строки пропусков pandas
+    (NA, None, NULL, n/a, ...) -> None: read_excel читал их как NaN
+    """
+    value = cell.value
+    if value is None or cell.data_type == 'e':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value)
+    return None if text in NA_STRINGS else text
+
+
+def _stream_xlsx(file_path, sheet_name=0):
+    """Потоковое чтение колонок A:R листа .xlsx в DataFrame строк"""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[sheet_name] if isinstance(sheet_name, int) else wb[sheet_name]
+        ws.reset_dimensions()  # размеры в файле бывают неверными
+        rows = [
+            [_cell_to_text(cell) for cell in row]
+            for row in ws.iter_rows(max_col=MAX_COLUMNS)
+        ]
+    finally:
+        wb.close()
+
+    # Пустые строки в конце листа не нужны (как и в read_excel)
+    while rows and all(v is None for v in rows[-1]):
+        rows.pop()
+    width = max((len(r) for r in rows), default=0)
+    return pd.DataFrame([r + [None] * (width - len(r)) for r in rows], dtype=object)
+
+
+def read_urs_sheet(file_path, sheet_name=0):
+    """
+    Читает лист УРС за один проход
+
+    Для .xlsx - потоковое чтение openpyxl (read_only, values_only): таблица A:R
+    и ячейка I2 берутся из одного и того же прохода по строкам.
+    Для остальных форматов (.xls) - pd.read_excel, I2 берется из той же таблицы.
+    Повторные чтения того же файла - из колоночной копии (columnar_store).
+
+    Возвращает (DataFrame со строками, значение I2)
+    """
+    if str(file_path).lower().endswith(('.xlsx', '.xlsm')):
+        df = read_input_frame(file_path, reader=_stream_xlsx, sheet_name=sheet_name)
+    else:
+        df = read_input_frame(file_path, sheet_name=sheet_name, dtype=str, header=None, usecols="A:R")
+
+    cell_i2 = df.iloc[1, 8] if df.shape[0] > 1 and df.shape[1] > 8 else None
+    if pd.isna(cell_i2):
+        cell_i2 = None
+
+    df = df.astype(object)
+    return df.where(df.notna(), None), cell_i2
+
+
+def _clean_numeric(values, empty_value=None):
+    """
+    Векторная очистка числовой колонки: '1 234,5' -> 1234.5
+
+    Нечисловые значения -> 0. Пустые ячейки -> empty_value (None - оставить NaN).
+    """
+    text = values.map(lambda v: 'nan' if v is None else str(v))
+    cleaned = text.str.replace(',', '.', regex=False).str.replace(' ', '', regex=False).str.strip()
+    numbers = pd.to_numeric(cleaned, errors='coerce').astype(float)
+
+    is_empty = cleaned.str.lower().isin(['nan', 'none', 'null', ''])
+    numbers = numbers.fillna(0.0)
+    if empty_value is None:
+        # float('nan') раньше давал NaN только для самой строки 'nan', пустая строка -> 0
+        numbers[cleaned.str.lower() == 'nan'] = float('nan')
+    else:
+        numbers[is_empty] = empty_value
+    return numbers
+
+
 def parse_urs_settings(file_path, sheet_name=0, report_period=None):
-    print(f"⚙️  Парсинг файла настроек (новая структура с %): {file_path}")
-    print(f"  📅 Отчётный период: {report_period}")
+    logger.info("⚙️  Парсинг файла настроек (новая структура с %%): %s", file_path)
+    if report_period:
+        logger.info("  📅 Отчётный период: %s", report_period)
     
     try:
-        # Читаем все колонки до R
-        df = pd.read_excel(file_path, sheet_name=sheet_name, dtype=str, header=None, usecols="A:R")
-        print(f"  📊 Размер: {len(df)} строк × {len(df.columns)} колонок")
+        # Читаем все колонки до R и ячейку I2 за один проход
+        df, cell_value = read_urs_sheet(file_path, sheet_name)
+        logger.info("  📊 Размер: %s строк × %s колонок", len(df), len(df.columns))
         
         # ===== 0. ЧТЕНИЕ ЯЧЕЙКИ I2 (НОВЫЙ "ОКЛАД") =====
-        print("  🔍 Чтение ячейки I2 (новый 'Оклад')...")
+        logger.info("  🔍 Чтение ячейки I2 (новый 'Оклад')...")
         оклад_I2 = 0
         try:
-            # Открываем файл отдельно для чтения ячейки I2
-            from openpyxl import load_workbook
-            wb = load_workbook(file_path, data_only=True)
-            ws = wb.active
-            
-            # Ячейка I2 (9-я колонка, 2-я строка)
-            cell_value = ws['I2'].value
             if cell_value is not None:
                 # Преобразуем в число
                 cell_str = str(cell_value).replace(',', '.').replace(' ', '').strip()
                 if cell_str and cell_str.lower() not in ['', 'nan', 'none', 'null']:
                     оклад_I2 = float(cell_str)
-                    print(f"  ✅ Найден 'Оклад' в ячейке I2: {оклад_I2:,.0f} руб.")
+                    logger.info("  ✅ Найден 'Оклад' в ячейке I2: %.0f руб.", оклад_I2)
                 else:
-                    print(f"  ⚠️  Ячейка I2 пустая или содержит: '{cell_value}'")
+                    logger.warning("  ⚠️  Ячейка I2 пустая или содержит: '%s'", cell_value)
             else:
-                print(f"  ⚠️  Ячейка I2 пустая")
+                logger.warning("  ⚠️  Ячейка I2 пустая")
         except Exception as e:
-            print(f"  ⚠️  Не удалось прочитать ячейку I2: {e}")
+            logger.warning("  ⚠️  Не удалось прочитать ячейку I2: %s", e)
         
         # ===== 1. НАХОДИМ ЗАГОЛОВОК =====
         header_row = None
-        for i in range(min(10, len(df))):
-            if len(df.columns) > 1:
-                col_a = str(df.iloc[i, 0]).lower().strip() if pd.notna(df.iloc[i, 0]) else ""
-                col_b = str(df.iloc[i, 1]).lower().strip() if pd.notna(df.iloc[i, 1]) else ""
-                
-                if 'фирмы и отделы' in col_a and 'отделы' in col_b:
-                    header_row = i
-                    print(f"  🔍 Найден заголовок новой таблицы в строке {i+1}")
-                    print(f"     Колонка A: '{col_a}'")
-                    print(f"     Колонка B: '{col_b}'")
-                    break
+        if len(df.columns) > 1:
+            col_a, col_b = [
+                df.iloc[:10, j].map(lambda v: str(v).lower().strip() if pd.notna(v) else "")
+                for j in (0, 1)
+            ]
+            found = col_a.str.contains('фирмы и отделы', regex=False) & col_b.str.contains('отделы', regex=False)
+            if found.any():
+                header_row = int(found.to_numpy().argmax())
+                logger.debug("  🔍 Найден заголовок новой таблицы в строке %s", header_row + 1)
+                logger.debug("     Колонка A: '%s'", col_a.iloc[header_row])
+                logger.debug("     Колонка B: '%s'", col_b.iloc[header_row])
         
         if header_row is None:
             return {
@@ -74,21 +180,20 @@ def parse_urs_settings(file_path, sheet_name=0, report_period=None):
                 'оклад_I2': оклад_I2  # Добавляем даже при ошибке
             }
         
+        body = df.iloc[header_row + 1:].reset_index(drop=True)
+        
         # ===== 2. ВСЕ ИСКЛЮЧЕНИЯ (колонка A) =====
         exclusions = []
         
-        for i in range(header_row + 1, len(df)):
-            if len(df.columns) > 0:
-                exclusion_cell = str(df.iloc[i, 0]).strip()
-                if (exclusion_cell and 
-                    exclusion_cell.lower() not in ['nan', 'none', ''] and
-                    len(exclusion_cell) > 2 and
-                    not exclusion_cell.replace(',', '').replace('.', '').isdigit()):
-                    exclusions.append(exclusion_cell)
+        if len(df.columns) > 0:
+            cells = body[0].map(lambda v: str(v).strip())
+            is_number = cells.str.replace(',', '', regex=False).str.replace('.', '', regex=False).str.isdigit()
+            keep = (~cells.str.lower().isin(['nan', 'none', ''])) & (cells.str.len() > 2) & ~is_number
+            exclusions = cells[keep].tolist()
         
-        print(f"  🚫 Всего исключений (A): {len(exclusions)}")
+        logger.info("  🚫 Всего исключений (A): %s", len(exclusions))
         if exclusions:
-            print(f"  📋 Примеры: {exclusions[:5]}")
+            logger.info("  📋 Примеры: %s", exclusions[:5])
         
         # ===== 3. ТАБЛИЦА ОТДЕЛОВ (колонка B) И КОЛОНКИ =====
         col_mapping = {}
@@ -132,27 +237,29 @@ def parse_urs_settings(file_path, sheet_name=0, report_period=None):
             elif '5 место' in cell:
                 col_mapping['гарантия_5'] = col_idx
         
-        print(f"  📋 Колонки: {col_mapping}")
+        logger.debug("  📋 Колонки: %s", col_mapping)
         
         # ===== 4. ОБРАБОТКА ОТДЕЛОВ (ТОЛЬКО КОЛОНКА B) =====
         departments = {}
+        dept_rows = {}  # название отдела -> первая строка с ним (строится один раз)
         processed = 0
         skipped = 0
         
-        for i in range(header_row + 1, len(df)):
-            if 'отдел_расчет' not in col_mapping:
-                continue
-                
-            # НОРМАЛИЗАЦИЯ НАЗВАНИЯ ОТДЕЛА
-            dept_cell = df.iloc[i, col_mapping['отдел_расчет']]
-            dept_name = normalize_department_name(dept_cell)
+        forbidden_keywords = ['отдел оптовых продаж', 'опт', 'управление', 'склад', 
+                             'хоз.отдел', 'декрет', 'ип', 'водители', 'уволенные']
+        
+        if 'отдел_расчет' in col_mapping:
+            dept_names = body[col_mapping['отдел_расчет']].map(normalize_department_name)
+        else:
+            dept_names = pd.Series([], dtype=object)
+        
+        for i, dept_name in enumerate(dept_names):
+            dept_rows.setdefault(dept_name, i)
             
             if not dept_name or dept_name.lower() in ['nan', 'none', '']:
                 skipped += 1
                 continue
 
-            forbidden_keywords = ['отдел оптовых продаж', 'опт', 'управление', 'склад', 
-                                 'хоз.отдел', 'декрет', 'ип', 'водители', 'уволенные']
             if any(keyword in dept_name.lower() for keyword in forbidden_keywords):
                 skipped += 1
                 continue
@@ -164,122 +271,50 @@ def parse_urs_settings(file_path, sheet_name=0, report_period=None):
             departments[dept_name] = {'отдел': dept_name}
             processed += 1
         
+        # Числовые колонки чистим целиком, а не по ячейке
+        numeric = {}
+        for key, empty_value in NUMERIC_COLUMNS.items():
+            if key in col_mapping:
+                numeric[key] = _clean_numeric(body[col_mapping[key]], empty_value).tolist()
+        for key in GUARANTEE_KEYS:
+            if key in col_mapping:
+                numeric[key] = _clean_numeric(body[col_mapping[key]], 0.0).tolist()
+        
         # ===== 5. ЗАПОЛНЯЕМ ДАННЫЕ ОТДЕЛОВ =====
-        print(f"\n  📊 ЗАПОЛНЕНИЕ НАСТРОЕК ОТДЕЛОВ:")
-        for dept_name in departments.keys():
-            dept_row_idx = None
-            for i in range(header_row + 1, len(df)):
-                current_cell = df.iloc[i, col_mapping['отдел_расчет']]
-                current_name = normalize_department_name(current_cell)
-                if current_name == dept_name:
-                    dept_row_idx = i
-                    break
-            
-            if dept_row_idx is None:
-                continue
-                
-            dept_data = departments[dept_name]
+        logger.debug("\n  📊 ЗАПОЛНЕНИЕ НАСТРОЕК ОТДЕЛОВ:")
+        for dept_name, dept_data in departments.items():
+            dept_row_idx = dept_rows[dept_name]
             
             # Филиал
             if 'филиал' in col_mapping:
-                филиал = normalize_department_name(df.iloc[dept_row_idx, col_mapping['филиал']])
+                филиал = normalize_department_name(body.iat[dept_row_idx, col_mapping['филиал']])
                 dept_data['филиал'] = филиал if филиал else 'Не указан'
             
-            # БАЗОВАЯ ЧАСТЬ (бывший "Оклад")
-            if 'базовая_часть' in col_mapping:
-                try:
-                    salary = str(df.iloc[dept_row_idx, col_mapping['базовая_часть']]).replace(',', '.').replace(' ', '')
-                    dept_data['базовая_часть'] = float(salary) if salary else 0
-                except:
-                    dept_data['базовая_часть'] = 0
-            
-            # Добавляем ОКЛАД из ячейки I2 (одинаковый для всех отделов)
-            dept_data['оклад'] = оклад_I2
-            
-            # Средняя ЗП
-            if 'средняя_зп' in col_mapping:
-                try:
-                    avg = str(df.iloc[dept_row_idx, col_mapping['средняя_зп']]).replace(',', '.').replace(' ', '')
-                    dept_data['средняя_зп'] = float(avg) if avg else 0
-                except:
-                    dept_data['средняя_зп'] = 0
-            
-            # Минималка
-            if 'минималка' in col_mapping:
-                try:
-                    minim = str(df.iloc[dept_row_idx, col_mapping['минималка']]).replace(',', '.').replace(' ', '')
-                    dept_data['минималка'] = float(minim) if minim else 0
-                except:
-                    dept_data['минималка'] = 0
+            # БАЗОВАЯ ЧАСТЬ (бывший "Оклад"), средняя ЗП, минималка
+            for key in ['базовая_часть', 'средняя_зп', 'минималка']:
+                if key in numeric:
+                    dept_data[key] = numeric[key][dept_row_idx]
+                if key == 'базовая_часть':
+                    # Добавляем ОКЛАД из ячейки I2 (одинаковый для всех отделов)
+                    dept_data['оклад'] = оклад_I2
             
             # Неликвиды в котле
             if 'неликвиды' in col_mapping:
-                nelik = str(df.iloc[dept_row_idx, col_mapping['неликвиды']]).lower().strip()
+                nelik = str(body.iat[dept_row_idx, col_mapping['неликвиды']]).lower().strip()
                 dept_data['неликвиды_в_котле'] = 'да' in nelik
             
-            # Процент неликвидов
-            if 'неликвид_процент' in col_mapping:
-                try:
-                    percent = str(df.iloc[dept_row_idx, col_mapping['неликвид_процент']]).replace(',', '.').replace(' ', '')
-                    dept_data['неликвид_процент'] = float(percent) if percent else 0
-                except:
-                    dept_data['неликвид_процент'] = 0
-            
-            # Коэффициенты товаров
-            if 'коэф_обычных' in col_mapping:
-                try:
-                    coeff = str(df.iloc[dept_row_idx, col_mapping['коэф_обычных']]).replace(',', '.').replace(' ', '')
-                    dept_data['коэф_обычных'] = float(coeff) if coeff else 0.0
-                except:
-                    dept_data['коэф_обычных'] = 0.0
-
-            if 'коэф_бонусных' in col_mapping:
-                try:
-                    coeff = str(df.iloc[dept_row_idx, col_mapping['коэф_бонусных']]).replace(',', '.').replace(' ', '')
-                    dept_data['коэф_бонусных'] = float(coeff) if coeff else 0.0
-                except:
-                    dept_data['коэф_бонусных'] = 0.0
-
-            if 'коэф_неликвидов' in col_mapping:
-                try:
-                    coeff = str(df.iloc[dept_row_idx, col_mapping['коэф_неликвидов']]).replace(',', '.').replace(' ', '')
-                    dept_data['коэф_неликвидов'] = float(coeff) if coeff else 0.0
-                except:
-                    dept_data['коэф_неликвидов'] = 0.0
-
-            if 'коэф_оптовых' in col_mapping:
-                try:
-                    coeff = str(df.iloc[dept_row_idx, col_mapping['коэф_оптовых']]).replace(',', '.').replace(' ', '')
-                    dept_data['коэф_оптовых'] = float(coeff) if coeff else 0.0
-                except:
-                    dept_data['коэф_оптовых'] = 0.0
+            # Процент неликвидов и коэффициенты товаров
+            for key in ['неликвид_процент', 'коэф_обычных', 'коэф_бонусных', 'коэф_неликвидов', 'коэф_оптовых']:
+                if key in numeric:
+                    dept_data[key] = numeric[key][dept_row_idx]
 
             # Гарантии мест
-            guarantee_columns = [
-                ('гарантия_1', col_mapping.get('гарантия_1')),
-                ('гарантия_2', col_mapping.get('гарантия_2')), 
-                ('гарантия_3', col_mapping.get('гарантия_3')),
-                ('гарантия_4', col_mapping.get('гарантия_4')),
-                ('гарантия_5', col_mapping.get('гарантия_5'))
-            ]
-            
-            for key, col_idx in guarantee_columns:
-                if col_idx is not None:
-                    try:
-                        cell_value = str(df.iloc[dept_row_idx, col_idx])
-                        clean_value = cell_value.replace(',', '.').replace(' ', '').strip()
-                        if clean_value and clean_value.lower() not in ['', 'nan', 'none', 'null']:
-                            dept_data[key] = float(clean_value)
-                        else:
-                            dept_data[key] = 0.0
-                    except:
-                        dept_data[key] = 0.0
-                else:
-                    dept_data[key] = 0.0
+            for key in GUARANTEE_KEYS:
+                dept_data[key] = numeric[key][dept_row_idx] if key in numeric else 0.0
             
             # Норма часов
             if 'норма_часов' in col_mapping:
-                norm_type = normalize_department_name(df.iloc[dept_row_idx, col_mapping['норма_часов']]).lower()
+                norm_type = normalize_department_name(body.iat[dept_row_idx, col_mapping['норма_часов']]).lower()
                 dept_data['тип_нормы'] = norm_type
                 
                 if norm_type == 'магазин':
@@ -293,14 +328,16 @@ def parse_urs_settings(file_path, sheet_name=0, report_period=None):
                 dept_data['норма_часов'] = None
             
             # Проверка заполнения (добавляем оклад из I2)
-            print(f"    Отдел '{dept_name[:30]:30}': "
-                  f"База={dept_data.get('базовая_часть',0):,.0f}, "
-                  f"Оклад(I2)={dept_data.get('оклад',0):,.0f}, "
-                  f"Средняя={dept_data.get('средняя_зп',0):,.0f}, "
-                  f"Коефы={dept_data.get('коэф_обычных',0)}/{dept_data.get('коэф_бонусных',0)}/{dept_data.get('коэф_неликвидов',0)}/{dept_data.get('коэф_оптовых',0)}, "
-                  f"Гарантии={dept_data.get('гарантия_1',0)}/{dept_data.get('гарантия_2',0)}/{dept_data.get('гарантия_3',0)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("    Отдел '%-30s': База=%.0f, Оклад(I2)=%.0f, Средняя=%.0f, "
+                             "Коефы=%s/%s/%s/%s, Гарантии=%s/%s/%s",
+                             dept_name[:30], dept_data.get('базовая_часть', 0), dept_data.get('оклад', 0),
+                             dept_data.get('средняя_зп', 0), dept_data.get('коэф_обычных', 0),
+                             dept_data.get('коэф_бонусных', 0), dept_data.get('коэф_неликвидов', 0),
+                             dept_data.get('коэф_оптовых', 0), dept_data.get('гарантия_1', 0),
+                             dept_data.get('гарантия_2', 0), dept_data.get('гарантия_3', 0))
         
-        print(f"  ✅ Отделов для расчетов: {processed}")
+        logger.info("  ✅ Отделов для расчетов: %s", processed)
         
         # ===== 6. СТАТИСТИКА =====
         filials_set = set()
@@ -309,11 +346,11 @@ def parse_urs_settings(file_path, sheet_name=0, report_period=None):
             if filial and filial != 'Не указан':
                 filials_set.add(filial)
         
-        print(f"\n  📊 ИТОГОВАЯ СТАТИСТИКА:")
-        print(f"  • Отделов для расчетов: {len(departments)}")
-        print(f"  • Исключений: {len(exclusions)}")
-        print(f"  • Уникальных филиалов: {len(filials_set)}")
-        print(f"  • Оклад из I2: {оклад_I2:,.0f} руб.")
+        logger.info("\n  📊 ИТОГОВАЯ СТАТИСТИКА:")
+        logger.info("  • Отделов для расчетов: %s", len(departments))
+        logger.info("  • Исключений: %s", len(exclusions))
+        logger.info("  • Уникальных филиалов: %s", len(filials_set))
+        logger.info("  • Оклад из I2: %.0f руб.", оклад_I2)
         
         return {
             'success': True,
@@ -331,7 +368,7 @@ def parse_urs_settings(file_path, sheet_name=0, report_period=None):
         }
         
     except Exception as e:
-        print(f"❌ Ошибка: {e}")
+        logger.error("❌ Ошибка: %s", e)
         import traceback
         traceback.print_exc()
         return {
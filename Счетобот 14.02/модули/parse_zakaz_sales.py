@@ -8,6 +8,16 @@ import pandas as pd
 import re
 import os
 
+from модули.columnar_store import read_input_frame
+from модули.name_index import NameIndex
+from модули.seller_names import get_seller_classifier
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Версия формата результата для кэша парсинга (увеличивать при изменении вывода)
+PARSER_VERSION = 3
+
 def normalize_fio(name):
     """Нормализует ФИО для сравнения"""
     if not name or not isinstance(name, str):
@@ -53,78 +63,15 @@ def parse_zakaz_sales(filepath, staff_data=None, excluded_firms=None):
         'error': None
     }
     
-    def is_valid_seller_name(name, excluded_firms_list):
-        """
-        Проверяет, является ли строка валидным ФИО продавца
-        """
-        if excluded_firms_list is None:
-            excluded_firms_list = []
-        
-        if not name or not isinstance(name, str):
-            return False
-        
-        name_clean = name.strip()
-        name_lower = name_clean.lower()
-        
-        if len(name_clean) < 4:
-            return False
-        
-        # 1. ТОЧНОЕ СОВПАДЕНИЕ С ИСКЛЮЧЕНИЯМИ
-        for exclusion in excluded_firms_list:
-            if not exclusion or not isinstance(exclusion, str):
-                continue
-            exclusion_lower = exclusion.lower().strip()
-            
-            # Точное совпадение
-            if name_lower == exclusion_lower:
-                return False
-        
-        # 2. СОДЕРЖИТ КЛЮЧЕВЫЕ СЛОВА ИСКЛЮЧЕНИЙ
-        for exclusion in excluded_firms_list:
-            if not exclusion or not isinstance(exclusion, str):
-                continue
-            exclusion_lower = exclusion.lower().strip()
-            
-            # Частичное совпадение (если исключение содержится в имени)
-            if exclusion_lower and exclusion_lower in name_lower:
-                return False
-        
-        # 3. ПРОВЕРКА НА ТИПОВЫЕ ЗАГОЛОВКИ И ОБОБЩЕНИЯ
-        invalid_keywords = [
-            'незаказной', 'заказной', 'товар', 'продавец',
-            'итого', 'всего', 'итог', 'общий', 'основной',
-            '%', 'процент', 'руб.', 'рублей', 'ед.'
-        ]
-        
-        for keyword in invalid_keywords:
-            if keyword in name_lower:
-                return False
-        
-        # 4. ПРОВЕРКА НА ЧИСЛА (не ФИО)
-        if name_clean.replace(' ', '').isdigit():
-            return False
-        
-        # 5. ПРОВЕРКА НА ПУСТЫЕ ИЛИ СЛИШКОМ КОРОТКИЕ
-        if len(name_clean) < 2:
-            return False
-        
-        # 6. ПРОВЕРКА НА РУССКИЕ БУКВЫ (опционально)
-        has_cyrillic = any('а' <= char <= 'я' or char == 'ё' for char in name_lower)
-        if not has_cyrillic:
-            return False
-
-        # 7. ПРОВЕРКА НА ФОРМАТ "ФАМИЛИЯ И.О." (инициалы через точку)
-        if '.' in name_lower and len(name_clean.split()) <= 2:
-            return False
-        
-        return True
+    # Проверка ФИО продавца (правила Заказ.xls, исключения по вхождению)
+    seller_names = get_seller_classifier(excluded_firms, 'zakaz')
     
     try:
         if not os.path.exists(filepath):
             result['error'] = f"Файл не найден: {filepath}"
             return result
         
-        print(f"📊 Парсим файл: {os.path.basename(filepath)}")
+        logger.info("📊 Парсим файл: %s", os.path.basename(filepath))
         
         # Получаем список ФИО сотрудников для поиска
         employee_names = {}
@@ -134,16 +81,16 @@ def parse_zakaz_sales(filepath, staff_data=None, excluded_firms=None):
                 fio_original = emp.get('ФИО', '')
                 if fio_norm:
                     employee_names[fio_norm] = fio_original
-            print(f"🔍 Ищем {len(employee_names)} сотрудников из staff_data")
-            print(f"DEBUG: Первые 5 сотрудников: {list(employee_names.keys())[:5]}")
+            logger.info("🔍 Ищем %s сотрудников из staff_data", len(employee_names))
+            logger.debug("DEBUG: Первые 5 сотрудников: %s", list(employee_names.keys())[:5])
+        
+        # Индекс имен: точное совпадение и частичное без перебора всех сотрудников
+        name_index = NameIndex(employee_names)
         
-        # Читаем файл
-        if filepath.endswith('.xls'):
-            df = pd.read_excel(filepath, header=None, engine='xlrd')
-        else:
-            df = pd.read_excel(filepath, header=None, engine='openpyxl')
+        # Читаем файл (строками: числа все равно разбираются parse_zakaz_number)
+        df = read_input_frame(filepath, header=None, dtype=str)
         
-        print(f"📄 Размер файла: {df.shape[0]} строк, {df.shape[1]} колонок")
+        logger.info("📄 Размер файла: %s строк, %s колонок", df.shape[0], df.shape[1])
         
         # Подготовка
         current_section = None
@@ -173,25 +120,17 @@ def parse_zakaz_sales(filepath, staff_data=None, excluded_firms=None):
                 continue
             
             # Проверяем валидность имени продавца
-            if not is_valid_seller_name(cell0, excluded_firms):
+            if not seller_names.is_valid(cell0):
                 continue
 
             # Нормализуем имя из файла
             vendor_norm = normalize_fio(cell0)
-            print(f"DEBUG: Имя из файла: '{cell0}' -> нормализовано: '{vendor_norm}'")
+            logger.debug("DEBUG: Имя из файла: '%s' -> нормализовано: '%s'", cell0, vendor_norm)
             
-            # Ищем соответствие с сотрудниками
-            matched_employee = None
-            for emp_norm, emp_original in employee_names.items():
-                # Простое сравнение нормализованных имен
-                if emp_norm == vendor_norm:
-                    matched_employee = emp_norm
-                    break
-                # Частичное совпадение (если полное не сработало)
-                elif emp_norm in vendor_norm or vendor_norm in emp_norm:
-                    matched_employee = emp_norm
-                    print(f"  🔍 Частичное совпадение: '{emp_norm}' → '{vendor_norm}'")
-                    break
+            # Ищем соответствие с сотрудниками (первый по порядку: полное или частичное совпадение)
+            matched_employee = name_index.match(vendor_norm)
+            if matched_employee and matched_employee != vendor_norm:
+                logger.debug("  🔍 Частичное совпадение: '%s' → '%s'", matched_employee, vendor_norm)
             
             # Если не нашли сотрудника - пропускаем
             if not matched_employee:
@@ -229,28 +168,28 @@ def parse_zakaz_sales(filepath, staff_data=None, excluded_firms=None):
                     result['statistics']['total_ordered_items'] += items
                     result['statistics']['total_ordered_revenue'] += revenue
                     result['statistics']['total_ordered_profit'] += profit
-                print(f"DEBUG: Первые 5 сотрудников из staff_data: {list(employee_names.keys())[:5]}")
         
         result['data'] = vendors_data
         result['statistics']['vendors_count'] = len(vendors_data)
         result['statistics']['matched_employees'] = matched_count
         result['success'] = True
         
-        print(f"✅ Парсинг завершен:")
-        print(f"   • Найдено сотрудников: {matched_count} из {len(employee_names)}")
-        print(f"   • Незаказные товары: {result['statistics']['total_unordered_items']:.0f} ед.")
-        print(f"   • Заказные товары: {result['statistics']['total_ordered_items']:.0f} ед.")
+        logger.info("✅ Парсинг завершен:")
+        logger.info("   • Найдено сотрудников: %s из %s", matched_count, len(employee_names))
+        logger.info("   • Незаказные товары: %.0f ед.", result['statistics']['total_unordered_items'])
+        logger.info("   • Заказные товары: %.0f ед.", result['statistics']['total_ordered_items'])
         
         if matched_count > 0:
-            print(f"  🔍 Примеры найденных сотрудников:")
+            logger.debug("  🔍 Примеры найденных сотрудников:")
             for i, (emp_norm, data) in enumerate(list(vendors_data.items())[:3], 1):
-                print(f"     {i}. {data['fio']}:")
-                print(f"        Незаказные: {data['unordered']['items']:.0f} ед., {data['unordered']['profit']:.0f} руб.")
-                print(f"        Заказные: {data['ordered']['items']:.0f} ед., {data['ordered']['profit']:.0f} руб.")
+                logger.debug("     %s. %s:", i, data['fio'])
+                logger.debug("        Незаказные: %.0f ед., %.0f руб.",
+                             data['unordered']['items'], data['unordered']['profit'])
+                logger.debug("        Заказные: %.0f ед., %.0f руб.",
+                             data['ordered']['items'], data['ordered']['profit'])
         
     except Exception as e:
         result['error'] = f"Ошибка парсинга: {str(e)}"
-        import traceback
-        print(f"❌ Ошибка: {traceback.format_exc()}")
+        logger.exception("❌ Ошибка: %s", e)
     
     return result
@@ -0,0 +1,467 @@
+# pipeline.py
+"""
+Расчет без окна приложения: один период или пакет периодов
+
+Один период - те же шаги, что и кнопки приложения:
+поиск файлов -> период и норма магазина -> загрузка -> интеграция -> расчет
+зарплаты -> дашборд.
+
+Пакетный расчет (годовая сверка) - корневая папка с папками месяцев:
+    архив/
+        2025-01/          (файлы прямо в папке месяца)
+        2025-02/данные/   (или в подпапке 'данные')
+        ...
+Периоды считаются параллельно в пуле процессов. Справочники, не менявшиеся
+между месяцами (список сотрудников, УРС, бонусы), разбираются один раз: кэш
+парсинга ключуется по содержимому файла, и перед запуском пула каждый
+уникальный справочник разбирается заранее. Результат - сводная таблица всех
+сотрудников за все месяцы и итоги по месяцам в одном файле Excel.
+
+Каждый период пишет файл метрик (run_metrics): интервалы загрузки, шагов
+интеграции, расчета по отделам и дашборда - рядом с дашбордом периода или
+в отчётные_папки/метрики.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from модули import run_metrics
+from модули.parallel_loader import PARSERS, load_all_files_parallel, result_rows, run_parser
+from модули.parse_cache import cached_parse, file_digest
+from модули.report_period import period_dates, period_month, shop_norm_from_period
+from модули.log_setup import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+BATCH_DIR = os.path.join("отчётные_папки", "пакетный_расчет")
+DATA_SUBFOLDER = "данные"
+DEFAULT_OFFICE_NORM = 168
+
+# Тип файла -> фрагменты имени (в нижнем регистре)
+FILE_PATTERNS = {
+    'urs': ('урс',),
+    'bonus': ('бонус',),
+    'schedule': ('график',),
+    'staff': ('сотрудник',),
+    'sales': ('анализ продаж', 'продаж'),
+    'zakaz': ('заказ',),
+}
+INPUT_EXTENSIONS = ('.xls', '.xlsx', '.feather', '.parquet')
+REQUIRED_FILES = ['urs', 'bonus', 'schedule', 'staff', 'sales']
+
+# Справочники: обычно одинаковы в соседних месяцах
+REFERENCE_FILES = ['staff', 'urs', 'bonus']
+
+
+class PipelineState:
+    """Данные одного периода - те же атрибуты, что у DataManager приложения"""
+
+    def __init__(self, data_folder):
+        self.data_folder = data_folder
+        self.found_files = {}
+        self.report_period = None
+        self.report_month = None
+        self.shop_norm_hours = None
+        self.schedule_data = None
+        self.staff_data = None
+        self.urs_data = None
+        self.bonus_data = None
+        self.sales_data = None
+        self.sales_facts = None
+        self.zakaz_data = None
+        self.integrated_data = None
+        self.calculations = None
+        self.dashboard_path = None
+        # Этапы расчета: [{'stage', 'seconds', 'rows', 'peak_rss_mb'}]
+        self.stage_stats = []
+        # Метрики запуска (run_metrics.RunMetrics.export()) и их файл
+        self.metrics = None
+        self.metrics_path = None
+
+
+def peak_rss_mb():
+    """Пиковый объем памяти процесса (МБ) или None, если узнать нельзя"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдает килобайты, macOS - байты
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        memory = psutil.Process().memory_info()
+        # На Windows есть пиковый рабочий набор, иначе - текущий объем
+        return getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def _finish_stage(state, timings, stage, start, rows):
+    """Записывает время, число строк и пик памяти этапа"""
+    seconds = time.perf_counter() - start
+    timings[stage] = seconds
+    state.stage_stats.append({
+        'stage': stage,
+        'seconds': seconds,
+        'rows': rows,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+
+
+def _loaded_rows(state):
+    """Сколько записей дали входные файлы"""
+    sales = (state.sales_data, state.sales_facts)
+    return sum(result_rows(kind, sales if kind == 'sales' else getattr(state, PARSERS[kind][2]))
+               for kind in PARSERS)
+
+
+def find_input_files(folder):
+    """Входные файлы папки по фрагментам имени: {тип файла: путь}"""
+    found = {}
+    for name in sorted(os.listdir(folder)):
+        lower = name.lower()
+        # ~$ - временные файлы открытой в Excel книги
+        if name.startswith('~$') or not lower.endswith(INPUT_EXTENSIONS):
+            continue
+        for kind, fragments in FILE_PATTERNS.items():
+            if kind not in found and any(fragment in lower for fragment in fragments):
+                found[kind] = os.path.join(folder, name)
+                break
+    return found
+
+
+def find_period_folders(root):
+    """Папки месяцев внутри корневой папки (файлы в папке месяца или в ее 'данные')"""
+    folders = []
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if not os.path.isdir(path) or name.startswith('.'):
+            continue
+        for candidate in (path, os.path.join(path, DATA_SUBFOLDER)):
+            if os.path.isdir(candidate) and 'schedule' in find_input_files(candidate):
+                folders.append(candidate)
+                break
+    return folders
+
+
+def period_label(folder):
+    """Имя периода для отчетов: имя папки месяца"""
+    folder = os.path.normpath(folder)
+    if os.path.basename(folder) == DATA_SUBFOLDER:
+        folder = os.path.dirname(folder)
+    return os.path.basename(folder)
+
+
+def detect_period(state):
+    """Период из файла График (строка 'С 01.12.25 по 31.12.25') и норма магазина"""
+    from модули.parse_schedule import parse_schedule
+
+    schedule = cached_parse(parse_schedule, state.found_files['schedule'])
+    period = schedule.get('period') if isinstance(schedule, dict) else None
+    if not period:
+        raise ValueError(f"Не найден период в файле {os.path.basename(state.found_files['schedule'])}")
+
+    state.report_period = period
+    state.report_month = period_month(period)
+    state.shop_norm_hours, _ = shop_norm_from_period(period)
+
+
+def run_period(folder, office_norm_hours=DEFAULT_OFFICE_NORM, dashboard=True,
+               reports_dir=None, max_workers=1, force=False):
+    """
+    Полный расчет одного периода
+
+    folder: папка с входными файлами месяца
+    dashboard: создавать HTML дашборд (reports_dir - папка дашборда)
+    max_workers: процессов для загрузки файлов (в пакетном режиме 1 - пул уже на периодах)
+    force: холодная загрузка мимо кэша парсинга
+
+    Если запуск метрик еще не начат, период получает свой: по окончании
+    state.metrics - его данные, state.metrics_path - файл JSON (папка
+    reports_dir или METRICS_DIR). Пик памяти интервалов - при SCHETOBOT_TRACE_MEMORY=1
+
+    Возвращает (PipelineState, {этап: секунды}); подробности этапов - state.stage_stats
+    """
+    state = PipelineState(folder)
+    run = None if run_metrics.current_run() else run_metrics.start_run(period_label(folder))
+    try:
+        timings = _run_period_stages(state, office_norm_hours, dashboard, reports_dir, max_workers, force)
+    finally:
+        run_metrics.finish_run(run)
+
+    if run:
+        state.metrics = run.export()
+        try:
+            state.metrics_path = run_metrics.write_metrics(run, reports_dir or run_metrics.METRICS_DIR)
+        except OSError as e:
+            logger.warning("  ⚠️  Не удалось сохранить метрики: %s", e)
+    return state, timings
+
+
+def _run_period_stages(state, office_norm_hours, dashboard, reports_dir, max_workers, force):
+    """Этапы run_period; возвращает {этап: секунды}"""
+    from модули.data_integrator_simple import DataIntegrator
+    from модули.salary_calculator import SalaryCalculator
+
+    timings = {}
+
+    start = time.perf_counter()
+    with run_metrics.span('period') as span:
+        state.found_files = find_input_files(state.data_folder)
+        missing = [kind for kind in REQUIRED_FILES if kind not in state.found_files]
+        if missing:
+            raise ValueError(f"Не найдены файлы: {', '.join(missing)}")
+        detect_period(state)
+        span.rows_out = len(state.found_files)
+    _finish_stage(state, timings, 'period', start, len(state.found_files))
+
+    start = time.perf_counter()
+    loaded = load_all_files_parallel(state.found_files, max_workers=max_workers, force=force)
+    for key in ('schedule_data', 'staff_data', 'urs_data', 'bonus_data',
+                'sales_data', 'sales_facts', 'zakaz_data'):
+        setattr(state, key, loaded[key])
+    _finish_stage(state, timings, 'load', start, _loaded_rows(state))
+
+    failed = [kind for kind, ok in (
+        ('schedule', 'error' not in state.schedule_data),
+        ('staff', state.staff_data.get('success', False)),
+        ('urs', state.urs_data.get('success', False)),
+        ('bonus', state.bonus_data.get('success', False)),
+        ('sales', bool(state.sales_data)),
+    ) if not ok]
+    if failed:
+        raise ValueError(f"Ошибка загрузки: {', '.join(failed)}")
+
+    start = time.perf_counter()
+    state.integrated_data = DataIntegrator.create_integrated_dataframe(state, office_norm_hours)
+    if state.integrated_data is None or state.integrated_data.empty:
+        raise ValueError("Ошибка интеграции данных")
+    _finish_stage(state, timings, 'integrate', start, len(state.integrated_data))
+
+    start = time.perf_counter()
+    state.calculations = SalaryCalculator().calculate_salary(state.integrated_data, office_norm_hours)
+    if not state.calculations:
+        raise ValueError("Ошибка расчета зарплаты")
+    rows = len(state.calculations['by_employee'])
+    _finish_stage(state, timings, 'calculate', start, rows)
+
+    if dashboard:
+        from модули.manager_dashboard_pro import ManagerDashboardPro
+
+        start = time.perf_counter()
+        generator = ManagerDashboardPro(state)
+        if reports_dir:
+            os.makedirs(reports_dir, exist_ok=True)
+            generator.reports_dir = reports_dir
+        state.dashboard_path = generator.generate()
+        _finish_stage(state, timings, 'dashboard', start, rows)
+
+    return timings
+
+
+def reload_bonus_list(state, bonus_path, force=False):
+    """
+    Перечитывает список бонусных позиций и пересчитывает классы товаров продаж
+
+    Продажи пересобираются только у продавцов с изменившимися кодами
+    (reclassify_sales). Интегрированная таблица копирует данные продаж, поэтому
+    при изменившихся строках она, расчет и дашборд периода сбрасываются -
+    их нужно построить заново.
+
+    Возвращает статистику reclassify_sales; ValueError - список не прочитан
+    """
+    from модули.parse_bonus_integrated import parse_bonus_items_improved
+    from модули.parse_sales_analysis import reclassify_sales
+
+    with run_metrics.span('bonus.reload', file=os.path.basename(bonus_path)) as span:
+        bonus_data = cached_parse(parse_bonus_items_improved, bonus_path, force=force)
+        if not bonus_data.get('success'):
+            raise ValueError(f"Ошибка чтения списка бонусов: {bonus_data.get('error')}")
+        statistics = reclassify_sales(state.sales_data, state.sales_facts,
+                                      bonus_data['bonus_codes'], bonus_data['non_liquid_codes'])
+        span.rows_out = statistics['changed_rows']
+
+    state.bonus_data = bonus_data
+    if statistics['changed_rows']:
+        state.integrated_data = None
+        state.calculations = None
+        state.dashboard_path = None
+    return statistics
+
+
+def period_summary(label, state, timings):
+    """Строка итогов месяца для сводного отчета"""
+    by_employee = state.calculations['by_employee']
+    problems = state.calculations.get('problems') or {}
+    return {
+        'Период': label,
+        'Месяц': state.report_month,
+        'Даты': state.report_period,
+        'Сотрудников': len(by_employee),
+        'Отделов': by_employee['Отдел'].nunique(),
+        'Фонд_зарплаты': by_employee['Зарплата_итого'].sum(),
+        'Средняя_зарплата': by_employee['Зарплата_итого'].mean(),
+        'Медианная_зарплата': by_employee['Зарплата_итого'].median(),
+        'Отработано_часов': by_employee['Отработано_часов'].sum(),
+        'Норма_магазин': state.shop_norm_hours,
+        'Проблем': problems.get('total_problems', 0),
+        'Время_с': round(sum(timings.values()), 2),
+        'Ошибка': '',
+    }
+
+
+def _run_batch_period(folder, office_norm_hours, dashboard, reports_dir, force=False):
+    """Расчет одного периода в процессе пула: ошибки месяца не останавливают пакет"""
+    configure_logging()
+    label = period_label(folder)
+    try:
+        state, timings = run_period(folder, office_norm_hours, dashboard,
+                                    os.path.join(reports_dir, label) if dashboard else None,
+                                    force=force)
+    except Exception as e:
+        return {'label': label, 'error': str(e)}
+
+    by_employee = state.calculations['by_employee'].copy()
+    by_employee.insert(0, 'Период', label)
+    by_employee.insert(1, 'Месяц', state.report_month)
+    return {
+        'label': label,
+        'start': period_dates(state.report_period)[0],
+        'by_employee': by_employee,
+        'summary': period_summary(label, state, timings),
+        'timings': timings,
+        'metrics': state.metrics,
+        'metrics_path': state.metrics_path,
+    }
+
+
+def warm_reference_cache(folders):
+    """
+    Разбирает каждый уникальный справочник один раз до запуска пула
+
+    Одинаковые по содержимому файлы разных месяцев дают один ключ кэша -
+    процессы пула получат готовый результат. Возвращает {тип файла: (файлов, уникальных)}
+    """
+    stats = {}
+    for kind in REFERENCE_FILES:
+        unique = {}
+        total = 0
+        for folder in folders:
+            path = find_input_files(folder).get(kind)
+            if path:
+                total += 1
+                unique.setdefault(file_digest(path), path)
+        for path in unique.values():
+            run_parser(kind, path, (), {}, False)
+        stats[kind] = (total, len(unique))
+    return stats
+
+
+def run_batch(root, office_norm_hours=DEFAULT_OFFICE_NORM, max_workers=None,
+              dashboard=True, output_dir=BATCH_DIR, force=False):
+    """
+    Пакетный расчет всех месяцев корневой папки
+
+    office_norm_hours: норма офиса - число или {имя папки месяца: норма}
+                       (производственный календарь различается по месяцам)
+    max_workers: число процессов; 1 - последовательно в текущем процессе
+    force: холодная загрузка каждого периода мимо кэша парсинга
+
+    Возвращает словарь: consolidated (все сотрудники всех месяцев), summary
+    (итоги по месяцам), errors ({период: ошибка}), metrics ({период: метрики
+    запуска}), output_path, total_time
+    """
+    folders = find_period_folders(root)
+    if not folders:
+        raise ValueError(f"В папке '{root}' не найдено папок месяцев с файлом График")
+
+    if max_workers is None:
+        max_workers = min(len(folders), os.cpu_count() or 1)
+
+    def office_norm(folder):
+        if isinstance(office_norm_hours, dict):
+            return office_norm_hours.get(period_label(folder), DEFAULT_OFFICE_NORM)
+        return office_norm_hours
+
+    logger.info("📦 Пакетный расчет: %s периодов (процессов: %s)", len(folders), max_workers)
+    total_start = time.perf_counter()
+
+    if force:
+        # Периоды все равно разбирают файлы заново - прогрев кэша был бы лишним
+        logger.info("  🧊 Холодная загрузка: кэш парсинга не используется")
+    else:
+        start = time.perf_counter()
+        for kind, (total, unique) in warm_reference_cache(folders).items():
+            logger.debug("  📚 %s: файлов %s, уникальных %s", kind, total, unique)
+        logger.info("  ⏱️  Справочники: %.2f с", time.perf_counter() - start)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    reports_dir = os.path.join(output_dir, f"дашборды_{timestamp}")
+
+    results = []
+    if max_workers <= 1:
+        for folder in folders:
+            results.append(_run_batch_period(folder, office_norm(folder), dashboard, reports_dir, force))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_run_batch_period, folder, office_norm(folder), dashboard, reports_dir, force)
+                       for folder in folders]
+            for future in as_completed(futures):
+                results.append(future.result())
+
+    done = sorted((r for r in results if 'error' not in r), key=lambda r: r['start'])
+    errors = {r['label']: r['error'] for r in results if 'error' in r}
+
+    summary_rows = [r['summary'] for r in done]
+    summary_rows += [{'Период': label, 'Ошибка': error} for label, error in sorted(errors.items())]
+    summary = pd.DataFrame(summary_rows)
+    consolidated = (pd.concat([r['by_employee'] for r in done], ignore_index=True)
+                    if done else pd.DataFrame())
+
+    for r in done:
+        logger.info("  ✅ %s: %s сотрудников, фонд %.0f руб. (%.2f с)", r['label'],
+                    r['summary']['Сотрудников'], r['summary']['Фонд_зарплаты'], r['summary']['Время_с'])
+    for label, error in sorted(errors.items()):
+        logger.error("  ❌ %s: %s", label, error)
+
+    output_path = None
+    if done:
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, f"пакетный_расчет_{timestamp}.xlsx")
+        with pd.ExcelWriter(output_path) as writer:
+            summary.to_excel(writer, sheet_name='Итоги по месяцам', index=False)
+            consolidated.to_excel(writer, sheet_name='Все сотрудники', index=False)
+        logger.info("  💾 Сводный отчет: %s", output_path)
+
+    total = time.perf_counter() - total_start
+    logger.info("📦 Пакетный расчет завершен за %.2f с", total)
+
+    return {
+        'consolidated': consolidated,
+        'summary': summary,
+        'errors': errors,
+        'metrics': {r['label']: r['metrics'] for r in done if r['metrics']},
+        'output_path': output_path,
+        'total_time': total,
+    }
+
+
+if __name__ == "__main__":
+    # python -m модули.pipeline <корневая папка> [норма офиса] [процессов]
+    if len(sys.argv) < 2:
+        print("Использование: python -m модули.pipeline <папка с месяцами> [норма офиса] [процессов]")
+        sys.exit(1)
+
+    configure_logging()
+    root_folder = sys.argv[1]
+    office = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_OFFICE_NORM
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    batch = run_batch(root_folder, office, workers)
+    sys.exit(1 if batch['errors'] else 0)
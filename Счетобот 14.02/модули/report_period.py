@@ -0,0 +1,60 @@
+# report_period.py
+"""
+Отчетный период: разбор строки "С 01.12.25 по 31.12.25" и норма часов магазина
+
+Используется окном приложения и пакетным расчетом (pipeline), чтобы норма
+считалась одинаково.
+"""
+
+import math
+import re
+from datetime import datetime
+
+# Версия разбора периода для кэша парсинга графика (увеличивать при изменении разбора)
+PARSER_VERSION = 1
+
+DATE_PATTERN = re.compile(r'\d{1,2}\.\d{1,2}\.\d{2,4}')
+DATE_FORMATS = ['%d.%m.%y', '%d.%m.%Y', '%d/%m/%y', '%d/%m/%Y']
+
+MONTHS = ['Январь', 'Февраль', 'Март', 'Апрель', 'Май', 'Июнь',
+          'Июль', 'Август', 'Сентябрь', 'Октябрь', 'Ноябрь', 'Декабрь']
+
+
+def period_dates(period_str):
+    """
+    Первая и последняя дата периода (datetime, datetime)
+
+    ValueError - если в строке нет двух дат поддерживаемого формата
+    """
+    if not period_str:
+        raise ValueError("Пустой период")
+
+    dates = DATE_PATTERN.findall(period_str)
+    if len(dates) < 2:
+        raise ValueError(f"Нужно 2 даты, найдено {len(dates)}: {dates}")
+
+    date1, date2 = dates[0], dates[1]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(date1, date_format), datetime.strptime(date2, date_format)
+        except ValueError:
+            continue
+    raise ValueError(f"Неподдерживаемый формат: '{date1}', '{date2}'")
+
+
+def shop_norm_from_period(period_str):
+    """
+    Норма часов 'Магазин' по периоду: (дней / 7) × 5 × 8, вниз до 1 знака
+
+    Возвращает (норма, дней в периоде)
+    """
+    start, end = period_dates(period_str)
+    days_in_month = (end - start).days + 1
+    shop_norm = math.floor(days_in_month / 7 * 5 * 8 * 10) / 10
+    return shop_norm, days_in_month
+
+
+def period_month(period_str):
+    """Название месяца периода: 'Декабрь 2025'"""
+    start, _ = period_dates(period_str)
+    return f"{MONTHS[start.month - 1]} {start.year}"
@@ -0,0 +1,313 @@
+# run_metrics.py
+"""
+Метрики запуска: интервалы (span) и счетчики по этапам расчета
+
+    with run_metrics.span('calculate.department', rows_in=len(dept_df), department=dept) as s:
+        results = ...
+        s.rows_out = len(results)
+    run_metrics.count('parse_cache.hit')
+
+Интервал записывает время (wall), процессорное время, строки на входе и
+выходе и - если включено - пик памяти по tracemalloc. Интервалы вложены:
+у каждого есть depth и parent (индекс родителя в списке run.spans).
+
+Пока запуск не начат (start_run), span и count почти ничего не делают -
+модули расчета можно вызывать и без метрик. tracemalloc заметно замедляет
+pandas, поэтому он включается только по запросу: start_run(trace_memory=True)
+или SCHETOBOT_TRACE_MEMORY=1.
+
+Парсеры в пуле процессов пишут в собственный запуск и возвращают его
+export(); родитель добавляет их через merge().
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_DIR = os.path.join("отчётные_папки", "метрики")
+TRACE_MEMORY_ENV = "SCHETOBOT_TRACE_MEMORY"
+METRICS_VERSION = 1
+
+_active_run = None
+_lock = threading.Lock()
+
+
+class Span:
+    """Один интервал: заполняется при выходе из with"""
+
+    __slots__ = ('name', 'attrs', 'rows_in', 'rows_out', 'index', 'depth', 'parent', 'thread',
+                 'start', 'wall', 'cpu', 'peak_mb', '_cpu_start', '_mem_start', '_peak_seen')
+
+    def __init__(self, name, rows_in=None, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.index = None
+        self.depth = 0
+        self.parent = None
+        self.thread = None
+        self.start = 0.0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_mb = None
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'depth': self.depth,
+            'parent': self.parent,
+            'thread': self.thread,
+            'start_s': round(self.start, 6),
+            'wall_s': round(self.wall, 6),
+            'cpu_s': round(self.cpu, 6),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'peak_mb': None if self.peak_mb is None else round(self.peak_mb, 3),
+            'attrs': self.attrs,
+        }
+
+
+class _NullSpan:
+    """Заглушка вне запуска: присваивание rows_out просто игнорируется"""
+
+    rows_in = rows_out = None
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class RunMetrics:
+    """Метрики одного запуска (период, пакетный месяц, сеанс окна)"""
+
+    def __init__(self, label, trace_memory=False):
+        self.label = label
+        self.started = datetime.now()
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.counters = {}
+        self.wall = None
+        self._origin = time.perf_counter()
+        self._stacks = threading.local()
+        self._started_tracemalloc = False
+
+    def _stack(self):
+        stack = getattr(self._stacks, 'spans', None)
+        if stack is None:
+            stack = self._stacks.spans = []
+        return stack
+
+    def open(self, span):
+        stack = self._stack()
+        with _lock:
+            if stack:
+                span.parent = stack[-1].index
+                span.depth = stack[-1].depth + 1
+            span.index = len(self.spans)
+            self.spans.append(span)
+        span.thread = threading.current_thread().name
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Пик родителя до сброса сохраняем, чтобы вложенный интервал его не потерял
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+            tracemalloc.reset_peak()
+            span._mem_start = current
+            span._peak_seen = current
+        stack.append(span)
+        span.start = time.perf_counter() - self._origin
+        span._cpu_start = time.thread_time()
+
+    def close(self, span):
+        span.cpu = time.thread_time() - span._cpu_start
+        span.wall = time.perf_counter() - self._origin - span.start
+        stack = self._stack()
+        stack.pop()
+        if self.trace_memory and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(span._peak_seen, peak)
+            span.peak_mb = (peak - span._mem_start) / (1024 * 1024)
+            if stack:
+                stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+
+    def count(self, name, value=1):
+        with _lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, exported, parent_span=None):
+        """Добавляет интервалы и счетчики запуска из процесса пула"""
+        if not exported:
+            return
+        with _lock:
+            offset = len(self.spans)
+            base_depth = parent_span.depth + 1 if parent_span is not None else 0
+            parent_index = parent_span.index if parent_span is not None else None
+            for data in exported['spans']:
+                span = Span(data['name'], data['rows_in'], data['attrs'])
+                span.rows_out = data['rows_out']
+                span.index = len(self.spans)
+                span.depth = base_depth + data['depth']
+                span.parent = parent_index if data['parent'] is None else offset + data['parent']
+                span.thread = f"{exported['label']}:{data['thread']}"
+                span.start = data['start_s']
+                span.wall = data['wall_s']
+                span.cpu = data['cpu_s']
+                span.peak_mb = data['peak_mb']
+                self.spans.append(span)
+            for name, value in exported['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def export(self):
+        """Словарь запуска для JSON (и для передачи из процесса пула)"""
+        return {
+            'version': METRICS_VERSION,
+            'label': self.label,
+            'started': self.started.isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'trace_memory': self.trace_memory,
+            'wall_s': None if self.wall is None else round(self.wall, 6),
+            'spans': [span.to_dict() for span in self.spans],
+            'counters': dict(self.counters),
+        }
+
+
+def start_run(label, trace_memory=None):
+    """Начинает запуск метрик (предыдущий незавершенный завершается)"""
+    global _active_run
+    if _active_run is not None:
+        finish_run(_active_run)
+    if trace_memory is None:
+        trace_memory = os.environ.get(TRACE_MEMORY_ENV) == '1'
+    run = RunMetrics(label, trace_memory)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        run._started_tracemalloc = True
+    _active_run = run
+    return run
+
+
+def finish_run(run=None):
+    """Завершает запуск и возвращает его"""
+    global _active_run
+    run = run or _active_run
+    if run is None:
+        return None
+    run.wall = time.perf_counter() - run._origin
+    if run._started_tracemalloc:
+        tracemalloc.stop()
+        run._started_tracemalloc = False
+    if run is _active_run:
+        _active_run = None
+    return run
+
+
+def current_run():
+    return _active_run
+
+
+@contextmanager
+def span(name, rows_in=None, **attrs):
+    """Интервал текущего запуска (без запуска - заглушка)"""
+    run = _active_run
+    if run is None:
+        yield _NULL_SPAN
+        return
+    item = Span(name, rows_in, attrs)
+    run.open(item)
+    try:
+        yield item
+    finally:
+        run.close(item)
+
+
+def count(name, value=1):
+    """Счетчик текущего запуска"""
+    run = _active_run
+    if run is not None:
+        run.count(name, value)
+
+
+def merge(exported, parent_span=None):
+    run = _active_run
+    if run is not None:
+        run.merge(exported, parent_span if isinstance(parent_span, Span) else None)
+
+
+def write_metrics(run, folder=METRICS_DIR):
+    """Сохраняет запуск в JSON: <папка>/метрики_<метка>_<время>.json"""
+    os.makedirs(folder, exist_ok=True)
+    label = "".join(c if c.isalnum() or c in '-_' else '_' for c in run.label)
+    path = os.path.join(folder, f"метрики_{label}_{run.started.strftime('%Y%m%d_%H%M%S')}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(run.export(), f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_metrics(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def latest_metrics_file(folder=METRICS_DIR):
+    """Самый свежий файл метрик папки или None"""
+    if not os.path.isdir(folder):
+        return None
+    files = [os.path.join(folder, name) for name in os.listdir(folder)
+             if name.startswith('метрики_') and name.endswith('.json')]
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def summarize(exported):
+    """
+    Сводка по интервалам: [{'name', 'depth', 'calls', 'wall_s', 'cpu_s', 'rows_in',
+    'rows_out', 'peak_mb'}] в порядке первого появления
+
+    Интервалы объединяются по пути от корня (parse.staff/read_input и
+    parse.urs/read_input - разные строки, отделы calculate.department - одна)
+    """
+    summary = {}
+    paths = []
+    for data in exported['spans']:
+        parent = data['parent']
+        path = (paths[parent] if parent is not None else ()) + (data['name'],)
+        paths.append(path)
+        item = summary.setdefault(path, {
+            'name': data['name'], 'depth': len(path) - 1, 'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+            'rows_in': 0, 'rows_out': 0, 'peak_mb': None,
+        })
+        item['calls'] += 1
+        item['wall_s'] += data['wall_s']
+        item['cpu_s'] += data['cpu_s']
+        item['rows_in'] += data['rows_in'] or 0
+        item['rows_out'] += data['rows_out'] or 0
+        if data['peak_mb'] is not None:
+            item['peak_mb'] = max(item['peak_mb'] or 0.0, data['peak_mb'])
+    return list(summary.values())
+
+
+def format_breakdown(exported):
+    """Текстовая таблица сводки (для консоли)"""
+    lines = [
+        f"{'Интервал':<34} {'Вызовов':>7} {'Секунд':>8} {'CPU, с':>8} {'Строк вход':>11} "
+        f"{'Строк выход':>11} {'Пик, МБ':>8}",
+        "-" * 93,
+    ]
+    for item in summarize(exported):
+        peak = f"{item['peak_mb']:.1f}" if item['peak_mb'] is not None else "-"
+        name = "  " * item['depth'] + item['name']
+        lines.append(f"{name[:34]:<34} {item['calls']:>7} {item['wall_s']:>8.3f} {item['cpu_s']:>8.3f} "
+                     f"{item['rows_in']:>11,} {item['rows_out']:>11,} {peak:>8}")
+    if exported['counters']:
+        lines.append("-" * 93)
+        for name, value in sorted(exported['counters'].items()):
+            lines.append(f"{name:<34} {value:>7,}")
+    return "\n".join(lines)
@@ -1,18 +1,20 @@
+import logging
+
 import pandas as pd
 import numpy as np
 
+from модули import run_metrics
+from модули.log_setup import get_logger
+
+logger = get_logger(__name__)
+
 class SalaryCalculator:
     def __init__(self, norm_hours=168):
-        print(f"🎯 DEBUG: SalaryCalculator.__init__() вызван")
-        print(f"🎯 DEBUG: self = {id(self)}")
-        print(f"🎯 DEBUG: Устанавливаю self.problems = []")
-        
         self.default_norm_hours = norm_hours
         self.problems = []
         self.problem_departments = set()
 
-        print(f"🎯 DEBUG: self.problems установлен: {self.problems}")
-        print(f"🎯 DEBUG: hasattr(self, 'problems'): {hasattr(self, 'problems')}")
+        logger.debug("🎯 SalaryCalculator создан: %s, норма %s", id(self), norm_hours)
         
     def add_problem(self, dept, fio, message):
         """Добавляет проблему в список"""
@@ -44,7 +46,7 @@ class SalaryCalculator:
             
         return summary
         
-    def calculate_salary(self, integrated_df, office_norm_hours=168):
+    def calculate_salary(self, integrated_df, office_norm_hours=168, progress=None):
         """
         НОВАЯ ЛОГИКА РАСЧЕТА по отчету:
         
@@ -55,37 +57,46 @@ class SalaryCalculator:
         ЭТАП 5: Зарплата_предв = Дол_прем + Окладная_часть
         ЭТАП 6: Проверка минималки
         ЭТАП 7: Премия лидерам (топ-3)
+        
+        progress(сообщение, departments_done=, departments_total=, rows=) - после
+        каждого отдела (фоновый этап окна, точка отмены)
         """
-        print("\n" + "="*60)
-        print("НОВЫЙ РАСЧЕТ ЗАРПЛАТЫ (обновленная логика)")
-        print("="*60)
+        logger.info("\n%s\nНОВЫЙ РАСЧЕТ ЗАРПЛАТЫ (обновленная логика)\n%s", "="*60, "="*60)
         
         if integrated_df.empty:
-            print("❌ Нет данных для расчета")
+            logger.error("❌ Нет данных для расчета")
             return None
         
         df = integrated_df.copy()
         results_by_dept = {}
         all_results = []
         
-        # Обрабатываем каждый отдел
-        for dept in df['Отдел'].unique():
-            if dept == 'Не указан':
-                continue
+        # Обрабатываем каждый отдел (интервалы метрик calculate.department)
+        departments = df['Отдел'].unique()
+        with run_metrics.span('calculate', rows_in=len(df)) as calculate_span:
+            for dept_number, dept in enumerate(departments, 1):
+                if dept == 'Не указан':
+                    continue
+                    
+                dept_df = df[df['Отдел'] == dept]
+                if dept_df.empty:
+                    continue
                 
-            dept_df = df[df['Отдел'] == dept]
-            if dept_df.empty:
-                continue
-            
-            print(f"\n📁 Отдел: {dept}")
-            dept_results = self._calculate_for_department(dept, dept_df, office_norm_hours)
-            
-            if dept_results is None:
-                print(f"  ⚠️  Пропущен отдел из-за ошибки расчета")
-                continue
-            
-            results_by_dept[dept] = dept_results
-            all_results.extend(dept_results)
+                logger.debug("\n📁 Отдел: %s", dept)
+                with run_metrics.span('calculate.department', rows_in=len(dept_df), department=dept) as step:
+                    dept_results = self._calculate_for_department(dept, dept_df, office_norm_hours)
+                    step.rows_out = len(dept_results or [])
+                
+                if dept_results is None:
+                    logger.warning("  ⚠️  Пропущен отдел из-за ошибки расчета: %s", dept)
+                    continue
+                
+                results_by_dept[dept] = dept_results
+                all_results.extend(dept_results)
+                calculate_span.rows_out = len(all_results)
+                if progress:
+                    progress(f"Отдел: {dept}", departments_done=dept_number,
+                             departments_total=len(departments), rows=len(all_results))
         
         if all_results:
             results_df = pd.DataFrame(all_results)
@@ -93,9 +104,9 @@ class SalaryCalculator:
             # Сортировка по отделу и рейтингу (убывание)
             results_df = results_df.sort_values(['Отдел', 'Доля'], ascending=[True, False])
             
-            print(f"\n✅ Расчет завершен!")
-            print(f"📊 Обработано отделов: {len(results_by_dept)}")
-            print(f"📊 Обработано сотрудников: {len(results_df)}")
+            logger.info("\n✅ Расчет завершен!")
+            logger.info("📊 Обработано отделов: %d", len(results_by_dept))
+            logger.info("📊 Обработано сотрудников: %d", len(results_df))
             
             # Получаем сводку по проблемам
             problems_summary = self.get_problems_summary()
@@ -114,17 +125,17 @@ class SalaryCalculator:
 
             # Выводим проблемы если есть
             if problems_summary:
-                print(f"\n⚠️  НАЙДЕНЫ ПРОБЛЕМЫ:")
-                print(f"   Всего проблем: {problems_summary['total_problems']}")
-                print(f"   Затронуто отделов: {problems_summary['problem_departments']}")
+                logger.warning("\n⚠️  НАЙДЕНЫ ПРОБЛЕМЫ:")
+                logger.warning("   Всего проблем: %d", problems_summary['total_problems'])
+                logger.warning("   Затронуто отделов: %d", problems_summary['problem_departments'])
                 
                 for ptype, count in problems_summary['problems_by_type'].items():
-                    print(f"   {ptype}: {count}")
+                    logger.warning("   %s: %d", ptype, count)
                 
                 # Показываем первые 5 проблем
-                print(f"\n   Примеры проблем:")
+                logger.warning("\n   Примеры проблем:")
                 for problem in problems_summary['problem_list'][:5]:
-                    print(f"   • {problem['ФИО']} - {problem['Отдел']}: {problem['Проблема']}")
+                    logger.warning("   • %s - %s: %s", problem['ФИО'], problem['Отдел'], problem['Проблема'])
 
             # Выводим результаты
             self.print_results(self.calculations)
@@ -151,17 +162,17 @@ class SalaryCalculator:
         ЭТАП 11: Разница по часам (для отчета)
         """
 
-        # Отладка для отдела "Сантехника санфаянс БД1"
-        if dept_name == "Сантехника санфаянс БД1":
-            print("\n" + "="*80)
-            print(f"🔍🔍🔍 ОТЛАДКА РАСЧЕТА ДЛЯ ОТДЕЛА: {dept_name}")
-            print("="*80)
-            print(f"Сотрудников в отделе: {len(dept_df)}")
-            print(f"Первые 5 сотрудника:")
+        # Подробная отладка по сотрудникам - только при уровне DEBUG
+        # (прежде была включена для одного отдела "Сантехника санфаянс БД1")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("\n%s\n🔍🔍🔍 ОТЛАДКА РАСЧЕТА ДЛЯ ОТДЕЛА: %s\n%s", "="*80, dept_name, "="*80)
+            logger.debug("Сотрудников в отделе: %d", len(dept_df))
+            logger.debug("Первые 5 сотрудника:")
             for i, (_, emp) in enumerate(dept_df.head(5).iterrows()):
-                print(f"  {i+1}. {emp['ФИО']}: Часы={emp.get('Часы_всего', 0)}, "
-                      f"Выручка={emp.get('Выручка', 0):,.0f}, "
-                      f"Прибыль={emp.get('Прибыль', 0):,.0f}")
+                logger.debug("  %d. %s: Часы=%s, Выручка=%.0f, Прибыль=%.0f",
+                             i + 1, emp['ФИО'], emp.get('Часы_всего', 0),
+                             emp.get('Выручка', 0), emp.get('Прибыль', 0))
         
         results = []
         
@@ -194,7 +205,7 @@ class SalaryCalculator:
         missing_cols = [col for col in required_cols if col not in dept_df.columns]
         if missing_cols:
             error_msg = f"Нет колонок: {missing_cols}"
-            print(f"  ❌ {error_msg}")
+            logger.error("  ❌ %s: %s", dept_name, error_msg)
             self.add_problem(dept_name, "ВСЕ", error_msg)
             return results
         
@@ -205,10 +216,11 @@ class SalaryCalculator:
         norm_hours = float(first_row['Норма_часов'])
         оклад_I2 = float(first_row['Оклад'])  # Новое поле из ячейки I2
         
-        print(f"  🏺 Отдел: {dept_name}")
-        print(f"    Базовая часть: {base_part:,.0f} руб.")
-        print(f"    Оклад (I2): {оклад_I2:,.0f} руб.")
-        print(f"    Средняя ЗП: {avg_salary:,.0f} руб.")
+        if debug:
+            logger.debug("  🏺 Отдел: %s", dept_name)
+            logger.debug("    Базовая часть: %.0f руб.", base_part)
+            logger.debug("    Оклад (I2): %.0f руб.", оклад_I2)
+            logger.debug("    Средняя ЗП: %.0f руб.", avg_salary)
         
         # ===== ЭТАП 1: КОТЕЛ ОТДЕЛА =====
         department_boiler = 0
@@ -230,11 +242,13 @@ class SalaryCalculator:
                 old_boiler = department_boiler
                 department_boiler = department_boiler * 0.9
                 reduction = old_boiler - department_boiler
-                print(f"    ⚠️  Коррекция котла: выработка {percent_completed:.1f}% < 90%")
-                print(f"       Было: {old_boiler:,.0f} руб. → Стало: {department_boiler:,.0f} руб.")
-                print(f"       Уменьшение: {reduction:,.0f} руб. (-10%)")
+                if debug:
+                    logger.debug("    ⚠️  Коррекция котла: выработка %.1f%% < 90%%", percent_completed)
+                    logger.debug("       Было: %.0f руб. → Стало: %.0f руб.", old_boiler, department_boiler)
+                    logger.debug("       Уменьшение: %.0f руб. (-10%%)", reduction)
         
-        print(f"    Котел отдела: {department_boiler:,.0f} руб.")
+        if debug:
+            logger.debug("    Котел отдела: %.0f руб.", department_boiler)
         
         # ===== ЭТАП 2: ЛИЧНЫЕ ПОКАЗАТЕЛИ (только "розничная по чекам") =====
         personal_scores = {}
@@ -305,14 +319,17 @@ class SalaryCalculator:
             }
             
             # Отладочный вывод
-            if dept_name == "Сантехника санфаянс БД1":
-                print(f"\n  🔍 {fio}:")
-                print(f"    Личный показатель (чеки): {score:,.0f}")
-                print(f"      Обычные: {прибыль_обычная_чеки:,.0f} × {coeff_regular:.3f} = {прибыль_обычная_чеки * coeff_regular:,.0f}")
-                print(f"      Бонусные: {прибыль_бонусная_чеки:,.0f} × {coeff_bonus:.3f} = {прибыль_бонусная_чеки * coeff_bonus:,.0f}")
-                print(f"      Неликвиды: {выручка_неликвидов_чеки:,.0f} × {coeff_illiquid:.3f} = {выручка_неликвидов_чеки * coeff_illiquid:,.0f}")
-                print(f"    Оптовые: {прибыль_оптовая:,.0f} руб. (добавятся позже)")
-                print(f"    Розн. прочая: {прибыль_розн_прочая:,.0f} руб. (добавятся позже)")
+            if debug:
+                logger.debug("\n  🔍 %s:", fio)
+                logger.debug("    Личный показатель (чеки): %.0f", score)
+                logger.debug("      Обычные: %.0f × %.3f = %.0f", прибыль_обычная_чеки, coeff_regular,
+                             прибыль_обычная_чеки * coeff_regular)
+                logger.debug("      Бонусные: %.0f × %.3f = %.0f", прибыль_бонусная_чеки, coeff_bonus,
+                             прибыль_бонусная_чеки * coeff_bonus)
+                logger.debug("      Неликвиды: %.0f × %.3f = %.0f", выручка_неликвидов_чеки, coeff_illiquid,
+                             выручка_неликвидов_чеки * coeff_illiquid)
+                logger.debug("    Оптовые: %.0f руб. (добавятся позже)", прибыль_оптовая)
+                logger.debug("    Розн. прочая: %.0f руб. (добавятся позже)", прибыль_розн_прочая)
         
         # ===== ЭТАПЫ 3-11: Расчет для каждого сотрудника =====
         for _, emp in dept_df.iterrows():
@@ -513,24 +530,26 @@ class SalaryCalculator:
                         # ЭТАП 11: Разница по часам
                         results[original_idx]['Разница_по_часам'] = гарантия - гарантия_скорр
                         
-                        print(f"  🏆 {results[original_idx]['ФИО']}: {i+1} место")
-                        print(f"     Гарантия: {гарантия:,.0f} руб.")
-                        print(f"     Гарантия (скорр): {гарантия_скорр:,.0f} руб.")
-                        print(f"     Было: {текущая_зарплата:,.0f} руб. → Стало: {гарантия_скорр:,.0f} руб.")
-                        print(f"     Разница по часам: {гарантия - гарантия_скорр:,.0f} руб.")
+                        if debug:
+                            logger.debug("  🏆 %s: %d место", results[original_idx]['ФИО'], i + 1)
+                            logger.debug("     Гарантия: %.0f руб.", гарантия)
+                            logger.debug("     Гарантия (скорр): %.0f руб.", гарантия_скорр)
+                            logger.debug("     Было: %.0f руб. → Стало: %.0f руб.", текущая_зарплата, гарантия_скорр)
+                            logger.debug("     Разница по часам: %.0f руб.", гарантия - гарантия_скорр)
 
         # Вывод результатов расчета для отдела
-        if dept_name == "Сантехника санфаянс БД1":
-            print(f"\n📊 РЕЗУЛЬТАТЫ РАСЧЕТА ДЛЯ ОТДЕЛА: {dept_name}")
-            print("-"*80)
-            print(f"{'ФИО':30} | {'Доля':>6} | {'Дол_прем':>10} | {'Гарантии':>9} | {'Итог':>10} | {'Место':>5}")
-            print("-"*80)
+        if debug:
+            logger.debug("\n📊 РЕЗУЛЬТАТЫ РАСЧЕТА ДЛЯ ОТДЕЛА: %s", dept_name)
+            logger.debug("-"*80)
+            logger.debug("%-30s | %6s | %10s | %9s | %10s | %5s",
+                         'ФИО', 'Доля', 'Дол_прем', 'Гарантии', 'Итог', 'Место')
+            logger.debug("-"*80)
             for result in results:
-                print(f"{result['ФИО'][:30]:30} | {result['Доля']*100:6.1f}% | "
-                      f"{result['Дол_прем']:10,.0f} | "
-                      f"{result['Гарантия_1']}/{result['Гарантия_2']}/{result['Гарантия_3']:7} | "
-                      f"{result['Зарплата_итого']:10,.0f} | {result.get('Место', 0):5}")
-            print("="*80)
+                logger.debug("%-30s | %6.1f%% | %10.0f | %s/%s/%7s | %10.0f | %5s",
+                             result['ФИО'][:30], result['Доля'] * 100, result['Дол_прем'],
+                             result['Гарантия_1'], result['Гарантия_2'], result['Гарантия_3'],
+                             result['Зарплата_итого'], result.get('Место', 0))
+            logger.debug("="*80)
         return results
 
     
@@ -559,12 +578,10 @@ class SalaryCalculator:
         
         results_df = calculations['by_employee']
         
-        print("\n" + "="*80)
-        print("РЕЗУЛЬТАТЫ РАСЧЕТА")
-        print("="*80)
-        
-        # Сортируем отделы для удобного просмотра
-        departments = sorted(results_df['Отдел'].unique())
+        # Таблицы по отделам (строка на сотрудника) - только при уровне DEBUG
+        departments = sorted(results_df['Отдел'].unique()) if logger.isEnabledFor(logging.DEBUG) else []
+        if departments:
+            logger.debug("\n%s\nРЕЗУЛЬТАТЫ РАСЧЕТА\n%s", "="*80, "="*80)
         
         for dept in departments:
             dept_df = results_df[results_df['Отдел'] == dept]
@@ -577,29 +594,25 @@ class SalaryCalculator:
             guarantee_3 = dept_df['Гарантия_3'].iloc[0]
             
             if guarantee_1 > 0:
-                guarantee_info = f" (гарантии: {guarantee_1:,.0f}/{guarantee_2:,.0f}/{guarantee_3:,.0f})"
+                guarantee_info = " (гарантии: %.0f/%.0f/%.0f)" % (guarantee_1, guarantee_2, guarantee_3)
             
-            print(f"\n📁 {dept}{guarantee_info}")
-            print(f"Котел: {dept_boiler:,.0f} руб.")
-            print("-" * 100)
-            print(f"{'ФИО':25} | {'Часы':5} | {'Доля':7} | {'Доля котла':10} | {'Оклад':10} | {'Итого':10} | {'Место':5}")
-            print("-" * 100)
+            logger.debug("\n📁 %s%s", dept, guarantee_info)
+            logger.debug("Котел: %.0f руб.", dept_boiler)
+            logger.debug("-" * 100)
+            logger.debug("%-25s | %-5s | %-7s | %-10s | %-10s | %-10s | %-5s",
+                         'ФИО', 'Часы', 'Доля', 'Доля котла', 'Оклад', 'Итого', 'Место')
+            logger.debug("-" * 100)
             
             for _, row in dept_df.iterrows():
                 # Отмечаем гарантию знаком ⭐
                 guarantee_mark = "⭐" if row['Применена_гарантия'] > 0 else " "
                 
-                print(f"{row['ФИО'][:25]:25} | "
-                      f"{row['Отработано_часов']:5.0f} | "
-                      f"{row['Доля']*100:7.1f}% | "
-                      f"{row['Дол_прем']:10,.0f} | "
-                      f"{row['Оклад_инд']:10,.0f} | "
-                      f"{row['Зарплата_итого']:10,.0f} | "
-                      f"{row.get('Место', 0):4}{guarantee_mark}")
-        
-        print("\n" + "="*80)
-        print("ИТОГОВАЯ СТАТИСТИКА")
-        print("="*80)
+                logger.debug("%-25s | %5.0f | %7.1f%% | %10.0f | %10.0f | %10.0f | %4s%s",
+                             row['ФИО'][:25], row['Отработано_часов'], row['Доля'] * 100,
+                             row['Дол_прем'], row['Оклад_инд'], row['Зарплата_итого'],
+                             row.get('Место', 0), guarantee_mark)
+        
+        logger.info("\n%s\nИТОГОВАЯ СТАТИСТИКА\n%s", "="*80, "="*80)
         
         total_salary = results_df['Зарплата_итого'].sum()
         avg_salary = results_df['Зарплата_итого'].mean()
@@ -607,17 +620,17 @@ class SalaryCalculator:
         total_hours = results_df['Отработано_часов'].sum()
         total_sales = results_df['Выручка_всего'].sum()
         
-        print(f"Всего сотрудников: {len(results_df)}")
-        print(f"Фонд зарплаты: {total_salary:,.0f} руб.")
-        print(f"Средняя зарплата: {avg_salary:,.0f} руб.")
-        print(f"Медианная зарплата: {median_salary:,.0f} руб.")
-        print(f"Всего часов: {total_hours:,.0f}")
-        print(f"Всего продаж: {total_sales:,.0f} руб.")
+        logger.info("Всего сотрудников: %d", len(results_df))
+        logger.info("Фонд зарплаты: %.0f руб.", total_salary)
+        logger.info("Средняя зарплата: %.0f руб.", avg_salary)
+        logger.info("Медианная зарплата: %.0f руб.", median_salary)
+        logger.info("Всего часов: %.0f", total_hours)
+        logger.info("Всего продаж: %.0f руб.", total_sales)
         
         # Сотрудники с гарантиями
         with_guarantees = results_df[results_df['Применена_гарантия'] > 0]
         if not with_guarantees.empty:
-            print(f"\n🏆 СОТРУДНИКИ С ГАРАНТИЯМИ ({len(with_guarantees)}):")
+            logger.info("\n🏆 СОТРУДНИКИ С ГАРАНТИЯМИ (%d):", len(with_guarantees))
             for _, row in with_guarantees.iterrows():
-                print(f"  {row['ФИО']} - {row['Отдел']} ({row['Место']} место): "
-                      f"{row['Зарплата_итого']:,.0f} руб. (гарантия: {row['Применена_гарантия']:,.0f})")
+                logger.info("  %s - %s (%s место): %.0f руб. (гарантия: %.0f)", row['ФИО'], row['Отдел'],
+                            row['Место'], row['Зарплата_итого'], row['Применена_гарантия'])
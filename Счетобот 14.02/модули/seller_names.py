@@ -0,0 +1,179 @@
+# seller_names.py
+"""
+Проверка строк файлов продаж: ФИО продавца или нет
+
+Один классификатор на набор исключений УРС строится один раз за запуск и
+используется всеми парсерами. Шаблоны скомпилированы, исключения лежат в
+множестве (точное совпадение) и в одном регулярном выражении (вхождение),
+вердикты кэшируются по каждой уникальной строке.
+
+Правила двух файлов исторически различаются, поэтому есть два профиля:
+- 'sales' - Анализ продаж: исключения только по точному совпадению,
+  запрещенные слова, каждое слово ФИО с русскими буквами, без цифр и кавычек
+- 'zakaz' - Заказ.xls: исключения по точному совпадению и по вхождению,
+  заголовки блоков, не число, есть русские буквы, не "Фамилия И.О."
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+CACHE_SIZE = 65536
+
+# Версия правил для кэша парсинга продаж и заказов (увеличивать при изменении правил)
+PARSER_VERSION = 1
+
+# Анализ продаж: запрещенные фрагменты (проверяются в нижнем регистре)
+SALES_FORBIDDEN = [
+    'итого', 'всего', 'бд1', 'наименование', 'бд3', 'компания',
+    'оптовая', 'розничная', 'продажа', 'бд4', 'прочая', 'отдел',
+    'подразделение', 'филиал', 'управление', 'департамент',
+    '!!!!', 'nan', 'none',
+    'оптова', 'розничн', 'по чек', 'прочая', 'керамика',
+    'сантехника', 'инструмент', 'отпуск', 'в отпуске', 'болен',
+    'больничный', 'самообслуж', 'монтаж', 'ламинат', 'обои ',
+    ' обои', 'паркет', 'электр', 'продаж'
+]
+# Анализ продаж: признаки организаций (с учетом регистра)
+SALES_FIRM_MARKERS = ['"', '«', '»', '()', 'ООО', 'ИП', 'АО', 'ЗАО']
+
+# Заказ.xls: заголовки и обобщения
+ZAKAZ_FORBIDDEN = [
+    'незаказной', 'заказной', 'товар', 'продавец',
+    'итого', 'всего', 'итог', 'общий', 'основной',
+    '%', 'процент', 'руб.', 'рублей', 'ед.'
+]
+
+PROFILES = ('sales', 'zakaz')
+
+_CYRILLIC_ANY_CASE = re.compile('[а-яёА-ЯЁ]')
+_CYRILLIC_LOWER = re.compile('[а-яё]')
+_DIGIT = re.compile(r'\d')
+
+
+def _alternation(fragments):
+    """Одно регулярное выражение 'любой из фрагментов' (длинные первыми)"""
+    fragments = sorted(set(f for f in fragments if f), key=len, reverse=True)
+    if not fragments:
+        return None
+    return re.compile('|'.join(re.escape(f) for f in fragments))
+
+
+class SellerNameClassifier:
+    """Классификатор строк 'ФИО продавца' для одного набора исключений"""
+
+    def __init__(self, exclusions=None, profile='sales'):
+        if profile not in PROFILES:
+            raise ValueError(f"Неизвестный профиль: {profile}")
+        self.profile = profile
+
+        excluded = [e.lower().strip() for e in (exclusions or []) if e and isinstance(e, str)]
+        self.exact_exclusions = frozenset(excluded)
+        self.substring_exclusions = _alternation(excluded) if profile == 'zakaz' else None
+
+        forbidden = SALES_FORBIDDEN if profile == 'sales' else ZAKAZ_FORBIDDEN
+        self.forbidden = _alternation(forbidden)
+        self.firm_markers = _alternation(SALES_FIRM_MARKERS)
+
+        check = self._check_sales if profile == 'sales' else self._check_zakaz
+        self._cached_check = lru_cache(maxsize=CACHE_SIZE)(check)
+
+    def is_valid(self, name):
+        """Является ли строка ФИО продавца"""
+        if not name or not isinstance(name, str):
+            return False
+        return self._cached_check(name)
+
+    def classify_column(self, values):
+        """
+        Проверяет целую колонку: каждое уникальное значение один раз
+
+        Возвращает numpy-массив bool той же длины
+        """
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+        verdicts = np.array([self.is_valid(u) for u in uniques] + [False], dtype=bool)
+        return verdicts[codes]
+
+    def cache_info(self):
+        return self._cached_check.cache_info()
+
+    def _is_excluded(self, name_lower):
+        if name_lower in self.exact_exclusions:
+            return True
+        return bool(self.substring_exclusions and self.substring_exclusions.search(name_lower))
+
+    def _check_sales(self, name):
+        name_clean = name.strip()
+        name_lower = name_clean.lower()
+
+        if len(name_clean) < 4:
+            return False
+
+        # 1. Точное совпадение с исключениями
+        if self._is_excluded(name_lower):
+            return False
+
+        # 2. Запрещенные слова (в т.ч. тип продаж)
+        if self.forbidden.search(name_lower):
+            return False
+
+        # 3. Проверка на ФИО: не меньше 2 слов, в каждом есть русские буквы
+        words = name_clean.split()
+        if len(words) < 2:
+            return False
+        if not all(_CYRILLIC_ANY_CASE.search(word) for word in words):
+            return False
+
+        if name_clean.isupper() and len(name_clean) > 20:
+            return False
+
+        if any(char.isdigit() for char in name_clean):
+            return False
+
+        if self.firm_markers.search(name_clean):
+            return False
+
+        return True
+
+    def _check_zakaz(self, name):
+        name_clean = name.strip()
+        name_lower = name_clean.lower()
+
+        if len(name_clean) < 4:
+            return False
+
+        # 1-2. Исключения: точное совпадение или вхождение
+        if self._is_excluded(name_lower):
+            return False
+
+        # 3. Типовые заголовки и обобщения
+        if self.forbidden.search(name_lower):
+            return False
+
+        # 4. Число, а не ФИО
+        if name_clean.replace(' ', '').isdigit():
+            return False
+
+        # 5. Есть русские буквы
+        if not _CYRILLIC_LOWER.search(name_lower):
+            return False
+
+        # 6. Формат "Фамилия И.О." (инициалы через точку)
+        if '.' in name_lower and len(name_clean.split()) <= 2:
+            return False
+
+        return True
+
+
+# Классификаторы текущего запуска: (профиль, исключения) -> классификатор
+_classifiers = {}
+
+
+def get_seller_classifier(exclusions=None, profile='sales'):
+    """Классификатор для набора исключений (строится один раз за запуск)"""
+    key = (profile, tuple(e for e in (exclusions or []) if isinstance(e, str)))
+    if key not in _classifiers:
+        _classifiers[key] = SellerNameClassifier(key[1], profile)
+    return _classifiers[key]
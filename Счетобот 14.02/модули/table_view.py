@@ -0,0 +1,298 @@
+# table_view.py
+"""
+Окно-таблица для просмотра DataFrame (виртуальная прокрутка)
+
+Прежние превью печатали каждую строку в текстовое поле лога - на полной сети
+филиалов это тысячи insert и медленная прокрутка. Здесь ttk.Treeview держит
+ровно столько строк, сколько помещается на экране; при прокрутке меняются
+только их значения, строки берутся из DataFrame срезом iloc.
+
+Сортировка (щелчок по заголовку) и фильтр (подстрока, без учета регистра)
+выполняются в pandas над всей таблицей, виджет их не делает.
+"""
+
+import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
+
+import numpy as np
+import pandas as pd
+
+ROW_HEIGHT = 20         # наименьшая высота строки; реальная - из стиля (_row_height)
+ROW_PADDING = 4
+HEADER_HEIGHT = 25
+HEADER_PADDING = 8
+STYLE = "DataFrameView.Treeview"
+MIN_VISIBLE_ROWS = 5
+FILTER_DELAY_MS = 300
+ALL_COLUMNS = "Все колонки"
+
+
+def _font_linespace(style, style_name):
+    """Высота строки шрифта стиля в пикселях (учитывает масштаб экрана)"""
+    return tkfont.Font(font=style.lookup(style_name, 'font') or 'TkDefaultFont').metrics('linespace')
+
+
+def _row_height(widget):
+    """
+    Высота строки Treeview в пикселях
+
+    Берется из стиля; если тема ее не задает - считается по шрифту и
+    записывается в стиль явно, чтобы виджет и пул строк знали одну и ту же высоту
+    """
+    style = ttk.Style(widget)
+    try:
+        height = int(style.lookup(STYLE, 'rowheight'))
+    except (TypeError, ValueError, tk.TclError):
+        height = 0
+    if height <= 0:
+        height = max(ROW_HEIGHT, _font_linespace(style, STYLE) + ROW_PADDING)
+        style.configure(STYLE, rowheight=height)
+    return height
+
+
+def _header_height(widget):
+    """Высота строки заголовков (тоже растет со шрифтом)"""
+    style = ttk.Style(widget)
+    return max(HEADER_HEIGHT, _font_linespace(style, 'Treeview.Heading') + HEADER_PADDING)
+
+
+def format_cell(value):
+    """Значение ячейки для показа: числа в русском формате, пустые - пусто"""
+    if value is None:
+        return ""
+    if isinstance(value, (bool, np.bool_)):
+        return "Да" if value else "Нет"
+    if isinstance(value, (int, np.integer)):
+        return f"{value:,}".replace(",", " ")
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return ""
+        if float(value).is_integer():
+            return f"{value:,.0f}".replace(",", " ")
+        return f"{value:,.2f}".replace(",", " ").replace(".", ",")
+    return str(value)
+
+
+class DataFrameView:
+    """
+    Окно с таблицей DataFrame
+
+    columns: какие колонки показывать (по умолчанию все)
+    widths: {колонка: ширина в пикселях}
+    formatters: {колонка: функция(значение) -> строка}
+    highlight: {цвет: функция(DataFrame) -> bool Series} - подсветка строк,
+               вычисляется в pandas над отфильтрованной таблицей
+    """
+
+    def __init__(self, parent, df, title, columns=None, widths=None,
+                 formatters=None, highlight=None, summary=None):
+        self.columns = [str(c) for c in (columns or df.columns)]
+        self.source = df.reset_index(drop=True)
+        self.source.columns = [str(c) for c in self.source.columns]
+        self.source = self.source[self.columns]
+        self.view = self.source
+        self.formatters = formatters or {}
+        self.highlight = highlight or {}
+        self.highlight_masks = {}
+        self.offset = 0
+        self.sort_column = None
+        self.sort_ascending = True
+        self._search_text = {}
+        self._filter_job = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.geometry("1100x650")
+
+        # Фильтр
+        filter_frame = ttk.Frame(self.window, padding=(10, 10, 10, 0))
+        filter_frame.pack(fill=tk.X)
+        ttk.Label(filter_frame, text="Фильтр:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        entry = ttk.Entry(filter_frame, textvariable=self.filter_var, width=40)
+        entry.pack(side=tk.LEFT, padx=5)
+        entry.bind('<KeyRelease>', self._schedule_filter)
+        self.filter_column = ttk.Combobox(filter_frame, values=[ALL_COLUMNS] + self.columns,
+                                          state='readonly', width=25)
+        self.filter_column.set(ALL_COLUMNS)
+        self.filter_column.pack(side=tk.LEFT, padx=5)
+        self.filter_column.bind('<<ComboboxSelected>>', lambda e: self.apply_filter())
+        ttk.Button(filter_frame, text="Сбросить", command=self.reset).pack(side=tk.LEFT, padx=5)
+        if summary:
+            ttk.Label(filter_frame, text=summary).pack(side=tk.RIGHT)
+
+        # Таблица
+        table_frame = ttk.Frame(self.window, padding=10)
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        self.row_height = _row_height(self.window)
+        self.header_height = _header_height(self.window)
+        self.tree = ttk.Treeview(table_frame, columns=self.columns, show='headings', style=STYLE,
+                                 height=MIN_VISIBLE_ROWS, selectmode='browse')
+        for column in self.columns:
+            self.tree.heading(column, text=column, command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=(widths or {}).get(column, 110), stretch=True,
+                             anchor=tk.E if self._is_numeric(column) else tk.W)
+        self.scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        for color in self.highlight:
+            self.tree.tag_configure(color, foreground=color)
+
+        self.status = ttk.Label(self.window, relief=tk.SUNKEN, anchor=tk.W)
+        self.status.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        # Пул строк виджета - столько, сколько видно
+        self.items = []
+        self._resize_pool(MIN_VISIBLE_ROWS)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        for key, step in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'page-'), ('<Next>', 'page+')):
+            self.tree.bind(key, lambda e, s=step: self._on_key(s))
+        self.tree.bind('<Home>', lambda e: self.scroll_to(0))
+        self.tree.bind('<End>', lambda e: self.scroll_to(len(self.view)))
+
+        self._update_highlight()
+        self.render()
+
+    # ===== ДАННЫЕ (pandas) =====
+
+    def _is_numeric(self, column):
+        return pd.api.types.is_numeric_dtype(self.source[column])
+
+    def _text(self, column):
+        """Колонка в нижнем регистре для поиска (строится один раз)"""
+        if column not in self._search_text:
+            self._search_text[column] = self.source[column].astype(str).str.lower()
+        return self._search_text[column]
+
+    def apply_filter(self):
+        self._filter_job = None
+        text = self.filter_var.get().strip().lower()
+        if not text:
+            view = self.source
+        else:
+            columns = self.columns if self.filter_column.get() == ALL_COLUMNS else [self.filter_column.get()]
+            mask = np.zeros(len(self.source), dtype=bool)
+            for column in columns:
+                mask |= self._text(column).str.contains(text, regex=False).to_numpy()
+            view = self.source[mask]
+        self.view = self._sorted(view)
+        self.offset = 0
+        self._update_highlight()
+        self.render()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_ascending = not self.sort_ascending
+        else:
+            self.sort_column, self.sort_ascending = column, True
+        for c in self.columns:
+            arrow = (" ▲" if self.sort_ascending else " ▼") if c == column else ""
+            self.tree.heading(c, text=c + arrow)
+        self.view = self._sorted(self.view)
+        self.offset = 0
+        self._update_highlight()
+        self.render()
+
+    def _sorted(self, view):
+        if self.sort_column is None:
+            return view
+        try:
+            return view.sort_values(self.sort_column, ascending=self.sort_ascending,
+                                    kind='stable', na_position='last')
+        except TypeError:
+            # Смешанные типы в колонке - сортируем как текст
+            return view.sort_values(self.sort_column, ascending=self.sort_ascending, kind='stable',
+                                    na_position='last', key=lambda s: s.astype(str))
+
+    def reset(self):
+        self.filter_var.set("")
+        self.filter_column.set(ALL_COLUMNS)
+        self.apply_filter()
+
+    def _update_highlight(self):
+        self.highlight_masks = {color: np.asarray(rule(self.view), dtype=bool)
+                                for color, rule in self.highlight.items()}
+
+    # ===== ОТОБРАЖЕНИЕ (только видимые строки) =====
+
+    def _resize_pool(self, count):
+        while len(self.items) < count:
+            self.items.append(self.tree.insert('', tk.END, values=()))
+        while len(self.items) > count:
+            self.tree.delete(self.items.pop())
+        self.tree.configure(height=count)
+
+    def render(self):
+        visible = len(self.items)
+        self.offset = max(0, min(self.offset, len(self.view) - visible))
+        window = self.view.iloc[self.offset:self.offset + visible]
+
+        formatters = [self.formatters.get(c, format_cell) for c in self.columns]
+        rows = list(window.itertuples(index=False, name=None))
+        for position, item in enumerate(self.items):
+            if position >= len(rows):
+                self.tree.item(item, values=(), tags=())
+                continue
+            values = [format_value(value) for format_value, value in zip(formatters, rows[position])]
+            tags = [color for color, mask in self.highlight_masks.items() if mask[self.offset + position]]
+            self.tree.item(item, values=values, tags=tags)
+
+        total = len(self.view)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+            shown = f"Строки {self.offset + 1}-{self.offset + len(window)} из {total}"
+        else:
+            self.scrollbar.set(0, 1)
+            shown = "Нет строк"
+        if total != len(self.source):
+            shown += f" (отфильтровано из {len(self.source)})"
+        self.status.config(text=shown)
+
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset):
+        self.offset = offset
+        self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.view)))
+        elif unit == 'pages':
+            self.scroll(int(value) * len(self.items))
+        else:
+            self.scroll(int(value))
+
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_key(self, step):
+        if step == 'page-':
+            self.scroll(-len(self.items))
+        elif step == 'page+':
+            self.scroll(len(self.items))
+        else:
+            self.scroll(step)
+        return 'break'
+
+    def _on_resize(self, event):
+        rows = max(MIN_VISIBLE_ROWS, (event.height - self.header_height) // self.row_height)
+        if rows != len(self.items):
+            self._resize_pool(rows)
+            self.render()
+
+    def _schedule_filter(self, event=None):
+        if self._filter_job is not None:
+            self.window.after_cancel(self._filter_job)
+        self._filter_job = self.window.after(FILTER_DELAY_MS, self.apply_filter)
+
+
+def show_dataframe(parent, df, title, **options):
+    """Открывает окно с таблицей DataFrame (параметры - см. DataFrameView)"""
+    return DataFrameView(parent, df, title, **options)
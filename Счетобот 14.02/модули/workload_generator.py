@@ -0,0 +1,716 @@
+# workload_generator.py
+"""
+Синтетические входные файлы месяца - в тех же раскладках, что выгрузки 1С
+
+Реальные файлы с зарплатами передавать нельзя, поэтому для проверки и
+замеров скорости файлы генерируются:
+    График.xlsx                  - сетка дней: период в C1, "Сотрудник", дни 1..31,
+                                   "Итого часов"; отметки 8/11/В/О/Б/Н
+    Сотрудники по отделам.xlsx   - Сотрудник | Филиал | Директор | Отдел
+    УРС.xlsx                     - оклад в I2, таблица отделов A:R с гарантиями мест
+    Список бонусные позиции.xlsx - Код | Наименование | Ед | Цена | Статус
+    Анализ продаж.xlsx           - период в B5, "Продавец", затем иерархия
+                                   фирма -> продавец -> тип продаж -> товары
+    Заказ.xlsx                   - блоки "Незаказной" и "Заказной" по продавцам
+
+Масштаб - от одного филиала до 100 тыс. сотрудников и 10 млн товарных строк
+(готовые наборы - SCALES). Excel вмещает 1 048 576 строк, поэтому при
+file_format='auto' большие листы пишутся в .feather (нужен pyarrow): парсеры
+читают их напрямую через columnar_store, числа в них хранятся строками, как
+после read_excel(dtype=str).
+
+Справочники (сотрудники, УРС, бонусы) зависят только от seed, график и
+продажи - еще и от месяца: архив из нескольких месяцев (generate_archive)
+проверяет и повторное использование кэша в пакетном расчете.
+
+    python -m модули.workload_generator данные_тест --scale network
+    python -m модули.workload_generator архив_тест --scale large --months 3
+"""
+
+import argparse
+import calendar
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+EXCEL_MAX_ROWS = 1_048_576
+FILE_FORMATS = ('auto', 'xlsx', 'feather')
+
+# Готовые масштабы: сотрудников, филиалов, товарных строк на продавца
+SCALES = {
+    'branch': {'employees': 40, 'branches': 1, 'items_per_seller': 20},
+    'network': {'employees': 2_000, 'branches': 10, 'items_per_seller': 100},
+    'large': {'employees': 20_000, 'branches': 60, 'items_per_seller': 100},
+    'max': {'employees': 100_000, 'branches': 300, 'items_per_seller': 100},
+}
+
+FILE_NAMES = {
+    'schedule': "График",
+    'staff': "Сотрудники по отделам",
+    'urs': "УРС",
+    'bonus': "Список бонусные позиции",
+    'sales': "Анализ продаж",
+    'zakaz': "Заказ",
+}
+
+# ФИО: фамилии на -ов/-ев/-ин (женская форма + 'а'), имена, отчества (муж., жен.)
+SURNAMES = [
+    'Иванов', 'Петров', 'Сидоров', 'Кузнецов', 'Смирнов', 'Попов', 'Волков', 'Зайцев',
+    'Орлов', 'Соколов', 'Лебедев', 'Козлов', 'Новиков', 'Морозов', 'Егоров', 'Павлов',
+    'Семенов', 'Голубев', 'Виноградов', 'Богданов', 'Воробьев', 'Федоров', 'Михайлов',
+    'Беляев', 'Тарасов', 'Белов', 'Комаров', 'Киселев', 'Макаров', 'Андреев', 'Ковалев',
+    'Ильин', 'Гусев', 'Титов', 'Кузьмин', 'Кудрявцев', 'Баранов', 'Куликов', 'Алексеев',
+    'Степанов', 'Яковлев', 'Сорокин', 'Сергеев', 'Романов', 'Захаров', 'Борисов', 'Королев',
+    'Герасимов', 'Пономарев', 'Григорьев', 'Лазарев', 'Медведев', 'Ершов', 'Никитин',
+    'Соболев', 'Рябов', 'Поляков', 'Цветков', 'Данилов', 'Жуков', 'Фролов', 'Журавлев',
+    'Николаев', 'Крылов', 'Максимов', 'Сидельников', 'Осипов', 'Белоусов', 'Федотов',
+    'Дорофеев', 'Мартынов', 'Щербаков', 'Блинов', 'Колесников', 'Карпов', 'Афанасьев',
+    'Власов', 'Маслов', 'Исаков', 'Тихонов', 'Аксенов', 'Гаврилов', 'Родионов', 'Котов',
+    'Горбунов', 'Кудряшов', 'Быков', 'Зуев', 'Третьяков', 'Савельев', 'Панов', 'Рыбаков',
+    'Суворов', 'Абрамов', 'Воронов', 'Мухин', 'Архипов', 'Трофимов', 'Мартынюков', 'Горшков',
+]
+MALE_NAMES = [
+    'Александр', 'Алексей', 'Андрей', 'Антон', 'Артем', 'Борис', 'Вадим', 'Валерий',
+    'Василий', 'Виктор', 'Владимир', 'Вячеслав', 'Геннадий', 'Георгий', 'Григорий', 'Денис',
+    'Дмитрий', 'Евгений', 'Егор', 'Иван', 'Игорь', 'Илья', 'Кирилл', 'Константин', 'Леонид',
+    'Максим', 'Михаил', 'Никита', 'Николай', 'Олег', 'Павел', 'Роман', 'Руслан', 'Сергей',
+    'Станислав', 'Степан', 'Тимур', 'Федор', 'Юрий', 'Ярослав',
+]
+FEMALE_NAMES = [
+    'Анастасия', 'Анна', 'Валентина', 'Валерия', 'Вера', 'Виктория', 'Галина', 'Дарья',
+    'Евгения', 'Екатерина', 'Елена', 'Елизавета', 'Жанна', 'Зоя', 'Инна', 'Ирина', 'Кристина',
+    'Ксения', 'Лариса', 'Лидия', 'Любовь', 'Людмила', 'Марина', 'Мария', 'Надежда', 'Наталья',
+    'Нина', 'Оксана', 'Ольга', 'Светлана',
+]
+PATRONYMICS = [
+    ('Александрович', 'Александровна'), ('Алексеевич', 'Алексеевна'), ('Андреевич', 'Андреевна'),
+    ('Борисович', 'Борисовна'), ('Васильевич', 'Васильевна'), ('Викторович', 'Викторовна'),
+    ('Владимирович', 'Владимировна'), ('Геннадьевич', 'Геннадьевна'), ('Дмитриевич', 'Дмитриевна'),
+    ('Евгеньевич', 'Евгеньевна'), ('Иванович', 'Ивановна'), ('Игоревич', 'Игоревна'),
+    ('Константинович', 'Константиновна'), ('Михайлович', 'Михайловна'), ('Николаевич', 'Николаевна'),
+    ('Олегович', 'Олеговна'), ('Павлович', 'Павловна'), ('Петрович', 'Петровна'),
+    ('Романович', 'Романовна'), ('Сергеевич', 'Сергеевна'), ('Станиславович', 'Станиславовна'),
+    ('Степанович', 'Степановна'), ('Федорович', 'Федоровна'), ('Юрьевич', 'Юрьевна'),
+    ('Ярославович', 'Ярославовна'), ('Анатольевич', 'Анатольевна'), ('Валерьевич', 'Валерьевна'),
+    ('Вячеславович', 'Вячеславовна'), ('Григорьевич', 'Григорьевна'), ('Леонидович', 'Леонидовна'),
+]
+
+# Торговые отделы филиала ("<категория> БД<n>") и отделы офиса (норма 'офис')
+CATEGORIES = [
+    'Керамика', 'Сантехника', 'Двери', 'Обои', 'Ламинат', 'Краски', 'Электрика', 'Инструмент',
+    'Светильники', 'Плитка', 'Мебель', 'Текстиль', 'Сад', 'Крепеж', 'Кровля', 'Окна',
+    'Отопление', 'Водоснабжение', 'Декор', 'Ковры',
+]
+OFFICE_DEPARTMENTS = ['Бухгалтерия', 'Маркетинг']
+OFFICE_SHARE = 0.05
+EMPLOYEES_PER_DEPARTMENT = 8
+# Номера филиалов: первые три - те, что различает дашборд
+BRANCH_NUMBERS = [1, 3, 4]
+
+# Фирма-владелец продаж и внутренняя фирма из исключений УРС (колонка A)
+OWN_FIRM = 'ООО "СТРОЙМАРКЕТ"'
+EXCLUDED_FIRM = 'ООО "РОМАШКА"'
+
+SALE_TYPE_LABELS = ['Розничная продажа по чекам', 'Оптовая продажа', 'Розничная продажа (прочая)']
+# Вероятность блока каждого типа продаж у продавца и доля товарных строк в нем
+SALE_TYPE_PROBABILITY = [1.0, 0.35, 0.25]
+SALE_TYPE_WEIGHT = [0.8, 0.12, 0.08]
+
+UNITS = ['шт', 'м2', 'упак', 'компл']
+CATALOG_PER_LINE = 0.02          # размер каталога: 2% товарных строк, не меньше 500
+BONUS_SHARE = 0.05               # бонусные позиции каталога
+NON_LIQUID_SHARE = 0.02          # неликвиды ("бонус уценка")
+UNKNOWN_SELLER_SHARE = 0.02      # продавцы, которых нет в списке сотрудников
+ZAKAZ_SHARE = 0.6                # продавцы с данными в Заказ.xlsx
+
+DAY_MARKS = ['8', '11', 'В', 'О', 'Б', 'Н']
+MARK_8, MARK_11, MARK_WEEKEND, MARK_VACATION, MARK_SICK, MARK_NO_SHOW = range(len(DAY_MARKS))
+MARK_HOURS = np.array([8, 11, 0, 0, 0, 0])
+
+
+class _Sheet:
+    """
+    Лист для записи: строки шапки (список списков) и тело по колонкам
+
+    body: {индекс колонки: pd.Categorical или numpy-массив чисел (NaN - пусто)}
+    columns: имена колонок для файла с заголовком (Сотрудники), иначе None
+    """
+
+    def __init__(self, width, head=None, body=None, rows=0, columns=None):
+        self.width = width
+        self.head = head or []
+        self.body = body or {}
+        self.rows = rows
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.head) + self.rows + (1 if self.columns else 0)
+
+
+def _categorical(codes, categories):
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int32), categories=categories)
+
+
+# ===== ЗАПИСЬ ФАЙЛОВ =====
+
+def _write_xlsx(sheet, path):
+    """Потоковая запись openpyxl (write_only): числа - числами, пусто - пустая ячейка"""
+    from openpyxl import Workbook
+
+    columns = []
+    for j in range(sheet.width):
+        values = sheet.body.get(j)
+        if values is None:
+            columns.append([None] * sheet.rows)
+        elif isinstance(values, pd.Categorical):
+            text = np.asarray(values, dtype=object)
+            text[values.codes < 0] = None
+            columns.append(text.tolist())
+        else:
+            numbers = values.astype(object)
+            if values.dtype.kind == 'f':
+                numbers[np.isnan(values)] = None
+            columns.append(numbers.tolist())
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    if sheet.columns:
+        ws.append(sheet.columns)
+    for row in sheet.head:
+        ws.append(list(row) + [None] * (sheet.width - len(row)))
+    for row in zip(*columns):
+        ws.append(row)
+    wb.save(path)
+
+
+def _cell_text(value):
+    """Ячейка шапки строкой, как ее отдает read_excel(dtype=str): 30000.0 -> '30000'"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _write_feather(sheet, path):
+    """
+    Запись в .feather строками (как read_excel(dtype=str)) без Python-строк на каждую ячейку
+
+    Текстовые колонки пишутся словарем (коды + уникальные значения), числа
+    приводятся к строкам в pyarrow
+    """
+    import pyarrow as pa
+    from pyarrow import feather
+
+    arrays = []
+    for j in range(sheet.width):
+        head = pa.array([_cell_text(row[j]) if j < len(row) else None for row in sheet.head],
+                        type=pa.string())
+        values = sheet.body.get(j)
+        if values is None:
+            body = pa.nulls(sheet.rows, type=pa.string())
+        elif isinstance(values, pd.Categorical):
+            codes = values.codes
+            body = pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0),
+                pa.array(np.asarray(values.categories, dtype=object), type=pa.string()),
+            ).cast(pa.string())
+        else:
+            body = pa.array(values, from_pandas=True).cast(pa.string())
+        arrays.append(pa.chunked_array([head, body], type=pa.string()))
+
+    names = sheet.columns or [str(j) for j in range(sheet.width)]
+    table = pa.table(arrays, names=names)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_sheet(sheet, folder, kind, file_format):
+    """Пишет лист в <папка>/<имя файла>.xlsx или .feather; возвращает путь"""
+    if file_format == 'auto':
+        file_format = 'xlsx' if len(sheet) <= EXCEL_MAX_ROWS else 'feather'
+    if file_format == 'xlsx' and len(sheet) > EXCEL_MAX_ROWS:
+        raise ValueError(f"{FILE_NAMES[kind]}: {len(sheet):,} строк не помещаются в Excel "
+                         f"({EXCEL_MAX_ROWS:,}) - используйте file_format='feather'")
+
+    path = os.path.join(folder, f"{FILE_NAMES[kind]}.{file_format}")
+    if file_format == 'feather':
+        _write_feather(sheet, path)
+    else:
+        _write_xlsx(sheet, path)
+
+    # Файл другого формата от прошлой генерации нашелся бы первым (поиск по имени)
+    for extension in ('xlsx', 'feather'):
+        stale = os.path.join(folder, f"{FILE_NAMES[kind]}.{extension}")
+        if stale != path and os.path.exists(stale):
+            os.remove(stale)
+    return path
+
+
+# ===== СПРАВОЧНИКИ =====
+
+def make_people(count, rng):
+    """Уникальные ФИО (мужские и женские) в случайном порядке"""
+    male = len(SURNAMES) * len(MALE_NAMES) * len(PATRONYMICS)
+    female = len(SURNAMES) * len(FEMALE_NAMES) * len(PATRONYMICS)
+    if count > male + female:
+        raise ValueError(f"Не больше {male + female:,} уникальных ФИО")
+
+    names = []
+    for number in rng.choice(male + female, size=count, replace=False).tolist():
+        is_female = number >= male
+        if is_female:
+            number -= male
+        number, patronymic = divmod(number, len(PATRONYMICS))
+        surname, name = divmod(number, len(FEMALE_NAMES) if is_female else len(MALE_NAMES))
+        if is_female:
+            names.append(f"{SURNAMES[surname]}а {FEMALE_NAMES[name]} {PATRONYMICS[patronymic][1]}")
+        else:
+            names.append(f"{SURNAMES[surname]} {MALE_NAMES[name]} {PATRONYMICS[patronymic][0]}")
+    return names
+
+
+def make_structure(employees, branches=1, seed=0):
+    """
+    Сотрудники, филиалы и отделы - одинаковые для всех месяцев одного seed
+
+    Возвращает DataFrame: ФИО, Филиал, Директор, Отдел, Офис (bool)
+    """
+    rng = np.random.default_rng(seed)
+    branch_numbers = (BRANCH_NUMBERS + list(range(5, 5 + branches)))[:branches]
+    branch_names = [f"БД{n}" for n in branch_numbers]
+    directors = make_people(branches, np.random.default_rng(seed + 1))
+
+    office_count = int(round(employees * OFFICE_SHARE)) if employees >= 20 else 0
+    shop_count = employees - office_count
+    per_branch = max(1, shop_count // branches)
+    dept_count = min(len(CATEGORIES), max(1, per_branch // EMPLOYEES_PER_DEPARTMENT))
+
+    # Торговые сотрудники: филиал по кругу, отдел - случайно среди отделов филиала
+    branch_of = np.arange(shop_count) % branches
+    dept_of = rng.integers(0, dept_count, size=shop_count)
+    # Каждый отдел получает хотя бы одного сотрудника, если людей хватает
+    first = min(shop_count, branches * dept_count)
+    dept_of[:first] = np.arange(first) // branches % dept_count
+
+    departments = [f"{CATEGORIES[d]} {branch_names[b]}" for b, d in zip(branch_of.tolist(), dept_of.tolist())]
+    branch_column = [branch_names[b] for b in branch_of.tolist()]
+    director_column = [directors[b] for b in branch_of.tolist()]
+
+    office_depts = rng.integers(0, len(OFFICE_DEPARTMENTS), size=office_count)
+    departments += [OFFICE_DEPARTMENTS[d] for d in office_depts.tolist()]
+    branch_column += [branch_names[0]] * office_count
+    director_column += [directors[0]] * office_count
+
+    order = rng.permutation(employees)
+    staff = pd.DataFrame({
+        'ФИО': make_people(employees, rng),
+        'Филиал': np.array(branch_column, dtype=object)[order],
+        'Директор': np.array(director_column, dtype=object)[order],
+        'Отдел': np.array(departments, dtype=object)[order],
+        'Офис': (np.arange(employees) >= shop_count)[order],
+    })
+    return staff
+
+
+def _initials(fio):
+    surname, name, patronymic = fio.split()
+    return f"{surname} {name[0]}.{patronymic[0]}."
+
+
+def staff_sheet(staff):
+    return _Sheet(4, rows=len(staff), columns=['Сотрудник', 'Филиал', 'Директор', 'Отдел'], body={
+        0: pd.Categorical(staff['ФИО']),
+        1: pd.Categorical(staff['Филиал']),
+        2: pd.Categorical(staff['Директор'].map(_initials)),
+        3: pd.Categorical(staff['Отдел']),
+    })
+
+
+def urs_sheet(staff, salary=30000, seed=0):
+    """Лист УРС: оклад в I2, заголовок в строке 4, отделы с 5-й строки (A - исключения)"""
+    rng = np.random.default_rng(seed + 2)
+    head = [[None] * 18 for _ in range(3)]
+    head[0][0] = "Условия расчета зарплаты"
+    head[0][8] = "Оклад"
+    head[1][8] = salary
+    head.append(["Фирмы и отделы исключения", "Отделы для расчета", "Филиал", "Базовая часть",
+                 "Средняя ЗП", "Минималка", "Нелик в котле", "Нелик %", "Норма часов",
+                 "Обычный товар %", "Бонусный товар %", "Неликвид %", "Опт %",
+                 "1 место", "2 место", "3 место", "4 место", "5 место"])
+
+    departments = staff.drop_duplicates('Отдел')[['Отдел', 'Филиал', 'Офис']]
+    exclusions = [EXCLUDED_FIRM, 'ИП Смирнов А.В.']
+    for i, (dept, branch, office) in enumerate(departments.itertuples(index=False)):
+        average = round(float(rng.integers(50, 90)) * 1000)
+        head.append([
+            exclusions[i] if i < len(exclusions) else None,
+            dept, branch,
+            round(float(rng.integers(8, 15)) * 1000),
+            average,
+            round(average * 0.55, -3),
+            'да' if rng.random() < 0.5 else 'нет',
+            float(rng.choice([0.3, 0.5, 0.7])),
+            'офис' if office else 'магазин',
+            float(rng.choice([0.08, 0.1, 0.12])),
+            float(rng.choice([0.15, 0.2, 0.25])),
+            float(rng.choice([0.03, 0.05])),
+            float(rng.choice([0.02, 0.03])),
+            5000, 3000, 1000,
+            0 if rng.random() < 0.7 else 500,
+            0,
+        ])
+    return _Sheet(18, head=head)
+
+
+def make_catalog(lines, seed=0):
+    """Каталог товаров: коды, названия, единицы, статус бонуса (0/1 бонус/2 неликвид)"""
+    rng = np.random.default_rng(seed + 3)
+    size = max(500, int(lines * CATALOG_PER_LINE))
+    codes = np.sort(rng.choice(np.arange(100_000, 100_000 + size * 10), size=size, replace=False))
+    category = rng.integers(0, len(CATEGORIES), size=size)
+    status = np.zeros(size, dtype=np.int8)
+    marked = rng.permutation(size)
+    status[marked[:int(size * BONUS_SHARE)]] = 1
+    status[marked[int(size * BONUS_SHARE):int(size * (BONUS_SHARE + NON_LIQUID_SHARE))]] = 2
+    return pd.DataFrame({
+        'code': codes,
+        'name': [f"{CATEGORIES[c]} арт. {code}" for c, code in zip(category.tolist(), codes.tolist())],
+        'unit': rng.integers(0, len(UNITS), size=size),
+        'price': np.round(rng.lognormal(7.5, 1.0, size=size), 2),
+        'status': status,
+    })
+
+
+def bonus_sheet(catalog):
+    """Список бонусных позиций: только товары со статусом 'бонус' или 'бонус уценка'"""
+    listed = catalog[catalog['status'] > 0]
+    return _Sheet(5, head=[["Код", "Наименование", "Ед", "Цена", "Статус"]], rows=len(listed), body={
+        0: pd.Categorical(listed['code'].astype(str)),
+        1: pd.Categorical(listed['name']),
+        2: _categorical(listed['unit'], UNITS),
+        3: listed['price'].to_numpy(),
+        4: _categorical(listed['status'] - 1, ['бонус', 'бонус уценка']),
+    })
+
+
+# ===== ДАННЫЕ МЕСЯЦА =====
+
+def _period(year, month):
+    days = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, days)
+
+
+def schedule_sheet(staff, year, month, seed=0):
+    """
+    График: смены 2/2 по 11 часов (магазин) или 5/2 по 8 (офис), отпуска и
+    больничные блоками, редкие невыходы; "Итого часов" - сумма часов по дням
+    """
+    rng = np.random.default_rng([seed, year, month, 4])
+    first, last = _period(year, month)
+    days = last.day
+    weekday = np.array([date(year, month, d).weekday() for d in range(1, days + 1)])
+    n = len(staff)
+
+    office = staff['Офис'].to_numpy()
+    shift_phase = rng.integers(0, 4, size=n)
+    day_index = np.arange(days)
+    on_shift = ((day_index[None, :] + shift_phase[:, None]) % 4) < 2
+    marks = np.where(on_shift, MARK_11, MARK_WEEKEND).astype(np.int8)
+    marks[office] = np.where(weekday < 5, MARK_8, MARK_WEEKEND)[None, :]
+
+    def blocks(share, min_length, max_length, mark):
+        who = np.flatnonzero(rng.random(n) < share)
+        lengths = rng.integers(min_length, max_length + 1, size=len(who))
+        starts = rng.integers(0, days, size=len(who))
+        for row, start, length in zip(who.tolist(), starts.tolist(), lengths.tolist()):
+            marks[row, start:start + length] = mark
+
+    blocks(0.08, 7, 14, MARK_VACATION)
+    blocks(0.03, 3, 7, MARK_SICK)
+    marks[(rng.random((n, days)) < 0.002) & (marks <= MARK_11)] = MARK_NO_SHOW
+
+    width = 3 + days + 1
+    head = [[None] * width for _ in range(4)]
+    head[0][2] = f"График работы  С {first:%d.%m.%Y} по {last:%d.%m.%Y} "
+    head[2][0], head[2][1], head[2][width - 1] = "№", "Сотрудник", "Итого часов"
+    for d in range(days):
+        head[3][3 + d] = str(d + 1)
+
+    body = {
+        0: np.arange(1, n + 1),
+        1: pd.Categorical(staff['ФИО']),
+        width - 1: MARK_HOURS[marks].sum(axis=1),
+    }
+    for d in range(days):
+        body[3 + d] = _categorical(marks[:, d], DAY_MARKS)
+    return _Sheet(width, head=head, body=body, rows=n)
+
+
+def make_sales_lines(staff, catalog, items_per_seller, year, month, seed=0):
+    """
+    Товарные строки месяца: продавец, тип продаж, товар, количество, выручка, прибыль
+
+    Продавцы - торговые сотрудники и немного посторонних (уволенные, совместители)
+    """
+    rng = np.random.default_rng([seed, year, month, 5])
+    sellers = staff.loc[~staff['Офис'], 'ФИО'].tolist()
+    unknown = int(len(sellers) * UNKNOWN_SELLER_SHARE)
+    if unknown:
+        outsiders = set(make_people(len(staff) + unknown, np.random.default_rng(seed + 6))) - set(staff['ФИО'])
+        sellers += sorted(outsiders)[:unknown]
+    seller_count = len(sellers)
+
+    # Блоки типов продаж: розница по чекам у всех, опт и прочая - у части продавцов
+    has_block = rng.random((seller_count, len(SALE_TYPE_LABELS))) < SALE_TYPE_PROBABILITY
+    block_seller, block_type = np.nonzero(has_block)
+    weights = np.asarray(SALE_TYPE_WEIGHT)[block_type]
+    seller_weight = np.bincount(block_seller, weights=weights, minlength=seller_count)
+    expected = items_per_seller * weights / seller_weight[block_seller]
+    block_items = np.maximum(1, rng.poisson(expected))
+
+    lines = int(block_items.sum())
+    # Популярность товаров убывает: частые коды - начало каталога
+    item = np.minimum((rng.pareto(1.2, size=lines) * len(catalog) / 20).astype(np.int64), len(catalog) - 1)
+    item = rng.permutation(len(catalog))[item]
+    quantity = np.where(rng.random(lines) < 0.8, 1, rng.integers(2, 11, size=lines))
+    price = catalog['price'].to_numpy()[item] * rng.uniform(0.9, 1.1, size=lines)
+    revenue = np.round(price * quantity, 2)
+    status = catalog['status'].to_numpy()[item]
+    margin = np.where(status == 2, rng.uniform(-0.05, 0.05, size=lines), rng.uniform(0.1, 0.4, size=lines))
+    profit = np.round(revenue * margin, 2)
+
+    return {
+        'sellers': sellers,
+        'block_seller': block_seller,
+        'block_type': block_type,
+        'block_items': block_items,
+        'item': item,
+        'quantity': quantity,
+        'revenue': revenue,
+        'profit': profit,
+    }
+
+
+def sales_sheet(lines, catalog, year, month):
+    """
+    Анализ продаж: 5 строк шапки (период в B5), "Продавец", фирма, затем по
+    продавцу - строка ФИО, строка типа продаж и товарные строки; в конце -
+    блок внутренней фирмы из исключений УРС (ее строки парсер отбрасывает)
+    """
+    first, last = _period(year, month)
+    head = [[None] * 7 for _ in range(6)]
+    head[0][0] = "Анализ продаж"
+    head[4][1] = f"С {first:%d.%m.%y} по {last:%d.%m.%y}"
+    head[5] = ["Продавец", "Наименование", "Ед.", "Кол-во", "Себестоимость", "Продажи", "Прибыль"]
+
+    sellers = lines['sellers']
+    block_seller = lines['block_seller']
+    block_items = lines['block_items']
+    seller_count = len(sellers)
+
+    # Размещение строк: [фирма] + по продавцу (ФИО + по блоку (тип + товары)) + блок исключения
+    excluded_items = 5
+    block_size = 1 + block_items
+    seller_size = 1 + np.bincount(block_seller, weights=block_size, minlength=seller_count).astype(np.int64)
+    seller_start = 1 + np.concatenate(([0], np.cumsum(seller_size)[:-1]))
+    block_offset = np.concatenate(([0], np.cumsum(block_size)[:-1]))
+    first_block = np.searchsorted(block_seller, np.arange(seller_count))
+    block_start = seller_start[block_seller] + 1 + block_offset - block_offset[first_block[block_seller]]
+    item_start = np.repeat(block_start + 1, block_items)
+    item_rows = item_start + (np.arange(len(item_start)) - np.repeat(np.cumsum(block_items) - block_items,
+                                                                     block_items))
+    body_rows = 1 + int(seller_size.sum())
+    excluded_start = body_rows
+    rows = body_rows + 2 + excluded_items
+
+    # Колонка A - словарь: коды каталога, ФИО, типы продаж, фирмы
+    codes_text = catalog['code'].astype(str).tolist()
+    categories = codes_text + sellers + SALE_TYPE_LABELS + [OWN_FIRM, EXCLUDED_FIRM]
+    seller_base = len(codes_text)
+    type_base = seller_base + seller_count
+    firm_base = type_base + len(SALE_TYPE_LABELS)
+
+    column_a = np.full(rows, -1, dtype=np.int32)
+    column_a[0] = firm_base
+    column_a[seller_start] = seller_base + np.arange(seller_count)
+    column_a[block_start] = type_base + lines['block_type']
+    column_a[item_rows] = lines['item']
+
+    # Блок внутренней фирмы: фирма, тип продаж, несколько товаров
+    excluded_rows = np.arange(excluded_start + 2, rows)
+    excluded_item = np.arange(excluded_items) % len(codes_text)
+    column_a[excluded_start] = firm_base + 1
+    column_a[excluded_start + 1] = type_base + 1
+    column_a[excluded_rows] = excluded_item
+
+    all_item_rows = np.concatenate([item_rows, excluded_rows])
+    all_items = np.concatenate([lines['item'], excluded_item])
+    quantity = np.concatenate([lines['quantity'], np.ones(excluded_items)])
+    revenue = np.concatenate([lines['revenue'], np.full(excluded_items, 1000.0)])
+    profit = np.concatenate([lines['profit'], np.full(excluded_items, 100.0)])
+
+    def item_column(values):
+        column = np.full(rows, np.nan)
+        column[all_item_rows] = values
+        return column
+
+    def item_text(codes, categories):
+        column = np.full(rows, -1, dtype=np.int32)
+        column[all_item_rows] = codes
+        return _categorical(column, categories)
+
+    body = {
+        0: _categorical(column_a, categories),
+        1: item_text(np.arange(len(catalog))[all_items], catalog['name'].tolist()),
+        2: item_text(catalog['unit'].to_numpy()[all_items], UNITS),
+        3: item_column(quantity),
+        4: item_column(np.round(revenue - profit, 2)),
+        5: item_column(revenue),
+        6: item_column(profit),
+    }
+    return _Sheet(7, head=head, body=body, rows=rows)
+
+
+def zakaz_sheet(lines, seed, year, month):
+    """Заказ: блоки "Незаказной" и "Заказной", строка на продавца (D - кол-во, F - продажи, G - прибыль)"""
+    rng = np.random.default_rng([seed, year, month, 7])
+    sellers = lines['sellers']
+    seller_of_line = np.repeat(lines['block_seller'], lines['block_items'])
+    totals = {
+        key: np.bincount(seller_of_line, weights=lines[key], minlength=len(sellers))
+        for key in ('quantity', 'revenue', 'profit')
+    }
+    chosen = np.sort(rng.choice(len(sellers), size=int(len(sellers) * ZAKAZ_SHARE), replace=False))
+    ordered_share = rng.uniform(0.1, 0.4, size=len(chosen))
+
+    head = [
+        ["Продажи заказных и незаказных товаров", None, None, None, None, None, None],
+        [None] * 7,
+        ["Продавец", None, None, "Количество", "Себестоимость", "Продажи", "Прибыль"],
+    ]
+    for title, share in (("Незаказной", 1 - ordered_share), ("Заказной", ordered_share)):
+        head.append([title] + [None] * 6)
+        for seller, part in zip(chosen.tolist(), share.tolist()):
+            revenue = round(totals['revenue'][seller] * part, 2)
+            profit = round(totals['profit'][seller] * part, 2)
+            head.append([sellers[seller], None, None, round(totals['quantity'][seller] * part),
+                         round(revenue - profit, 2), revenue, profit])
+        head.append([f"Итого {title.lower()}", None, None, None, None, None, None])
+    return _Sheet(7, head=head)
+
+
+# ===== МЕСЯЦ И АРХИВ =====
+
+def generate_month(folder, year=2025, month=1, employees=40, branches=1, items_per_seller=20,
+                   salary=30000, seed=0, file_format='auto', zakaz=True):
+    """
+    Пишет входные файлы одного месяца в папку
+
+    employees, branches, items_per_seller - масштаб (см. SCALES)
+    seed - справочники; данные месяца зависят еще и от year/month
+    file_format: 'auto' (xlsx, если лист помещается в Excel), 'xlsx', 'feather'
+
+    Возвращает {'files': {тип файла: путь}, 'statistics': {...}}
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Формат: {', '.join(FILE_FORMATS)}")
+    if branches < 1 or employees < branches:
+        raise ValueError("Нужен хотя бы один сотрудник на филиал")
+    os.makedirs(folder, exist_ok=True)
+
+    staff = make_structure(employees, branches, seed)
+    lines_expected = int(employees * items_per_seller)
+    catalog = make_catalog(lines_expected, seed)
+    lines = make_sales_lines(staff, catalog, items_per_seller, year, month, seed)
+
+    sheets = {
+        'staff': staff_sheet(staff),
+        'urs': urs_sheet(staff, salary, seed),
+        'bonus': bonus_sheet(catalog),
+        'schedule': schedule_sheet(staff, year, month, seed),
+        'sales': sales_sheet(lines, catalog, year, month),
+    }
+    if zakaz:
+        sheets['zakaz'] = zakaz_sheet(lines, seed, year, month)
+
+    files = {}
+    for kind, sheet in sheets.items():
+        files[kind] = _write_sheet(sheet, folder, kind, file_format)
+        # Тело листа больше не нужно - освобождаем память до следующего файла
+        sheet.body = {}
+
+    return {
+        'files': files,
+        'statistics': {
+            'employees': employees,
+            'branches': branches,
+            'departments': staff['Отдел'].nunique(),
+            'sellers': len(lines['sellers']),
+            'sales_lines': len(lines['item']),
+            'catalog': len(catalog),
+            'bonus_items': int((catalog['status'] > 0).sum()),
+        },
+    }
+
+
+def generate_archive(root, months=3, year=2025, first_month=1, **options):
+    """
+    Папки месяцев для пакетного расчета: <root>/<год>-<месяц>/данные
+
+    Справочники одинаковы во всех месяцах (один seed) - как в реальных выгрузках
+    """
+    results = {}
+    for offset in range(months):
+        month_year = year + (first_month - 1 + offset) // 12
+        month = (first_month - 1 + offset) % 12 + 1
+        label = f"{month_year}-{month:02d}"
+        results[label] = generate_month(os.path.join(root, label, "данные"), month_year, month, **options)
+    return results
+
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Синтетические входные файлы для проверки и замеров")
+    parser.add_argument('folder', help="папка месяца (или корневая папка при --months)")
+    parser.add_argument('--scale', choices=list(SCALES), default='branch',
+                        help="готовый масштаб (по умолчанию branch - один филиал)")
+    parser.add_argument('--employees', type=int, help="сотрудников (вместо масштаба)")
+    parser.add_argument('--branches', type=int, help="филиалов")
+    parser.add_argument('--items-per-seller', type=int, help="товарных строк на продавца")
+    parser.add_argument('--months', type=int, default=None, help="архив из N месяцев для --batch")
+    parser.add_argument('--year', type=int, default=2025)
+    parser.add_argument('--month', type=int, default=1, help="месяц (первый месяц архива)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=FILE_FORMATS, default='auto', dest='file_format')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    options = dict(SCALES[args.scale])
+    for key in ('employees', 'branches', 'items_per_seller'):
+        if getattr(args, key) is not None:
+            options[key] = getattr(args, key)
+    options['branches'] = min(options['branches'], options['employees'])
+
+    start = time.perf_counter()
+    if args.months:
+        generated = generate_archive(args.folder, args.months, args.year, args.month, seed=args.seed,
+                                     file_format=args.file_format, **options)
+    else:
+        generated = {args.folder: generate_month(args.folder, args.year, args.month, seed=args.seed,
+                                                 file_format=args.file_format, **options)}
+
+    for label, result in generated.items():
+        stats = result['statistics']
+        print(f"📁 {label}: сотрудников {stats['employees']:,}, отделов {stats['departments']:,}, "
+              f"продавцов {stats['sellers']:,}, товарных строк {stats['sales_lines']:,}")
+        for kind, path in result['files'].items():
+            print(f"   • {kind}: {os.path.basename(path)} ({os.path.getsize(path) / 1024 / 1024:.1f} МБ)")
+    print(f"✅ Готово за {time.perf_counter() - start:.1f} с")
+    sys.exit(0)